@@ -1,13 +1,45 @@
+import os
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+
+# the service modules live next to this package and are imported as top-level packages
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from inference_service.micro_batcher import batcher_stats
+from models.model_pool import get_model_pool
 from .routers import health, detect, pipeline, analyze
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Share one model pool across all requests. MODEL_POOL_PRELOAD (comma-separated model types that
+    build from defaults, e.g. "fasterrcnn,roi_attribute") loads those on CPU at startup so the first
+    request does not pay for it. Idle models are dropped on shutdown.
+    """
+    pool = get_model_pool()
+    preload = [name.strip() for name in os.environ.get("MODEL_POOL_PRELOAD", "").split(",") if name.strip()]
+    for model_type in preload:
+        with pool.lease(model_type):
+            pass
+    app.state.model_pool = pool
+    try:
+        yield
+    finally:
+        pool.clear()
+
 app = FastAPI(
     title = "PAG API",
     description = "API for Pedestrian Attribute Recognition System",
     version = "1.0.0",
+    lifespan = lifespan,
 )
 
+# service hooks the routers reach through request.app.state
+app.state.batcher_stats = batcher_stats
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins = ["*"],
@@ -19,4 +51,4 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(detect.router)
 app.include_router(pipeline.router)
-app.include_router(analyze.router)
\ No newline at end of file
+app.include_router(analyze.router)
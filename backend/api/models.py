@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 
 class ImageRequest(BaseModel):
     image_url: str = Field(..., description="Image URL")
@@ -16,4 +16,21 @@ class Attribute(BaseModel):
     score: Optional[float]
     
 class PipelineResponse(BaseModel):
-    results: Dict[str, List[Attribute]]
\ No newline at end of file
+    results: Dict[str, List[Attribute]]
+
+    @classmethod
+    def from_attribute_result(cls, result: Any, score_threshold: Optional[float] = None) -> "PipelineResponse":
+        """
+        Build from a columnar AttributeResult without going through per-box dicts.
+        """
+        grouped = result.grouped(score_threshold=score_threshold)
+        return cls(results={group: [Attribute(**item) for item in items] for group, items in grouped.items()})
+
+
+class ColumnarAttributes(BaseModel):
+    attribute_names: List[str]
+    probabilities: List[List[float]] = Field(..., description="One row of probabilities per box")
+
+    @classmethod
+    def from_attribute_result(cls, result: Any) -> "ColumnarAttributes":
+        return cls(**result.to_columnar())
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 router = APIRouter(
     prefix="/api/health",
@@ -8,3 +8,11 @@ router = APIRouter(
 @router.get("")
 async def health_check():
     return {"status": "ok"}
+
+@router.get("/batching")
+async def batching_stats(request: Request):
+    return request.app.state.batcher_stats()
+
+@router.get("/models")
+async def model_pool_stats(request: Request):
+    return request.app.state.model_pool.stats()
@@ -0,0 +1,100 @@
+"""
+Cold import time of the service modules, each measured in a fresh interpreter so earlier imports
+do not hide the cost. With --top, the heaviest third-party imports (from `python -X importtime`)
+are listed per module; with --max_seconds the script exits non-zero when a module is slower,
+so startup regressions (an eager transformers / open_clip / matplotlib import) fail CI.
+
+Usage (from backend/):
+    python -m benchmark.bench_import_time
+    python -m benchmark.bench_import_time --modules preprocess.registry preprocess.clip_text_preprocessor \
+        --repeat 5 --top 5 --max_seconds 1.0
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_MODULES = [
+    "preprocess.registry",
+    "preprocess.PreprocessManager",
+    "preprocess.clip_image_preprocessor",
+    "preprocess.vit_image_preprocessor",
+    "preprocess.clip_text_preprocessor",
+    "preprocess.bert_text_prerpocessor",
+    "preprocess.openclip_text_tokenizer",
+    "preprocess.read_image",
+    "models.model_pool",
+    "models.pedestrian_detector",
+    "models.label_based_attribute_analyzer",
+    "models.prompt_based_attribute_analyzer",
+    "models.clip_zero_shot_attribute_analyzer",
+]
+
+_TIMER = "import sys, time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def time_import(module: str) -> float:
+    """
+    Seconds to import `module` in a new interpreter with backend/ on sys.path.
+    """
+    out = subprocess.run([sys.executable, "-c", _TIMER.format(module=module)], cwd=BACKEND_DIR,
+                         capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=BACKEND_DIR))
+    if out.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {out.stderr.strip().splitlines()[-1:]}")
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(module: str, top: int) -> List[Tuple[str, float]]:
+    """
+    Root packages (no dot in the name) with the largest cumulative import time, in seconds,
+    under `python -X importtime`.
+    """
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BACKEND_DIR,
+                         capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=BACKEND_DIR))
+    cumulative: Dict[str, float] = {}
+    for line in out.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cum_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if "." in name:
+            continue
+        cumulative[name] = max(cumulative.get(name, 0.0), int(cum_us) / 1e6)
+    return sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh-interpreter runs per module (median reported)")
+    parser.add_argument("--top", type=int, default=0, help="List the N heaviest top-level imports per module")
+    parser.add_argument("--max_seconds", type=float, default=None, help="Fail if any module is slower")
+    args = parser.parse_args()
+
+    print(f"{'module':<45}{'median s':>10}{'min s':>8}")
+    slow = []
+    for module in args.modules:
+        try:
+            times = [time_import(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module:<45}{'error':>10}  {e}")
+            slow.append(module)
+            continue
+        median = statistics.median(times)
+        print(f"{module:<45}{median:>10.3f}{min(times):>8.3f}")
+        for name, seconds in heaviest_imports(module, args.top) if args.top > 0 else []:
+            print(f"    {name:<41}{seconds:>10.3f}")
+        if args.max_seconds is not None and median > args.max_seconds:
+            slow.append(module)
+
+    if slow:
+        print(f"over budget / failed: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
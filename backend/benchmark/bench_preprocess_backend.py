@@ -0,0 +1,52 @@
+"""
+Compare the 'pil' and 'tensor' DetectionImagePreprocessor backends: frames per second of
+`batch_stack` and the largest difference of the normalized output, per model_type config.
+'pil' is the default; pass backend='tensor' where this benchmark shows the speedup is worth
+the small resampling difference.
+
+Usage (from backend/):
+    python -m benchmark.bench_preprocess_backend --image_dir <images> [--model_types default vit clip]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import torch
+from models.detector_quantization import load_calibration_images
+from preprocess.read_image import DetectionImagePreprocessor
+from benchmark.bench_utils import latency_stats, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image_dir", required=True)
+    parser.add_argument("--num_images", type=int, default=256)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--model_types", nargs="+", default=["default", "vit", "clip", "openclip"])
+    args = parser.parse_args()
+
+    images = load_calibration_images(args.image_dir, args.num_images)
+    batches = [images[i:i + args.batch_size] for i in range(0, len(images), args.batch_size)]
+    print(f"images={len(images)} batch_size={args.batch_size} threads={torch.get_num_threads()}")
+    for model_type in args.model_types:
+        outputs, throughput = {}, {}
+        for backend in ("pil", "tensor"):
+            preprocessor = DetectionImagePreprocessor(model_type=model_type, backend=backend)
+            preprocessor.batch_stack(batches[0][:1])  # warm-up
+            times, results = [], []
+            for batch in batches:
+                elapsed, result = time_call(preprocessor.batch_stack, batch)
+                times.append(elapsed)
+                results.append(result)
+            outputs[backend] = results
+            throughput[backend] = len(images) / max(sum(times), 1e-9)
+            stats = latency_stats(times)
+            print(f"{model_type:<9}{backend:<7}{throughput[backend]:>9.1f} frames/s, "
+                  f"batch mean={stats['mean_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms")
+        diff = max(float((a - b).abs().max()) for a, b in zip(outputs["pil"], outputs["tensor"]))
+        print(f"{model_type:<9}speedup {throughput['tensor'] / throughput['pil']:.2f}x, max |diff|={diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measure the CPU speedup of the INT8 detector backbone/FPN and its box-level agreement with fp32.
+
+Usage (from backend/):
+    python -m benchmark.bench_quantized_detector --model_type retinanet --calibration_dir <images> --eval_dir <images>
+"""
+import argparse
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import torch
+from models.pedestrian_detector import PedestrianDetector
+from models.detector_quantization import load_calibration_images
+from preprocess.read_image import DetectionImagePreprocessor
+from benchmark.bench_utils import latency_stats, matched_fraction, time_call
+
+
+def main():
+    data_dir = "/home/ubuntu/projects/pedestrian_attribute_recognition_30%/data/CrowdHuman/crowdhuman/images"
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model_type", default="fasterrcnn", choices=["fasterrcnn", "retinanet"])
+    parser.add_argument("--calibration_dir", default=f"{data_dir}/train/Images")
+    parser.add_argument("--eval_dir", default=f"{data_dir}/val/Images")
+    parser.add_argument("--num_calibration_images", type=int, default=32)
+    parser.add_argument("--num_eval_images", type=int, default=50)
+    parser.add_argument("--conf_thresh", type=float, default=0.5)
+    parser.add_argument("--iou_thresh", type=float, default=0.5, help="IoU for matching int8 boxes to fp32 boxes")
+    parser.add_argument("--num_threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.num_threads:
+        torch.set_num_threads(args.num_threads)
+
+    fp32 = PedestrianDetector(
+        device='cpu',
+        model_type=args.model_type,
+        conf_thresh=args.conf_thresh,
+        preprocess=DetectionImagePreprocessor(),
+        person_only=True,
+    )
+    # copy so both detectors share exactly the same weights
+    int8 = copy.deepcopy(fp32)
+    int8.quantize(load_calibration_images(args.calibration_dir, args.num_calibration_images))
+
+    images = load_calibration_images(args.eval_dir, args.num_eval_images)
+    fp32.detect(images[0])
+    int8.detect(images[0])
+
+    fp32_times, int8_times, agreement, count_ratio = [], [], [], []
+    for image in images:
+        t32, ref = time_call(fp32.detect, image)
+        t8, pred = time_call(int8.detect, image)
+        fp32_times.append(t32)
+        int8_times.append(t8)
+        ref_boxes = [box for box, _ in ref]
+        pred_boxes = [box for box, _ in pred]
+        # symmetric agreement: fp32 boxes recovered by int8 and int8 boxes backed by fp32
+        agreement.append(0.5 * (matched_fraction(ref_boxes, pred_boxes, args.iou_thresh)
+                                + matched_fraction(pred_boxes, ref_boxes, args.iou_thresh)))
+        count_ratio.append(len(pred_boxes) / max(len(ref_boxes), 1))
+
+    s32 = latency_stats(fp32_times)
+    s8 = latency_stats(int8_times)
+    print(f"model_type={args.model_type} images={len(images)} threads={torch.get_num_threads()}")
+    print(f"fp32: mean={s32['mean_ms']:.1f}ms p95={s32['p95_ms']:.1f}ms")
+    print(f"int8: mean={s8['mean_ms']:.1f}ms p95={s8['p95_ms']:.1f}ms")
+    print(f"speedup (mean): {s32['mean_ms'] / max(s8['mean_ms'], 1e-9):.2f}x")
+    print(f"box agreement@{args.iou_thresh:.2f}: {sum(agreement) / len(agreement):.4f}")
+    print(f"int8/fp32 box count ratio: {sum(count_ratio) / len(count_ratio):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare whole-frame and tiled detection on CrowdHuman: person recall @ IoU and latency.
+
+Usage (from backend/):
+    python -m benchmark.bench_tiled_detection --model_type fasterrcnn --num_images 50 --tile_size 640 --overlap 0.2
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.pedestrian_detector import PedestrianDetector
+from preprocess.read_image import DetectionImagePreprocessor, read_image
+from benchmark.bench_utils import latency_stats, matched_fraction, time_call
+
+
+def load_crowdhuman(odgt_path: str, images_dir: str, num_images: int) -> list:
+    """
+    Read (image_path, [gt full boxes as x1, y1, x2, y2]) pairs from a CrowdHuman .odgt file,
+    skipping 'mask' (ignore) regions.
+    """
+    samples = []
+    with open(odgt_path, 'r', encoding='utf8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            gt = []
+            for box in item.get('gtboxes', []):
+                if box.get('tag') != 'person' or not box.get('fbox'):
+                    continue
+                x, y, w, h = box['fbox']
+                gt.append([x, y, x + w, y + h])
+            samples.append((os.path.join(images_dir, item['ID'] + '.jpg'), gt))
+            if len(samples) >= num_images:
+                break
+    return samples
+
+
+def main():
+    data_dir = "/home/ubuntu/projects/pedestrian_attribute_recognition_30%/data/CrowdHuman/crowdhuman"
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--odgt", default=f"{data_dir}/annotation_val.odgt")
+    parser.add_argument("--images_dir", default=f"{data_dir}/images/val/Images")
+    parser.add_argument("--model_type", default="fasterrcnn")
+    parser.add_argument("--num_images", type=int, default=50)
+    parser.add_argument("--conf_thresh", type=float, default=0.5)
+    parser.add_argument("--tile_size", type=int, default=640)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--iou_thresh", type=float, default=0.5, help="IoU for matching detections to ground truth")
+    parser.add_argument("--include_full_frame", action="store_true")
+    args = parser.parse_args()
+
+    detector = PedestrianDetector(
+        model_type=args.model_type,
+        conf_thresh=args.conf_thresh,
+        preprocess=DetectionImagePreprocessor(),
+        person_only=True,
+        max_detections=300,
+    )
+    samples = load_crowdhuman(args.odgt, args.images_dir, args.num_images)
+
+    modes = {
+        # native resolution in both modes; the default 224x224 preprocess resize would make the
+        # whole-frame baseline meaningless on CrowdHuman-sized frames
+        "whole_frame": lambda img: detector.detect_batch([img], resize=False)[0],
+        "tiled": lambda img: detector.detect_tiled(
+            img,
+            tile_size=(args.tile_size, args.tile_size),
+            overlap=args.overlap,
+            include_full_frame=args.include_full_frame,
+        ),
+    }
+    # warm up once so lazy initialization is not timed
+    if samples:
+        image = read_image(samples[0][0])
+        for fn in modes.values():
+            fn(image)
+
+    for name, fn in modes.items():
+        times, recalls = [], []
+        for image_path, gt in samples:
+            image = read_image(image_path)
+            elapsed, detections = time_call(fn, image)
+            times.append(elapsed)
+            recalls.append(matched_fraction(gt, [box for box, _ in detections], args.iou_thresh))
+        stats = latency_stats(times)
+        recall = sum(recalls) / max(len(recalls), 1)
+        print(f"{name:>12}: recall@{args.iou_thresh:.2f}={recall:.4f} "
+              f"mean={stats['mean_ms']:.1f}ms p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms "
+              f"({len(samples)} images)")
+
+
+if __name__ == "__main__":
+    main()
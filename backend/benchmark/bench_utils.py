@@ -0,0 +1,54 @@
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# one IoU implementation, shared with the runtime tracker
+from inference_service.tracker import iou_matrix as box_iou
+
+
+def time_call(fn: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """
+    Run fn once and return (elapsed seconds, result).
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def latency_stats(times: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarize a list of per-call latencies (seconds) in milliseconds.
+    """
+    arr = np.asarray(times, dtype=np.float64) * 1000.0
+    if arr.size == 0:
+        return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    return {
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+    }
+
+
+def matched_fraction(reference: List[Sequence[float]], predicted: List[Sequence[float]], iou_thresh: float = 0.5) -> float:
+    """
+    Fraction of reference boxes greedily matched by a predicted box with IoU >= iou_thresh
+    (recall when reference is ground truth, box agreement when it is another model's output).
+    """
+    if len(reference) == 0:
+        return 1.0
+    if len(predicted) == 0:
+        return 0.0
+    iou = box_iou(reference, predicted)
+    matched = 0
+    used = set()
+    for i in range(iou.shape[0]):
+        order = np.argsort(-iou[i])
+        for j in order:
+            if iou[i, j] < iou_thresh:
+                break
+            if j not in used:
+                used.add(j)
+                matched += 1
+                break
+    return matched / len(reference)
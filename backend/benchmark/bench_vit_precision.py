@@ -0,0 +1,73 @@
+"""
+Measure VitAttributeAnalyzer throughput and attribute-probability drift for fp32 / bf16 / int8 on CPU.
+
+Each local image is treated as one person crop (PA-100K style); drift is the absolute difference
+of every attribute probability against fp32 on the same weights.
+
+Usage (from backend/):
+    python -m benchmark.bench_vit_precision --image_dir <images> [--checkpoint vit.pth]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import torch
+from models.detector_quantization import load_calibration_images
+from models.label_based_attribute_analyzer import VIT_PRECISIONS, VitAttributeAnalyzer
+from models.roi_attribute_head import PA100K_ATTRIBUTES
+from preprocess.read_image import DetectionImagePreprocessor
+from benchmark.bench_utils import latency_stats, time_call
+
+
+def main():
+    data_dir = "/home/ubuntu/projects/pedestrian_attribute_recognition_30%/data/PA-100K/data"
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image_dir", default=data_dir)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--num_images", type=int, default=256)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--precisions", nargs="+", default=list(VIT_PRECISIONS), choices=VIT_PRECISIONS)
+    parser.add_argument("--num_threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.num_threads:
+        torch.set_num_threads(args.num_threads)
+
+    analyzer = VitAttributeAnalyzer(list(PA100K_ATTRIBUTES), device='cpu',
+                                    preprocess=DetectionImagePreprocessor(model_type='vit'))
+    if args.checkpoint is not None:
+        analyzer.load_checkpoint(args.checkpoint)
+
+    images = load_calibration_images(args.image_dir, args.num_images)
+    batches = [images[i:i + args.batch_size] for i in range(0, len(images), args.batch_size)]
+    boxes = [[[0, 0, image.shape[1], image.shape[0]]] for image in images]
+    box_batches = [boxes[i:i + args.batch_size] for i in range(0, len(boxes), args.batch_size)]
+
+    reference = None
+    print(f"images={len(images)} batch_size={args.batch_size} threads={torch.get_num_threads()}")
+    for precision in ["fp32"] + [p for p in args.precisions if p != "fp32"]:
+        analyzer.set_precision(precision)
+        analyzer.analyze_batch(batches[0][:1], box_batches[0][:1])  # warm-up (builds the int8 copy)
+        times, probs = [], []
+        for image_batch, box_batch in zip(batches, box_batches):
+            elapsed, results = time_call(analyzer.analyze_batch, image_batch, box_batch)
+            times.append(elapsed)
+            probs.extend([list(r[0].values()) for r in results])
+        probs = np.asarray(probs, dtype=np.float32)
+        stats = latency_stats(times)
+        throughput = len(images) / max(sum(times), 1e-9)
+        line = f"{precision}: {throughput:.1f} crops/s, batch mean={stats['mean_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms"
+        if reference is None:
+            reference, base_throughput = probs, throughput
+        else:
+            drift = np.abs(probs - reference)
+            flips = np.mean((probs >= 0.5) != (reference >= 0.5))
+            line += (f", speedup {throughput / base_throughput:.2f}x, drift mean={drift.mean():.4f} "
+                     f"max={drift.max():.4f}, label flips@0.5={flips:.4f}")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Latency vs attribute accuracy of VitAttributeAnalyzer with token merging (ToMe) at several reduction ratios.
+
+With --annotation (PA-100K annotation.mat) the test split crops are scored against the labels
+(label-based mA); otherwise images in --image_dir are used and only the drift against the
+unmerged model is reported.
+
+Usage (from backend/):
+    python -m benchmark.bench_vit_token_merging --image_dir <PA-100K>/data --annotation <PA-100K>/annotation.mat \
+        --checkpoint vit.pth --ratios 0 0.25 0.5 0.7
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import torch
+from models.detector_quantization import load_calibration_images
+from models.label_based_attribute_analyzer import VitAttributeAnalyzer
+from models.roi_attribute_head import PA100K_ATTRIBUTES
+from preprocess.read_image import DetectionImagePreprocessor, read_image
+from benchmark.bench_utils import latency_stats, time_call
+
+
+def load_pa100k_test(image_dir: str, annotation: str, num_images: int):
+    import scipy.io
+    mat = scipy.io.loadmat(annotation)
+    names = [name[0][0] for name in mat['test_images_name']][:num_images]
+    labels = mat['test_label'][:num_images].astype(bool)
+    return [read_image(os.path.join(image_dir, name)) for name in names], labels
+
+
+def label_based_ma(preds: np.ndarray, labels: np.ndarray) -> float:
+    tpr = (preds & labels).sum(0) / np.maximum(labels.sum(0), 1)
+    tnr = (~preds & ~labels).sum(0) / np.maximum((~labels).sum(0), 1)
+    return float(((tpr + tnr) / 2).mean())
+
+
+def main():
+    data_dir = "/home/ubuntu/projects/pedestrian_attribute_recognition_30%/data/PA-100K"
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image_dir", default=f"{data_dir}/data")
+    parser.add_argument("--annotation", default=None, help="PA-100K annotation.mat for accuracy")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.0, 0.25, 0.5, 0.7])
+    parser.add_argument("--num_images", type=int, default=512)
+    parser.add_argument("--batch_size", type=int, default=16)
+    parser.add_argument("--num_threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.num_threads:
+        torch.set_num_threads(args.num_threads)
+
+    analyzer = VitAttributeAnalyzer(list(PA100K_ATTRIBUTES), device='cpu',
+                                    preprocess=DetectionImagePreprocessor(model_type='vit'))
+    if args.checkpoint is not None:
+        analyzer.load_checkpoint(args.checkpoint)
+
+    if args.annotation is not None:
+        images, labels = load_pa100k_test(args.image_dir, args.annotation, args.num_images)
+    else:
+        images, labels = load_calibration_images(args.image_dir, args.num_images), None
+    boxes = [[[0, 0, image.shape[1], image.shape[0]]] for image in images]
+
+    print(f"images={len(images)} batch_size={args.batch_size} threads={torch.get_num_threads()}")
+    print(f"{'reduction':>10}{'crops/s':>10}{'p95 ms':>10}{'mA':>8}{'drift':>9}{'flips':>8}")
+    reference, base_throughput = None, None
+    for ratio in [0.0] + [r for r in args.ratios if r != 0.0]:
+        analyzer.set_token_reduction(ratio)
+        analyzer.analyze_batch(images[:1], boxes[:1])  # warm-up
+        times, probs = [], []
+        for start in range(0, len(images), args.batch_size):
+            elapsed, results = time_call(analyzer.analyze_batch, images[start:start + args.batch_size],
+                                         boxes[start:start + args.batch_size])
+            times.append(elapsed)
+            probs.extend([list(r[0].values()) for r in results])
+        probs = np.asarray(probs, dtype=np.float32)
+        throughput = len(images) / max(sum(times), 1e-9)
+        if reference is None:
+            reference, base_throughput = probs, throughput
+        ma = label_based_ma(probs >= 0.5, labels) if labels is not None else float('nan')
+        drift = float(np.abs(probs - reference).mean())
+        flips = float(np.mean((probs >= 0.5) != (reference >= 0.5)))
+        print(f"{ratio:>10.2f}{throughput:>10.1f}{latency_stats(times)['p95_ms']:>10.1f}{ma:>8.4f}"
+              f"{drift:>9.4f}{flips:>8.4f}   ({throughput / base_throughput:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
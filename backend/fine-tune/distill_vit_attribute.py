@@ -0,0 +1,139 @@
+"""
+Distill VitAttributeAnalyzer into a MobileNetV3 / ResNet-18 StudentAttributeAnalyzer on PA-100K crops,
+then report label-based mA and CPU crops/s of teacher vs student on the test split.
+
+The student is trained on a mix of the teacher's temperature-softened sigmoid outputs and the
+ground-truth labels:
+    loss = alpha * T^2 * BCE(sigmoid(s / T), sigmoid(t / T)) + (1 - alpha) * BCE(sigmoid(s), y)
+
+Usage (from backend/):
+    python fine-tune/distill_vit_attribute.py --data_dir <PA-100K> --teacher_checkpoint vit.pth \
+        --arch mobilenet_v3_large --output student.pth
+    # report only
+    python fine-tune/distill_vit_attribute.py --data_dir <PA-100K> --teacher_checkpoint vit.pth \
+        --student_checkpoint student.pth --epochs 0
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import time
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Subset
+from models.label_based_attribute_analyzer import STUDENT_ARCHS, StudentAttributeAnalyzer, VitAttributeAnalyzer
+from models.roi_attribute_head import PA100K_ATTRIBUTES
+from preprocess.read_image import DetectionImagePreprocessor
+from train_roi_attribute_head import PA100KDataset, collate_fn, mean_accuracy
+
+
+def to_batch(analyzer, images, device):
+    return torch.stack([analyzer.preprocess(image) for image in images]).to(device)
+
+
+def distill_loss(student_logits, teacher_logits, labels, temperature: float, alpha: float):
+    soft = F.binary_cross_entropy_with_logits(student_logits / temperature, torch.sigmoid(teacher_logits / temperature))
+    hard = F.binary_cross_entropy_with_logits(student_logits, labels)
+    return alpha * temperature ** 2 * soft + (1 - alpha) * hard
+
+
+def train_epoch(student, teacher, loader, optimizer, device, temperature, alpha):
+    student.model.train()
+    total = 0.0
+    for batch_idx, (images, labels) in enumerate(loader):
+        labels = labels.to(device)
+        with torch.no_grad():
+            teacher_logits = teacher.model(to_batch(teacher, images, device))
+        student_logits = student.model(to_batch(student, images, device))
+        loss = distill_loss(student_logits, teacher_logits, labels, temperature, alpha)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        total += loss.item()
+        if (batch_idx + 1) % 50 == 0:
+            print(f"  Batch [{batch_idx + 1}/{len(loader)}] Loss: {loss.item():.4f}")
+    student.model.eval()
+    return total / max(len(loader), 1)
+
+
+def evaluate(analyzer, loader):
+    """
+    (label-based mA, crops/s) of an analyzer through its public analyze_batch path on CPU.
+    """
+    preds, targets, elapsed, count = [], [], 0.0, 0
+    for images, labels in loader:
+        boxes = [[[0, 0, image.shape[1], image.shape[0]]] for image in images]
+        start = time.perf_counter()
+        results = analyzer.analyze_batch(images, boxes)
+        elapsed += time.perf_counter() - start
+        count += len(images)
+        probs = torch.tensor([[r[0][name] for name in analyzer.attribute_names] for r in results])
+        preds.append(probs >= 0.5)
+        targets.append(labels.bool())
+    return mean_accuracy(torch.cat(preds), torch.cat(targets)), count / max(elapsed, 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data_dir', required=True, help='PA-100K root with annotation.mat and data/')
+    parser.add_argument('--teacher_checkpoint', required=True)
+    parser.add_argument('--student_checkpoint', default=None, help='Resume / evaluate an existing student')
+    parser.add_argument('--arch', default='mobilenet_v3_large', choices=STUDENT_ARCHS)
+    parser.add_argument('--input_size', type=int, nargs=2, default=[256, 128], help='Student input (H, W)')
+    parser.add_argument('--output', default='student_attribute.pth')
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--temperature', type=float, default=2.0)
+    parser.add_argument('--alpha', type=float, default=0.7, help='Weight of the teacher (soft) loss')
+    parser.add_argument('--num_workers', type=int, default=4)
+    parser.add_argument('--num_eval_images', type=int, default=2000, help='Test crops used for the report')
+    args = parser.parse_args()
+
+    device = torch.device('cuda') if torch.cuda.is_available() else torch.device('cpu')
+    attribute_names = list(PA100K_ATTRIBUTES)
+    teacher = VitAttributeAnalyzer(attribute_names, device=device, preprocess=DetectionImagePreprocessor(model_type='vit'))
+    teacher.load_checkpoint(args.teacher_checkpoint)
+    student = StudentAttributeAnalyzer(attribute_names, device=device, arch=args.arch,
+                                       preprocess=DetectionImagePreprocessor(size=tuple(args.input_size)))
+    if args.student_checkpoint is not None:
+        student.load_checkpoint(args.student_checkpoint)
+
+    if args.epochs > 0:
+        train_loader = DataLoader(PA100KDataset(args.data_dir, 'train'), batch_size=args.batch_size, shuffle=True,
+                                  num_workers=args.num_workers, collate_fn=collate_fn)
+        val_loader = DataLoader(PA100KDataset(args.data_dir, 'val'), batch_size=args.batch_size, shuffle=False,
+                                num_workers=args.num_workers, collate_fn=collate_fn)
+        optimizer = torch.optim.AdamW(student.model.parameters(), lr=args.lr, weight_decay=1e-4)
+        lr_scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=args.epochs)
+        best_ma = 0.0
+        for epoch in range(args.epochs):
+            loss = train_epoch(student, teacher, train_loader, optimizer, device, args.temperature, args.alpha)
+            lr_scheduler.step()
+            val_ma, _ = evaluate(student, val_loader)
+            print(f"Epoch [{epoch + 1}/{args.epochs}] distill loss {loss:.4f} | val mA {val_ma:.4f}")
+            if val_ma > best_ma:
+                best_ma = val_ma
+                student.save_checkpoint(args.output, optimizer=optimizer, epoch=epoch + 1,
+                                        extra={"val_mA": val_ma, "teacher": args.teacher_checkpoint})
+                print(f"  saved {args.output}")
+        student.load_checkpoint(args.output)
+
+    # report on CPU, the deployment target of the student
+    test_set = PA100KDataset(args.data_dir, 'test')
+    test_set = Subset(test_set, range(min(args.num_eval_images, len(test_set))))
+    test_loader = DataLoader(test_set, batch_size=32, shuffle=False, num_workers=args.num_workers, collate_fn=collate_fn)
+    rows = []
+    for name, analyzer in (("teacher vit_b_16", teacher), (f"student {student.arch}", student)):
+        analyzer.model.to('cpu')
+        analyzer.device = 'cpu'
+        rows.append((name, *evaluate(analyzer, test_loader)))
+    print(f"\n{'model':<28}{'mA':>8}{'crops/s':>12}")
+    for name, ma, throughput in rows:
+        print(f"{name:<28}{ma:>8.4f}{throughput:>12.1f}")
+    print(f"student/teacher speedup: {rows[1][2] / max(rows[0][2], 1e-9):.2f}x, mA delta: {rows[1][1] - rows[0][1]:+.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Train the RoI attribute head of RoIAttributeAnalyzer on PA-100K.
+
+PA-100K images are single-person crops, so each image is used as one RoI covering the whole
+frame. The Faster R-CNN backbone / FPN stay frozen (they are shared with detection); only the
+attribute head is trained.
+
+Usage (from backend/):
+    python fine-tune/train_roi_attribute_head.py --data_dir <PA-100K> --output roi_attribute_head.pth
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import scipy.io
+import torch
+import torch.nn as nn
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+from models.roi_attribute_head import PA100K_ATTRIBUTES, RoIAttributeAnalyzer
+
+
+class PA100KDataset(Dataset):
+    """
+    PA-100K split from annotation.mat: (RGB numpy image, float attribute vector).
+    """
+
+    def __init__(self, data_dir: str, split: str = 'train'):
+        mat = scipy.io.loadmat(os.path.join(data_dir, 'annotation.mat'))
+        self.image_dir = os.path.join(data_dir, 'data')
+        self.names = [name[0][0] for name in mat[f'{split}_images_name']]
+        self.labels = mat[f'{split}_label'].astype(np.float32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, idx):
+        image = np.asarray(Image.open(os.path.join(self.image_dir, self.names[idx])).convert('RGB'))
+        return image, torch.from_numpy(self.labels[idx])
+
+
+def collate_fn(batch):
+    images, labels = zip(*batch)
+    return list(images), torch.stack(labels)
+
+
+def whole_image_rois(image_sizes, device):
+    return [torch.tensor([[0.0, 0.0, float(w), float(h)]], device=device) for h, w in image_sizes]
+
+
+def run_epoch(analyzer, loader, criterion, device, optimizer=None):
+    """
+    One pass over loader; trains when optimizer is given. Returns (mean loss, label-based mA).
+    """
+    analyzer.attribute_head.train(optimizer is not None)
+    total_loss, preds, targets = 0.0, [], []
+    for batch_idx, (images, labels) in enumerate(loader):
+        labels = labels.to(device)
+        with torch.no_grad():
+            features, image_list, _ = analyzer.extract_features(images)
+        rois = whole_image_rois(image_list.image_sizes, device)
+        with torch.set_grad_enabled(optimizer is not None):
+            logits = analyzer.attribute_logits(features, rois, image_list.image_sizes)
+            loss = criterion(logits, labels)
+        if optimizer is not None:
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            if (batch_idx + 1) % 50 == 0:
+                print(f"  Batch [{batch_idx + 1}/{len(loader)}] Loss: {loss.item():.4f}")
+        total_loss += loss.item()
+        preds.append((logits.detach() > 0).cpu())
+        targets.append(labels.bool().cpu())
+    return total_loss / max(len(loader), 1), mean_accuracy(torch.cat(preds), torch.cat(targets))
+
+
+def mean_accuracy(preds: torch.Tensor, targets: torch.Tensor) -> float:
+    """
+    PA-100K label-based mA: mean over attributes of (TPR + TNR) / 2.
+    """
+    pos = targets.sum(0).clamp(min=1)
+    neg = (~targets).sum(0).clamp(min=1)
+    tpr = (preds & targets).sum(0) / pos
+    tnr = (~preds & ~targets).sum(0) / neg
+    return float(((tpr + tnr) / 2).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data_dir', required=True, help='PA-100K root with annotation.mat and data/')
+    parser.add_argument('--output', default='roi_attribute_head.pth')
+    parser.add_argument('--detector_checkpoint', default=None, help='Fine-tuned fasterrcnn weights to share')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch_size', type=int, default=32)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--num_workers', type=int, default=4)
+    args = parser.parse_args()
+
+    device = torch.device('cuda') if torch.cuda.is_available() else torch.device('cpu')
+    detector = None
+    if args.detector_checkpoint is not None:
+        from models.pedestrian_detector import PedestrianDetector
+        detector = PedestrianDetector(device=device, model_type='fasterrcnn', checkpoint=args.detector_checkpoint)
+    analyzer = RoIAttributeAnalyzer(attribute_names=PA100K_ATTRIBUTES, device=device, detector=detector)
+    for param in analyzer.model.parameters():
+        param.requires_grad = False
+
+    train_loader = DataLoader(PA100KDataset(args.data_dir, 'train'), batch_size=args.batch_size, shuffle=True,
+                              num_workers=args.num_workers, collate_fn=collate_fn)
+    val_loader = DataLoader(PA100KDataset(args.data_dir, 'val'), batch_size=args.batch_size, shuffle=False,
+                            num_workers=args.num_workers, collate_fn=collate_fn)
+
+    criterion = nn.BCEWithLogitsLoss()
+    optimizer = torch.optim.AdamW(analyzer.attribute_head.parameters(), lr=args.lr, weight_decay=1e-4)
+    lr_scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=args.epochs)
+
+    best_ma = 0.0
+    for epoch in range(args.epochs):
+        train_loss, train_ma = run_epoch(analyzer, train_loader, criterion, device, optimizer)
+        val_loss, val_ma = run_epoch(analyzer, val_loader, criterion, device)
+        lr_scheduler.step()
+        print(f"Epoch [{epoch + 1}/{args.epochs}] train loss {train_loss:.4f} mA {train_ma:.4f} | "
+              f"val loss {val_loss:.4f} mA {val_ma:.4f}")
+        if val_ma > best_ma:
+            best_ma = val_ma
+            analyzer.save_checkpoint(args.output, optimizer=optimizer, epoch=epoch + 1, extra={"val_mA": val_ma})
+            print(f"  saved {args.output}")
+    analyzer.attribute_head.eval()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import asyncio
+import itertools
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+_BATCHERS: "weakref.WeakValueDictionary[str, MicroBatcher]" = weakref.WeakValueDictionary()
+_batcher_ids = itertools.count(1)
+
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Statistics of every live MicroBatcher, keyed by name.
+    """
+    return {name: batcher.stats() for name, batcher in list(_BATCHERS.items())}
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching around a batch inference function.
+
+    Concurrent callers `submit` single items; a worker thread groups them and calls
+    `batch_fn(items)` once per batch when either `max_batch_size` items are queued or the
+    oldest item has waited `max_wait_ms`. Each result is delivered to the caller's future.
+    """
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0,
+                 name: Optional[str] = None):
+        """
+        Args:
+            batch_fn (Callable): Takes a list of items, returns one result per item in the same order.
+            max_batch_size (int): Flush when this many items are queued.
+            max_wait_ms (float): Flush when the oldest queued item has waited this long.
+            name (str, optional): Name under which stats are reported by `batcher_stats`.
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name or f"batcher-{next(_batcher_ids)}"
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        # guards _closed so no item can be queued behind the stop sentinel
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._worker.start()
+        _BATCHERS[self.name] = self
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue one item; the returned future resolves to its result.
+        """
+        future: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError(f"MicroBatcher {self.name} is closed")
+            self._queue.put((item, future, time.monotonic()))
+        return future
+
+    async def submit_async(self, item: Any) -> Any:
+        """
+        Await the result of one item, e.g. from a FastAPI route.
+        """
+        return await asyncio.wrap_future(self.submit(item))
+
+    def __call__(self, item: Any) -> Any:
+        """
+        Blocking single-item call, so a batcher can stand in for a model.
+        """
+        return self.submit(item).result()
+
+    def map(self, items: Sequence[Any]) -> List[Any]:
+        """
+        Submit several items at once and wait for all of them.
+        """
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "batch_size_histogram": dict(self.batch_size_histogram),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+            }
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting items, flush what is queued and stop the worker.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join(timeout)
+
+    def __enter__(self) -> "MicroBatcher":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = first[2] + self.max_wait_ms / 1000.0
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            try:
+                self._process(batch)
+            except Exception as e:
+                # keep the worker alive; whatever is still pending gets the error
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process(self, batch: List[Any]) -> None:
+        # callers may have cancelled (e.g. a cancelled asyncio.wrap_future); drop those items,
+        # the rest become running and can no longer be cancelled
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _, _ in batch]
+        futures = [future for _, future, _ in batch]
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(items)
+            self.largest_batch = max(self.largest_batch, len(items))
+            self.batch_size_histogram[len(items)] = self.batch_size_histogram.get(len(items), 0) + 1
+        try:
+            results = list(self.batch_fn(items))
+            if len(results) != len(items):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+
+def detector_batcher(detector: Any, **kwargs: Any) -> MicroBatcher:
+    """
+    MicroBatcher over PedestrianDetector.detect_batch; items are images.
+    """
+    return MicroBatcher(detector.detect_batch, **kwargs)
+
+
+def analyzer_batcher(analyzer: Any, **kwargs: Any) -> MicroBatcher:
+    """
+    MicroBatcher over an attribute analyzer; items are (image, boxes) pairs.
+    Uses `analyze_batch` for one forward per batch when the analyzer provides it.
+    """
+    def batch_fn(items: List[Any]) -> List[Any]:
+        images = [image for image, _ in items]
+        boxes_list = [boxes for _, boxes in items]
+        if hasattr(analyzer, "analyze_batch"):
+            return analyzer.analyze_batch(images, boxes_list)
+        return [analyzer.analyze(image, boxes) for image, boxes in items]
+    return MicroBatcher(batch_fn, **kwargs)
@@ -1,16 +1,21 @@
 class PipelineController:
-    def __init__(self, preprocessor, model_analyzer, postprocessor):
+    def __init__(self, preprocessor, model_analyzer, postprocessor, batcher=None):
+        # batcher: optional MicroBatcher wrapping model_analyzer; list input goes through batcher.map
         self.preprocessor = preprocessor
         self.model_analyzer = model_analyzer
         self.postprocessor = postprocessor
+        self.batcher = batcher
         
     def run(self, input_data):
         # Preprocess input data
         if isinstance(input_data, list):
             # Batch processing
             preprocessed = [self.preprocessor.preprocess(data) for data in input_data]
-            # Model inference
-            model_outputs = [self.model_analyzer(data) for data in preprocessed]
+            # Model inference (the batcher takes the whole list so it can batch it)
+            if self.batcher is not None:
+                model_outputs = self.batcher.map(preprocessed)
+            else:
+                model_outputs = [self.model_analyzer(data) for data in preprocessed]
             # Postprocess model outputs
             result = self.postprocessor.postprocess_batch(model_outputs)
         else:
@@ -0,0 +1,149 @@
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class AdaptiveResolutionController:
+    """
+    Latency-budget driven input resolution for a PedestrianDetector.
+
+    Each frame is detected on a downscaled copy and the boxes are mapped back to
+    full-resolution coordinates, so attribute analyzers still crop from the original
+    image. The scale is lowered while the recent p95 latency is over budget and raised
+    while there is headroom, but it is never lowered when the small people in the
+    scene would fall below `min_box_size` pixels at the detector input.
+    """
+
+    def __init__(self,
+                 detector: Any,
+                 latency_budget_ms: float = 100.0,
+                 percentile: float = 95.0,
+                 min_scale: float = 0.25,
+                 max_scale: float = 1.0,
+                 initial_scale: float = 1.0,
+                 step: float = 0.1,
+                 window: int = 30,
+                 headroom: float = 0.7,
+                 min_box_size: float = 24.0,
+                 clock: Callable[[], float] = time.perf_counter):
+        """
+        Args:
+            detector: A PedestrianDetector, or anything with `detect(image)`. Detectors that have
+                `set_inference_size` are called as `detect(image, inference_size=..., resize=False)`,
+                so the size is passed per call and a shared detector is never reconfigured.
+            latency_budget_ms (float): Target latency for `percentile` of the frames.
+            percentile (float): Latency percentile held under the budget.
+            min_scale (float): Lowest allowed downscale factor.
+            max_scale (float): Highest allowed scale factor (1.0 = native resolution).
+            initial_scale (float): Starting scale factor.
+            step (float): Relative scale change per adjustment.
+            window (int): Number of recent frames used for the latency percentile; the scale
+                is re-evaluated every `window` frames.
+            headroom (float): Raise the scale only while the percentile latency is below
+                `headroom * latency_budget_ms`.
+            min_box_size (float): Smallest person height (detector input pixels) to keep resolvable.
+            clock (Callable[[], float]): Time source in seconds.
+        """
+        if not 0 < min_scale <= max_scale:
+            raise ValueError(f"Invalid scale range: [{min_scale}, {max_scale}]")
+        self.detector = detector
+        self.latency_budget_ms = latency_budget_ms
+        self.percentile = percentile
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.scale = float(np.clip(initial_scale, min_scale, max_scale))
+        self.step = step
+        self.window = window
+        self.headroom = headroom
+        self.min_box_size = min_box_size
+        self.clock = clock
+        self._latencies = deque(maxlen=window)
+        self._box_heights = deque(maxlen=window)
+        self.frames = 0
+        self.adjustments = 0
+
+    def detect(self, image: np.ndarray) -> List[Tuple[List[float], float]]:
+        """
+        Detect on a downscaled copy of image and return [(box, score), ...] in full-resolution coordinates.
+        """
+        small = self._resize(image, self.scale)
+
+        start = self.clock()
+        if hasattr(self.detector, "set_inference_size"):
+            # run the backend at exactly the downscaled size: no preprocess resize, and the
+            # backend's own resize targets the small frame's longest side
+            detections = self.detector.detect(small, inference_size=max(small.shape[:2]), resize=False)
+        else:
+            detections = self.detector.detect(small)
+        latency_ms = (self.clock() - start) * 1000.0
+
+        # boxes are in pixels of the frame the detector was given; map them with its real size
+        scale_x = image.shape[1] / small.shape[1]
+        scale_y = image.shape[0] / small.shape[0]
+        self._record(latency_ms, detections, scale_y)
+        self._maybe_adjust()
+        if small is image:
+            return detections
+        return [([box[0] * scale_x, box[1] * scale_y, box[2] * scale_x, box[3] * scale_y], score)
+                for box, score in detections]
+
+    def detect_and_analyze(self, image: np.ndarray, analyzer: Any) -> Tuple[List[Tuple[List[float], float]], List[Dict]]:
+        """
+        Detect at the adaptive resolution, then run the attribute analyzer on full-resolution crops.
+        """
+        detections = self.detect(image)
+        return detections, analyzer.analyze(image, detections)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scale": self.scale,
+            "frames": self.frames,
+            "adjustments": self.adjustments,
+            "latency_ms": self._latency_percentile(),
+            "latency_budget_ms": self.latency_budget_ms,
+        }
+
+    def _resize(self, image: np.ndarray, scale: float) -> np.ndarray:
+        if scale == 1.0:
+            return image
+        height, width = image.shape[:2]
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        return cv2.resize(image, size, interpolation=interpolation)
+
+    def _record(self, latency_ms: float, detections: List[Tuple[List[float], float]], scale_y: float) -> None:
+        self.frames += 1
+        self._latencies.append(latency_ms)
+        if detections:
+            heights = np.array([box[3] - box[1] for box, _ in detections], dtype=np.float32)
+            # small-person height in full-resolution pixels
+            self._box_heights.append(float(np.percentile(heights, 10)) * scale_y)
+
+    def _latency_percentile(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        return float(np.percentile(np.asarray(self._latencies), self.percentile))
+
+    def _maybe_adjust(self) -> None:
+        if len(self._latencies) < self.window:
+            return
+        latency = self._latency_percentile()
+        new_scale = self.scale
+        if latency > self.latency_budget_ms:
+            new_scale = self.scale * (1.0 - self.step)
+            if self._box_heights:
+                # do not shrink the small people below what the detector can resolve
+                small_box = min(self._box_heights)
+                new_scale = max(new_scale, min(self.scale, self.min_box_size / max(small_box, 1e-6)))
+        elif latency < self.headroom * self.latency_budget_ms:
+            new_scale = self.scale * (1.0 + self.step)
+        new_scale = float(np.clip(new_scale, self.min_scale, self.max_scale))
+        if new_scale != self.scale:
+            self.scale = new_scale
+            self.adjustments += 1
+            # latencies measured at the old scale no longer describe the new one
+            self._latencies.clear()
+            self._box_heights.clear()
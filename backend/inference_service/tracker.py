@@ -0,0 +1,230 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def iou_matrix(boxes_a: Sequence[Sequence[float]], boxes_b: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    Pairwise IoU between two lists of [x1, y1, x2, y2] boxes, shape (len(a), len(b)).
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).clip(0).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).clip(0).prod(axis=1)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def _assign(iou: np.ndarray, iou_thresh: float) -> List[Tuple[int, int]]:
+    """
+    Match rows (detections) to columns (tracks) maximizing IoU; Hungarian when scipy is
+    available, greedy highest-IoU-first otherwise.
+    """
+    if iou.size == 0:
+        return []
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(-iou)
+        pairs = zip(rows.tolist(), cols.tolist())
+    else:
+        pairs = []
+        used_rows, used_cols = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            r, c = divmod(int(flat), iou.shape[1])
+            if r not in used_rows and c not in used_cols:
+                used_rows.add(r)
+                used_cols.add(c)
+                pairs.append((r, c))
+    return [(r, c) for r, c in pairs if iou[r, c] >= iou_thresh]
+
+
+class KalmanBoxTrack:
+    """
+    Constant-velocity Kalman filter over (cx, cy, area, aspect ratio), as in SORT.
+    """
+    _F = np.eye(7)
+    _F[0, 4] = _F[1, 5] = _F[2, 6] = 1.0
+    _H = np.eye(4, 7)
+    _R = np.diag([1.0, 1.0, 10.0, 10.0])
+    _Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 1e-4])
+
+    def __init__(self, track_id: int, box: Sequence[float], score: float):
+        self.track_id = track_id
+        self.x = np.zeros(7)
+        self.x[:4] = self._to_z(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4])
+        self.box = list(box)
+        self.score = score
+        self.hits = 1
+        self.hit_streak = 1
+        self.age = 0
+        self.time_since_update = 0
+
+    @staticmethod
+    def _to_z(box: Sequence[float]) -> np.ndarray:
+        x1, y1, x2, y2 = box
+        w, h = max(x2 - x1, 1e-6), max(y2 - y1, 1e-6)
+        return np.array([x1 + w / 2.0, y1 + h / 2.0, w * h, w / h])
+
+    def predicted_box(self) -> List[float]:
+        cx, cy, s, r = self.x[:4]
+        w = np.sqrt(max(s * r, 1e-6))
+        h = max(s, 1e-6) / w
+        return [cx - w / 2.0, cy - h / 2.0, cx + w / 2.0, cy + h / 2.0]
+
+    def predict(self) -> List[float]:
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0
+        self.x = self._F @ self.x
+        self.P = self._F @ self.P @ self._F.T + self._Q
+        self.age += 1
+        if self.time_since_update > 0:
+            self.hit_streak = 0
+        self.time_since_update += 1
+        return self.predicted_box()
+
+    def update(self, box: Sequence[float], score: float) -> None:
+        z = self._to_z(box)
+        y = z - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + self._R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self._H) @ self.P
+        self.box = list(box)
+        self.score = score
+        self.hits += 1
+        self.hit_streak += 1
+        self.time_since_update = 0
+
+
+class SortTracker:
+    """
+    SORT-style multi-object tracker: Kalman motion prediction plus IoU assignment.
+    """
+
+    def __init__(self, max_age: int = 30, min_hits: int = 1, iou_thresh: float = 0.3):
+        """
+        Args:
+            max_age (int): Frames a track survives without a matching detection.
+            min_hits (int): Matched frames before a track is reported.
+            iou_thresh (float): Minimum IoU between a detection and a predicted track box.
+        """
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_thresh = iou_thresh
+        self.reset()
+
+    def reset(self) -> None:
+        self.tracks: List[KalmanBoxTrack] = []
+        self.frame_count = 0
+        self._next_id = 1
+
+    def update(self, detections: List[Tuple[List[float], float]]) -> List[Tuple[int, List[float], float]]:
+        """
+        Advance one frame.
+        Args:
+            detections: [(box, score), ...] from PedestrianDetector.
+        Returns:
+            List of (track_id, box, score) for the tracks matched in this frame; box is the detection box.
+        """
+        self.frame_count += 1
+        predicted = [track.predict() for track in self.tracks]
+        boxes = [box for box, _ in detections]
+        matches = _assign(iou_matrix(boxes, predicted), self.iou_thresh)
+
+        matched_dets = set()
+        for det_idx, track_idx in matches:
+            box, score = detections[det_idx]
+            self.tracks[track_idx].update(box, score)
+            matched_dets.add(det_idx)
+        for det_idx, (box, score) in enumerate(detections):
+            if det_idx not in matched_dets:
+                self.tracks.append(KalmanBoxTrack(self._next_id, box, score))
+                self._next_id += 1
+
+        self.tracks = [track for track in self.tracks if track.time_since_update <= self.max_age]
+        return [
+            (track.track_id, track.box, track.score)
+            for track in self.tracks
+            if track.time_since_update == 0
+            and (track.hit_streak >= self.min_hits or self.frame_count <= self.min_hits)
+        ]
+
+    def active_ids(self) -> set:
+        return {track.track_id for track in self.tracks}
+
+
+class TrackedAttributeAnalyzer:
+    """
+    Tracker stage between PedestrianDetector and an AttributeAnalyzerBase implementation.
+
+    Attributes are computed only for new tracks and for tracks whose cached attributes are
+    older than `refresh_interval` frames; all other boxes reuse the per-track cache. Boxes
+    that need analysis in a frame go through a single `analyzer.analyze` call.
+    """
+
+    def __init__(self, analyzer: Any, tracker: Optional[SortTracker] = None, refresh_interval: int = 30):
+        """
+        Args:
+            analyzer: An AttributeAnalyzerBase implementation.
+            tracker (SortTracker, optional): Tracker instance, a default SortTracker if None.
+            refresh_interval (int): Re-analyze a track every N frames (0 never refreshes).
+        """
+        self.analyzer = analyzer
+        self.tracker = tracker if tracker is not None else SortTracker()
+        self.refresh_interval = refresh_interval
+        self._cache: Dict[int, Tuple[Dict[str, float], int]] = {}
+        self.boxes_analyzed = 0
+        self.cache_hits = 0
+
+    def reset(self) -> None:
+        self.tracker.reset()
+        self._cache.clear()
+
+    def analyze_frame(self, image: Any, detections: List[Tuple[List[float], float]]) -> List[Dict[str, Any]]:
+        """
+        Args:
+            image (numpy array): The current frame.
+            detections: [(box, score), ...] for this frame.
+        Returns:
+            list of dict: {'track_id', 'box', 'score', 'attributes'} per tracked person.
+        """
+        tracks = self.tracker.update(detections)
+        frame = self.tracker.frame_count
+        stale = [
+            i for i, (track_id, _, _) in enumerate(tracks)
+            if track_id not in self._cache
+            or (self.refresh_interval and frame - self._cache[track_id][1] >= self.refresh_interval)
+        ]
+        if stale:
+            attributes = self.analyzer.analyze(image, [tracks[i][1] for i in stale])
+            for i, attrs in zip(stale, attributes):
+                self._cache[tracks[i][0]] = (attrs, frame)
+            self.boxes_analyzed += len(stale)
+        self.cache_hits += len(tracks) - len(stale)
+
+        # forget attributes of tracks the tracker has dropped
+        active = self.tracker.active_ids()
+        for track_id in [tid for tid in self._cache if tid not in active]:
+            del self._cache[track_id]
+
+        return [
+            {"track_id": track_id, "box": box, "score": score, "attributes": self._cache[track_id][0]}
+            for track_id, box, score in tracks
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.boxes_analyzed + self.cache_hits
+        return {
+            "boxes_analyzed": self.boxes_analyzed,
+            "cache_hits": self.cache_hits,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+            "active_tracks": len(self.tracker.tracks),
+        }
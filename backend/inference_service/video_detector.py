@@ -0,0 +1,119 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def read_video_frames(video_path: str) -> Iterator[np.ndarray]:
+    """
+    Yield RGB frames from a video file or stream URL.
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise IOError(f"Failed to open video: {video_path}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+
+
+class MotionGatedDetector:
+    """
+    Video / stream mode for fixed cameras: skip detection on static frames.
+
+    Every frame is reduced to a small blurred grayscale thumbnail and compared with the
+    thumbnail of the last frame that was actually detected. If the fraction of changed
+    pixels stays below `motion_ratio`, the previous detections are reused. A detection
+    is forced every `refresh_interval` frames so slow changes are never missed.
+    """
+
+    def __init__(self,
+                 detector: Any,
+                 pixel_thresh: int = 25,
+                 motion_ratio: float = 0.005,
+                 refresh_interval: int = 30,
+                 downsample_width: int = 160,
+                 blur_kernel: int = 5):
+        """
+        Args:
+            detector: Anything with `detect(frame)`, e.g. PedestrianDetector or AdaptiveResolutionController.
+            pixel_thresh (int): Grayscale difference (0-255) above which a thumbnail pixel counts as moving.
+            motion_ratio (float): Fraction of moving pixels that triggers a new detection.
+            refresh_interval (int): Force a detection at least every N frames (0 disables forcing).
+            downsample_width (int): Width of the motion thumbnail.
+            blur_kernel (int): Gaussian blur kernel size used to suppress sensor noise (odd, 0 disables).
+        """
+        self.detector = detector
+        self.pixel_thresh = pixel_thresh
+        self.motion_ratio = motion_ratio
+        self.refresh_interval = refresh_interval
+        self.downsample_width = downsample_width
+        self.blur_kernel = blur_kernel
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget the reference frame and counters, e.g. when switching to another stream.
+        """
+        self._reference: Optional[np.ndarray] = None
+        self._last_detections: List[Tuple[List[float], float]] = []
+        self._since_refresh = 0
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.forced_refreshes = 0
+        self.last_motion = 0.0
+
+    def detect(self, frame: np.ndarray) -> List[Tuple[List[float], float]]:
+        """
+        Detect on frame, or return the previous detections if the scene is static.
+        """
+        thumb = self._thumbnail(frame)
+        run = self._reference is None or thumb.shape != self._reference.shape
+        if not run:
+            moving = cv2.absdiff(thumb, self._reference) > self.pixel_thresh
+            self.last_motion = float(np.count_nonzero(moving)) / moving.size
+            run = self.last_motion >= self.motion_ratio
+            if not run and self.refresh_interval and self._since_refresh + 1 >= self.refresh_interval:
+                run = True
+                self.forced_refreshes += 1
+
+        if run:
+            self._last_detections = self.detector.detect(frame)
+            self._reference = thumb
+            self._since_refresh = 0
+            self.frames_processed += 1
+        else:
+            self._since_refresh += 1
+            self.frames_skipped += 1
+        return self._last_detections
+
+    def run(self, frames: Iterable[np.ndarray]) -> Iterator[List[Tuple[List[float], float]]]:
+        """
+        Yield detections for every frame of a stream (list, generator, cv2.VideoCapture reader, ...).
+        """
+        for frame in frames:
+            yield self.detect(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.frames_processed + self.frames_skipped
+        return {
+            "frames": total,
+            "frames_processed": self.frames_processed,
+            "frames_skipped": self.frames_skipped,
+            "forced_refreshes": self.forced_refreshes,
+            "skip_ratio": self.frames_skipped / total if total else 0.0,
+        }
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        height, width = gray.shape[:2]
+        if width > self.downsample_width:
+            size = (self.downsample_width, max(1, int(round(height * self.downsample_width / width))))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        if self.blur_kernel:
+            gray = cv2.GaussianBlur(gray, (self.blur_kernel, self.blur_kernel), 0)
+        return gray
@@ -1,6 +1,29 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 
+
+def box_coords(box: Any) -> List[int]:
+    """
+    [x1, y1, x2, y2] as ints, accepting (box, score) tuples from the detector.
+    """
+    if isinstance(box, (tuple, list)) and len(box) == 2:
+        box, _ = box
+    return [int(v) for v in box]
+
+
+def crop_box(image: Any, box: Any) -> Any:
+    """
+    Crop a box clipped to the image (H, W[, C]), at least 1x1 pixel.
+    """
+    height, width = image.shape[:2]
+    x1, y1, x2, y2 = box_coords(box)
+    x1 = min(max(x1, 0), width - 1)
+    y1 = min(max(y1, 0), height - 1)
+    x2 = max(min(x2, width), x1 + 1)
+    y2 = max(min(y2, height), y1 + 1)
+    return image[y1:y2, x1:x2]
+
+
 class AttributeAnalyzerBase(ABC):
     """
     屬性分析器基底類別，所有屬性分析器需繼承並實作 analyze 方法。
@@ -0,0 +1,108 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+class AttributeView(Mapping):
+    """
+    Read-only dict view of one row of an AttributeResult: attribute name -> probability.
+    Values are converted to Python floats only when they are read.
+    """
+    __slots__ = ("_names", "_index", "_row")
+
+    def __init__(self, names: Tuple[str, ...], index: Dict[str, int], row: np.ndarray):
+        self._names = names
+        self._index = index
+        self._row = row
+
+    def __getitem__(self, name: str) -> float:
+        return float(self._row[self._index[name]])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class AttributeResult(Sequence):
+    """
+    Columnar attribute output: an (N, A) float32 probability matrix and one attribute_names tuple.
+
+    Behaves like the list of per-box dicts returned by `analyze` (`result[i]['Hat']`, iteration,
+    `len`), but rows are lazy AttributeView objects, so no dict / float objects are created unless
+    a caller asks for them. Postprocessing and the API serializer read `probabilities` directly.
+    """
+
+    def __init__(self, probabilities: np.ndarray, attribute_names: Union[List[str], Tuple[str, ...]]):
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if probabilities.ndim != 2 or probabilities.shape[1] != len(attribute_names):
+            raise ValueError(
+                f"probabilities must be (N, {len(attribute_names)}), got shape {probabilities.shape}"
+            )
+        self.probabilities = probabilities
+        self.attribute_names = tuple(attribute_names)
+        self._index = {name: i for i, name in enumerate(self.attribute_names)}
+
+    def __len__(self) -> int:
+        return self.probabilities.shape[0]
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[AttributeView, "AttributeResult"]:
+        if isinstance(item, slice):
+            return AttributeResult(self.probabilities[item], self.attribute_names)
+        return AttributeView(self.attribute_names, self._index, self.probabilities[item])
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, AttributeResult):
+            return self.attribute_names == other.attribute_names and np.array_equal(self.probabilities, other.probabilities)
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AttributeResult(n={len(self)}, attributes={len(self.attribute_names)})"
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Probabilities of one attribute for every box, shape (N,).
+        """
+        return self.probabilities[:, self._index[name]]
+
+    def to_dicts(self) -> List[Dict[str, float]]:
+        """
+        The legacy list-of-dicts form.
+        """
+        names = self.attribute_names
+        return [dict(zip(names, row)) for row in self.probabilities.tolist()]
+
+    def grouped(self,
+                score_threshold: Optional[float] = None,
+                descending: bool = True,
+                group_prefix: str = "person_") -> Dict[str, List[Dict[str, Any]]]:
+        """
+        PostprocessManager layout: {f"{group_prefix}{i}": [{"attribute_type", "name", "score"}, ...]}
+        per box, filtered by score_threshold and sorted by score, computed on the matrix.
+        """
+        probs = self.probabilities
+        order = np.argsort(-probs if descending else probs, axis=1, kind="stable")
+        sorted_probs = np.take_along_axis(probs, order, axis=1)
+        keep = sorted_probs >= score_threshold if score_threshold is not None else np.ones(probs.shape, dtype=bool)
+        names = self.attribute_names
+        result = {}
+        for i, (row_order, row_probs, row_keep) in enumerate(zip(order.tolist(), sorted_probs.tolist(), keep)):
+            group = f"{group_prefix}{i}"
+            result[group] = [
+                {"attribute_type": group, "name": names[j], "score": p}
+                for j, p, k in zip(row_order, row_probs, row_keep) if k
+            ]
+        return result
+
+    def to_columnar(self) -> Dict[str, Any]:
+        """
+        Compact JSON-ready form: {"attribute_names": [...], "probabilities": [[...], ...]}.
+        """
+        return {"attribute_names": list(self.attribute_names), "probabilities": self.probabilities.tolist()}
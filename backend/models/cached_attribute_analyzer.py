@@ -0,0 +1,213 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .attribute_analyzer_base import AttributeAnalyzerBase, crop_box
+
+
+def dhash(crop: np.ndarray, hash_size: int = 8) -> int:
+    """
+    Difference hash of an RGB / grayscale crop: hash_size x hash_size bits of horizontal gradient signs
+    on a downscaled grayscale copy.
+    """
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(np.ascontiguousarray(crop), cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class CachedAttributeAnalyzer(AttributeAnalyzerBase):
+    """
+    Perceptual-hash cache in front of an AttributeAnalyzerBase implementation.
+
+    Each crop is keyed by (model_version, size / aspect-ratio bucket of the box, dHash of the
+    downscaled crop). The dHash ignores the box shape, so only crops of a similar size and aspect
+    ratio whose hashes are within `hamming_tolerance` bits reuse cached attributes; only the misses
+    are sent to the wrapped analyzer, in a single `analyze` call. Entries live in a bounded LRU.
+    Near-duplicate lookup uses a pigeonhole index: the hash is split into
+    `hamming_tolerance + 1` bands, and any hash within the tolerance matches one band exactly.
+    """
+
+    def __init__(self,
+                 analyzer: Any,
+                 capacity: int = 4096,
+                 hamming_tolerance: int = 2,
+                 hash_size: int = 8,
+                 model_version: Optional[str] = None):
+        """
+        Args:
+            analyzer: The AttributeAnalyzerBase implementation to cache.
+            capacity (int): Maximum number of cached crops.
+            hamming_tolerance (int): Maximum differing hash bits for a cache hit (0 = exact hash only).
+            hash_size (int): dHash grid size, the hash has hash_size ** 2 bits.
+            model_version (str, optional): Part of the cache key, defaults to the analyzer class name;
+                change it (or call `clear`) when the weights change.
+        """
+        bits = hash_size * hash_size
+        if not 0 <= hamming_tolerance < bits:
+            raise ValueError(f"hamming_tolerance must be in [0, {bits}), got {hamming_tolerance}")
+        self.analyzer = analyzer
+        self.capacity = capacity
+        self.hamming_tolerance = hamming_tolerance
+        self.hash_size = hash_size
+        self.model_version = model_version or type(analyzer).__name__
+        self._bands = _band_masks(bits, hamming_tolerance + 1)
+        self._entries: "OrderedDict[Tuple[str, Tuple[Tuple[int, int], int]], Dict[str, float]]" = OrderedDict()
+        self._index: Dict[Tuple[str, Tuple[int, int], int, int], set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def attribute_names(self) -> List[str]:
+        return self.analyzer.attribute_names
+
+    def analyze(self, image: Any, boxes: List[List[float]]) -> List[Dict[str, float]]:
+        """
+        Same contract as the wrapped analyzer's `analyze`; cached crops skip the forward pass.
+        """
+        return self.analyze_batch([image], [boxes])[0]
+
+    def analyze_batch(self, images: List[Any], boxes_list: List[List[Any]]) -> List[List[Dict[str, float]]]:
+        """
+        Cached `analyze_batch`: the misses of all images go through one wrapped call.
+        """
+        results = [[None] * len(boxes) for boxes in boxes_list]
+        pending: Dict[int, List[Tuple[int, int]]] = {}
+        miss_boxes: List[List[Any]] = [[] for _ in images]
+        # cropping and hashing run outside the lock so concurrent callers only serialize on the LRU
+        keys = [[self._key(image, box) for box in boxes] for image, boxes in zip(images, boxes_list)]
+        with self._lock:
+            for i, boxes in enumerate(boxes_list):
+                for j, box in enumerate(boxes):
+                    key = keys[i][j]
+                    cached = self._lookup(key)
+                    if cached is not None:
+                        results[i][j] = dict(cached)
+                        continue
+                    # identical crops within this call are analyzed once
+                    if key in pending:
+                        self.hits += 1
+                    else:
+                        self.misses += 1
+                        pending[key] = []
+                        miss_boxes[i].append((key, box))
+                    pending[key].append((i, j))
+
+        if pending:
+            computed = self._analyze_misses(images, miss_boxes)
+            with self._lock:
+                for key, attrs in computed.items():
+                    self._insert(key, attrs)
+            for key, slots in pending.items():
+                for i, j in slots:
+                    results[i][j] = dict(computed[key])
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "hamming_tolerance": self.hamming_tolerance,
+            }
+
+    def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict = None) -> None:
+        self.analyzer.save_checkpoint(filepath, optimizer=optimizer, epoch=epoch, extra=extra)
+
+    def load_checkpoint(self, filepath: str, optimizer: Any = None) -> dict:
+        """
+        Load weights into the wrapped analyzer; cached attributes of the old weights are dropped.
+        """
+        checkpoint = self.analyzer.load_checkpoint(filepath, optimizer=optimizer)
+        self.clear()
+        return checkpoint
+
+    def _analyze_misses(self, images: List[Any], miss_boxes: List[List[Tuple[Any, Any]]]) -> Dict[Any, Dict[str, float]]:
+        boxes_list = [[box for _, box in entries] for entries in miss_boxes]
+        if hasattr(self.analyzer, "analyze_batch"):
+            outputs = self.analyzer.analyze_batch(images, boxes_list)
+        else:
+            outputs = [self.analyzer.analyze(image, boxes) if boxes else [] for image, boxes in zip(images, boxes_list)]
+        computed = {}
+        for entries, attrs_list in zip(miss_boxes, outputs):
+            for (key, _), attrs in zip(entries, attrs_list):
+                computed[key] = attrs
+        return computed
+
+    def _key(self, image: Any, box: Any) -> Tuple[Tuple[int, int], int]:
+        crop = crop_box(image, box)
+        return _shape_bucket(*crop.shape[:2]), dhash(crop, self.hash_size)
+
+    def _lookup(self, key: Tuple[Tuple[int, int], int]) -> Optional[Dict[str, float]]:
+        exact = (self.model_version, key)
+        if exact in self._entries:
+            self._entries.move_to_end(exact)
+            self.hits += 1
+            return self._entries[exact]
+        if self.hamming_tolerance == 0:
+            return None
+        shape, bits = key
+        best, best_distance = None, self.hamming_tolerance + 1
+        for band, mask in enumerate(self._bands):
+            for candidate in self._index.get((self.model_version, shape, band, bits & mask), ()):
+                distance = bin(candidate ^ bits).count("1")
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        if best is None:
+            return None
+        entry = (self.model_version, (shape, best))
+        self._entries.move_to_end(entry)
+        self.hits += 1
+        self.near_hits += 1
+        return self._entries[entry]
+
+    def _insert(self, key: Tuple[Tuple[int, int], int], attrs: Dict[str, float]) -> None:
+        shape, bits = key
+        entry = (self.model_version, key)
+        if entry not in self._entries:
+            for band, mask in enumerate(self._bands):
+                self._index.setdefault((self.model_version, shape, band, bits & mask), set()).add(bits)
+        self._entries[entry] = attrs
+        self._entries.move_to_end(entry)
+        while len(self._entries) > self.capacity:
+            (version, (old_shape, old_bits)), _ = self._entries.popitem(last=False)
+            for band, mask in enumerate(self._bands):
+                band_key = (version, old_shape, band, old_bits & mask)
+                keys = self._index.get(band_key)
+                if keys is not None:
+                    keys.discard(old_bits)
+                    if not keys:
+                        del self._index[band_key]
+            self.evictions += 1
+
+
+def _shape_bucket(height: int, width: int) -> Tuple[int, int]:
+    """
+    Coarse (size, aspect ratio) class of a crop: height in steps of sqrt(2), height / width in steps of 2 ** 0.25.
+    """
+    return int(round(2 * np.log2(height))), int(round(4 * np.log2(height / width)))
+
+
+def _band_masks(bits: int, bands: int) -> List[int]:
+    """
+    Split a `bits`-bit hash into `bands` contiguous bit masks.
+    """
+    edges = np.linspace(0, bits, bands + 1).astype(int)
+    return [((1 << int(hi - lo)) - 1) << int(lo) for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
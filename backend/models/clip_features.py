@@ -0,0 +1,28 @@
+from typing import Any, Dict
+
+import torch
+
+
+def has_text_encoder(model: Any) -> bool:
+    """
+    True for models with a separate text encoder (transformers CLIPModel or open_clip).
+    """
+    return hasattr(model, "get_text_features") or hasattr(model, "encode_text")
+
+
+def encode_text_features(model: Any, tokens: Dict[str, torch.Tensor]) -> torch.Tensor:
+    """
+    Text embeddings from a transformers CLIPModel (`get_text_features`) or an open_clip model (`encode_text`).
+    """
+    if hasattr(model, "get_text_features"):
+        return model.get_text_features(**tokens)
+    return model.encode_text(tokens["input_ids"])
+
+
+def encode_image_features(model: Any, pixels: torch.Tensor) -> torch.Tensor:
+    """
+    Image embeddings from a transformers CLIPModel (`get_image_features`) or an open_clip model (`encode_image`).
+    """
+    if hasattr(model, "get_image_features"):
+        return model.get_image_features(pixel_values=pixels)
+    return model.encode_image(pixels)
@@ -0,0 +1,240 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+import numpy as np
+import torch
+from models.attribute_analyzer_base import AttributeAnalyzerBase, crop_box
+from models.clip_features import encode_image_features, encode_text_features
+
+DEFAULT_TEMPLATES = (
+    "a photo of a person {}.",
+    "a cropped photo of a pedestrian {}.",
+    "a low resolution photo of a person {}.",
+    "a surveillance camera image of a person {}.",
+)
+"""Prompt templates ensembled for every attribute phrase ('{}' is replaced by the phrase)."""
+
+Phrases = Union[str, Sequence[str]]
+
+
+class ClipZeroShotAttributeAnalyzer(AttributeAnalyzerBase):
+    """
+    Zero-shot attribute analyzer on a CLIP / OpenCLIP model.
+
+    Every attribute is described by one or more phrases; each phrase is expanded with the prompt
+    templates and the normalized text embeddings are averaged (prompt ensembling) into a single
+    attribute vector. Attribute probability is sigmoid(logit_scale * (cos(crop, attribute) -
+    cos(crop, negative))), where the negative is the attribute's own negative phrases or, by
+    default, the plain "a photo of a person." prompt. Text embeddings are computed once; scoring
+    all crops against all attributes is one normalized matmul, so the per-crop cost does not
+    depend on the number of attributes and new attributes need no retraining.
+    """
+
+    def __init__(self,
+                 model: Any,
+                 preprocess: Any,
+                 tokenizer: Callable,
+                 attributes: Dict[str, Phrases],
+                 negatives: Optional[Dict[str, Phrases]] = None,
+                 templates: Sequence[str] = DEFAULT_TEMPLATES,
+                 device: Any = "cpu",
+                 text_batch_size: int = 256):
+        """
+        Args:
+            model: CLIP model (transformers CLIPModel or open_clip model).
+            preprocess: Image preprocessor with `batch_preprocess`, e.g. CLIPImagePreprocessor.
+            tokenizer (Callable): CLIPTextTokenizer / OpenCLIPTEXTTokenizer.
+            attributes (Dict[str, str | list of str]): Attribute name -> describing phrase(s), e.g.
+                {"Hat": ["wearing a hat", "with a cap"]}.
+            negatives (Dict[str, str | list of str], optional): Attribute name -> negative phrase(s),
+                e.g. {"Hat": "with no hat"}; attributes without one share the neutral prompt.
+            templates (Sequence[str]): Prompt templates with a '{}' placeholder.
+            device (str): Device to run the model on.
+            text_batch_size (int): Prompts encoded per text-encoder forward.
+        """
+        self.model = model.to(device)
+        self.model.eval()
+        self.preprocess = preprocess
+        self.tokenizer = tokenizer
+        self.templates = tuple(templates)
+        self.device = device
+        self.text_batch_size = text_batch_size
+        self.attribute_names: List[str] = []
+        self.attributes: Dict[str, List[str]] = {}
+        self.negatives: Dict[str, List[str]] = {}
+        self._negative_keys: List[str] = []
+        self._positive = torch.empty(0)
+        self._negative = torch.empty(0)
+        self._negative_index = torch.empty(0, dtype=torch.long)
+        self.text_embeddings = torch.empty(0)
+        self.add_attributes(attributes, negatives)
+
+    @classmethod
+    def from_pretrained(cls, attributes: Dict[str, Phrases], model_name: str = "openai/clip-vit-base-patch32",
+                        device: Any = "cpu", **kwargs) -> "ClipZeroShotAttributeAnalyzer":
+        """
+        Build on a Hugging Face CLIP checkpoint with the repo's CLIP preprocessor and tokenizer.
+        """
+        from transformers import CLIPModel
+        from preprocess.clip_image_preprocessor import CLIPImagePreprocessor
+        from preprocess.clip_text_preprocessor import CLIPTextTokenizer
+        model = CLIPModel.from_pretrained(model_name)
+        return cls(model, CLIPImagePreprocessor(), CLIPTextTokenizer(model_name), attributes, device=device, **kwargs)
+
+    def add_attributes(self, attributes: Dict[str, Phrases], negatives: Optional[Dict[str, Phrases]] = None) -> None:
+        """
+        Add (or replace) attributes; only the new prompts are encoded.
+        """
+        if not attributes:
+            return
+        negatives = negatives or {}
+        for name, phrases in attributes.items():
+            self.attributes[name] = _as_list(phrases)
+            if name in negatives:
+                self.negatives[name] = _as_list(negatives[name])
+            else:
+                self.negatives.pop(name, None)
+
+        new_names = list(attributes)
+        positive = self._ensemble([self.attributes[name] for name in new_names])
+        negative_keys = [_negative_key(self.negatives.get(name)) for name in new_names]
+        missing = [key for key in dict.fromkeys(negative_keys) if key not in self._negative_keys]
+        negative = self._ensemble([list(key) for key in missing])
+
+        keep = [i for i, name in enumerate(self.attribute_names) if name not in attributes]
+        self.attribute_names = [self.attribute_names[i] for i in keep] + new_names
+        kept_positive = self._positive[keep] if keep else positive[:0]
+        kept_index = self._negative_index[keep] if keep else torch.empty(0, dtype=torch.long, device=positive.device)
+        self._negative_keys += missing
+        self._positive = torch.cat([kept_positive, positive])
+        if missing:
+            self._negative = torch.cat([self._negative, negative]) if self._negative.numel() else negative
+        new_index = torch.tensor([self._negative_keys.index(key) for key in negative_keys],
+                                 dtype=torch.long, device=positive.device)
+        self._negative_index = torch.cat([kept_index, new_index])
+        self._drop_unused_negatives()
+        # (A + K, D): attribute vectors followed by the distinct negative vectors
+        self.text_embeddings = torch.cat([self._positive, self._negative])
+
+    def _drop_unused_negatives(self) -> None:
+        """
+        Evict negative vectors no attribute refers to any more, e.g. after an attribute was replaced.
+        """
+        used = sorted(set(self._negative_index.tolist()))
+        if len(used) == len(self._negative_keys):
+            return
+        remap = {old: new for new, old in enumerate(used)}
+        self._negative_keys = [self._negative_keys[i] for i in used]
+        self._negative = self._negative[used]
+        self._negative_index = torch.tensor([remap[i] for i in self._negative_index.tolist()],
+                                            dtype=torch.long, device=self._negative_index.device)
+
+    def analyze(self, image: Any, boxes: List[List[float]]) -> List[Dict[str, float]]:
+        """
+        Args:
+            image (numpy array): The input image (H, W, C).
+            boxes (list of list of float): [x1, y1, x2, y2] boxes or (box, score) tuples.
+        Returns:
+            list of dict: Attribute name -> probability for each box.
+        """
+        if len(boxes) == 0:
+            return []
+        probs = self.score_crops([np.ascontiguousarray(crop_box(image, box)) for box in boxes])
+        return [{name: float(p) for name, p in zip(self.attribute_names, row)} for row in probs]
+
+    def score_crops(self, crops: List[np.ndarray]) -> np.ndarray:
+        """
+        Attribute probabilities (N, A) for a list of person crops.
+        """
+        if not self.attribute_names:
+            return np.zeros((len(crops), 0), dtype=np.float32)
+        pixels = torch.from_numpy(np.asarray(self.preprocess.batch_preprocess(crops), dtype=np.float32))
+        with torch.no_grad():
+            image_embeddings = encode_image_features(self.model, pixels.to(self.device)).float()
+            image_embeddings = image_embeddings / image_embeddings.norm(dim=-1, keepdim=True)
+            similarity = image_embeddings @ self.text_embeddings.T
+            num_attributes = len(self.attribute_names)
+            negative = similarity[:, num_attributes:][:, self._negative_index]
+            logits = self._logit_scale() * (similarity[:, :num_attributes] - negative)
+            return torch.sigmoid(logits).cpu().numpy()
+
+    def _ensemble(self, phrase_groups: List[List[str]]) -> torch.Tensor:
+        """
+        One normalized, template- and phrase-averaged text embedding per phrase group, shape (G, D).
+        """
+        prompts, owners = [], []
+        for group, phrases in enumerate(phrase_groups):
+            for phrase in phrases:
+                for template in self.templates:
+                    prompts.append(template.format(phrase).replace(" .", ".").strip())
+                    owners.append(group)
+        if not prompts:
+            return torch.empty(0, device=self.device)
+        chunks = []
+        with torch.no_grad():
+            for start in range(0, len(prompts), self.text_batch_size):
+                tokens = self.tokenizer(prompts[start:start + self.text_batch_size], return_tensors="pt",
+                                        padding=True, truncation=True)
+                tokens = {k: v.to(self.device) for k, v in tokens.items()}
+                chunks.append(encode_text_features(self.model, tokens).float())
+        embeddings = torch.cat(chunks)
+        embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+        owners = torch.tensor(owners, device=embeddings.device)
+        summed = torch.zeros((len(phrase_groups), embeddings.shape[1]), device=embeddings.device)
+        summed.index_add_(0, owners, embeddings)
+        return summed / summed.norm(dim=-1, keepdim=True)
+
+    def _logit_scale(self) -> torch.Tensor:
+        logit_scale = getattr(self.model, "logit_scale", None)
+        return logit_scale.exp() if logit_scale is not None else torch.tensor(100.0, device=self.device)
+
+    def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict = None) -> None:
+        """
+        save the model, attribute bank and encoded text embeddings
+        """
+        checkpoint = {
+            "model_state_dict": self.model.state_dict(),
+            "attribute_names": self.attribute_names,
+            "attributes": self.attributes,
+            "negatives": self.negatives,
+            "templates": self.templates,
+            "text_embeddings": self.text_embeddings.cpu(),
+            "negative_index": self._negative_index.cpu(),
+            "epoch": epoch,
+            "extra": extra
+        }
+        if optimizer is not None:
+            checkpoint['optimizer_state_dict'] = optimizer.state_dict()
+        torch.save(checkpoint, filepath)
+
+    def load_checkpoint(self, filepath: str, optimizer: Any = None) -> dict:
+        """
+        load model checkpoint; the attribute bank is restored without re-encoding the prompts
+        """
+        checkpoint = torch.load(filepath, map_location=self.device)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        if optimizer is not None and 'optimizer_state_dict' in checkpoint:
+            optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        if "text_embeddings" in checkpoint:
+            self.attribute_names = list(checkpoint["attribute_names"])
+            self.attributes = dict(checkpoint["attributes"])
+            self.negatives = dict(checkpoint["negatives"])
+            self.templates = tuple(checkpoint["templates"])
+            num_attributes = len(self.attribute_names)
+            self.text_embeddings = checkpoint["text_embeddings"].to(self.device)
+            self._positive = self.text_embeddings[:num_attributes]
+            self._negative = self.text_embeddings[num_attributes:]
+            self._negative_index = checkpoint["negative_index"].to(self.device)
+            self._negative_keys = [None] * len(self._negative)
+            for name, index in zip(self.attribute_names, self._negative_index.tolist()):
+                self._negative_keys[index] = _negative_key(self.negatives.get(name))
+        return checkpoint
+
+
+def _as_list(phrases: Phrases) -> List[str]:
+    return [phrases] if isinstance(phrases, str) else list(phrases)
+
+
+def _negative_key(phrases: Optional[List[str]]) -> tuple:
+    """
+    Hashable id of a negative phrase set; attributes without negatives share the neutral prompt.
+    """
+    return tuple(phrases) if phrases else ("",)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+
+EXPORT_FORMATS = ('torchscript', 'onnx')
+EXPORTABLE_MODEL_TYPES = ('fasterrcnn', 'retinanet')
+DEFAULT_ARTIFACT_DIR = os.environ.get(
+    "DETECTOR_ARTIFACT_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pedestrian_analysis", "detectors"),
+)
+
+_DEFAULT_WEIGHTS = {
+    'fasterrcnn': 'FasterRCNN_ResNet50_FPN_Weights',
+    'retinanet': 'RetinaNet_ResNet50_FPN_Weights',
+}
+
+
+def _file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def weights_hash(model_type: str, checkpoint: Optional[str] = None, **config: Any) -> str:
+    """
+    Identify the exported weights without building the model: the checkpoint file hash,
+    or the torchvision default weights URL (which embeds the file hash), plus the detector
+    settings that are baked into the exported graph and the torch version.
+    """
+    if checkpoint is not None:
+        source = _file_sha256(checkpoint)
+    else:
+        from torchvision.models import detection
+        source = getattr(detection, _DEFAULT_WEIGHTS[model_type]).DEFAULT.url
+    payload = json.dumps({"model_type": model_type, "weights": source, "torch": torch.__version__, **config},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf8')).hexdigest()[:16]
+
+
+class TorchScriptDetectorRuntime:
+    """
+    Runs a scripted torchvision detector; callable like the eager model.
+    """
+    def __init__(self, filepath: str, device: Any = 'cpu'):
+        self.module = torch.jit.load(filepath, map_location=device).eval()
+
+    def __call__(self, images: List[torch.Tensor]) -> List[Dict[str, torch.Tensor]]:
+        # scripted detection models return (losses, detections)
+        _, detections = self.module(images)
+        return detections
+
+
+class OnnxDetectorRuntime:
+    """
+    Runs an exported torchvision detector with ONNX Runtime; callable like the eager model.
+    The exported graph takes one CHW image, so batches are run image by image.
+    """
+    def __init__(self, filepath: str, device: Any = 'cpu'):
+        import onnxruntime as ort
+        providers = ['CPUExecutionProvider']
+        if str(device).startswith('cuda'):
+            providers.insert(0, 'CUDAExecutionProvider')
+        self.session = ort.InferenceSession(filepath, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+    def __call__(self, images: List[torch.Tensor]) -> List[Dict[str, torch.Tensor]]:
+        outputs = []
+        for image in images:
+            values = self.session.run(None, {self.input_name: image.detach().cpu().numpy()})
+            outputs.append({name: torch.from_numpy(value) for name, value in zip(self.output_names, values)})
+        return outputs
+
+
+def _temp_path(filepath: str) -> str:
+    """
+    A fresh temporary file next to `filepath`, unique per writer, for write-then-rename.
+    """
+    directory, name = os.path.split(filepath)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or None)
+    os.close(fd)
+    return tmp_path
+
+
+def _write_json_atomic(filepath: str, data: Dict[str, Any]) -> None:
+    tmp_path = _temp_path(filepath)
+    try:
+        with open(tmp_path, 'w', encoding='utf8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_detector(model: torch.nn.Module, fmt: str, filepath: str, example_size: Tuple[int, int] = (480, 640)) -> str:
+    """
+    Export an eager torchvision detector to a TorchScript or ONNX file.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    model = model.cpu().eval()
+    # per-writer temp file: concurrent exports of the same key never share a partial file
+    tmp_path = _temp_path(filepath)
+    try:
+        _export_to(model, fmt, tmp_path, example_size)
+        # atomic rename so concurrent workers never load a half-written artifact
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filepath
+
+
+def _export_to(model: torch.nn.Module, fmt: str, tmp_path: str, example_size: Tuple[int, int]) -> None:
+    if fmt == 'torchscript':
+        torch.jit.save(torch.jit.script(model), tmp_path)
+    elif fmt == 'onnx':
+        example = torch.rand(3, *example_size)
+        torch.onnx.export(
+            model,
+            ([example],),
+            tmp_path,
+            opset_version=11,
+            input_names=['image'],
+            output_names=['boxes', 'labels', 'scores'],
+            dynamic_axes={
+                'image': {1: 'height', 2: 'width'},
+                'boxes': {0: 'num_detections'},
+                'labels': {0: 'num_detections'},
+                'scores': {0: 'num_detections'},
+            },
+        )
+
+
+def load_or_export(fmt: str,
+                   source_model_type: str,
+                   device: Any = 'cpu',
+                   checkpoint: Optional[str] = None,
+                   artifact_dir: Optional[str] = None,
+                   **detector_kwargs: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Load the cached artifact for (source_model_type, weights hash), exporting it first on a cache miss.
+    Args:
+        fmt (str): 'torchscript' or 'onnx'.
+        source_model_type (str): The eager backend to export, 'fasterrcnn' or 'retinanet'.
+        device: Device to run the artifact on.
+        checkpoint (str, optional): Weights baked into the artifact.
+        artifact_dir (str, optional): Cache directory, defaults to DETECTOR_ARTIFACT_DIR.
+        **detector_kwargs: person_only / conf_thresh / max_detections settings of the source detector.
+    Returns:
+        Tuple[runtime, metadata]: A callable taking a list of CHW tensors and returning torchvision-style
+        output dicts, and the artifact metadata (e.g. the person label id).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if source_model_type not in EXPORTABLE_MODEL_TYPES:
+        raise ValueError(f"Unsupported export source model_type: {source_model_type}")
+    if source_model_type == 'fasterrcnn' and checkpoint is None and not detector_kwargs.get('person_only', False):
+        # the 2-class head is randomly initialised per process, so the artifact could not be
+        # identified by the default weights hash nor match any eager detector
+        raise ValueError("exporting fasterrcnn without person_only requires a checkpoint for its 2-class head")
+    artifact_dir = artifact_dir or DEFAULT_ARTIFACT_DIR
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    key = weights_hash(source_model_type, checkpoint, fmt=fmt, **detector_kwargs)
+    stem = os.path.join(artifact_dir, f"{source_model_type}-{key}")
+    filepath = stem + ('.pt' if fmt == 'torchscript' else '.onnx')
+    meta_path = stem + '.json'
+
+    if not (os.path.exists(filepath) and os.path.exists(meta_path)):
+        from .pedestrian_detector import PedestrianDetector
+        source = PedestrianDetector(device='cpu', model_type=source_model_type, checkpoint=checkpoint, **detector_kwargs)
+        export_detector(source.model, fmt, filepath)
+        metadata = {
+            "format": fmt,
+            "source_model_type": source_model_type,
+            "person_label": int(source.person_label),
+            "weights_hash": key,
+        }
+        _write_json_atomic(meta_path, metadata)
+
+    with open(meta_path, 'r', encoding='utf8') as f:
+        metadata = json.load(f)
+    runtime_cls = TorchScriptDetectorRuntime if fmt == 'torchscript' else OnnxDetectorRuntime
+    return runtime_cls(filepath, device), metadata
@@ -0,0 +1,99 @@
+import os
+from contextlib import contextmanager
+from typing import Any, List
+
+import torch
+import torch.nn as nn
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_calibration_images(image_dir: str, max_images: int = 32) -> List[Any]:
+    """
+    Read up to max_images RGB images (numpy HWC) from a local folder for calibration.
+    """
+    from preprocess.read_image import read_image
+    if not os.path.isdir(image_dir):
+        raise FileNotFoundError(f"Calibration directory {image_dir} does not exist.")
+    names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith(IMAGE_EXTENSIONS))[:max_images]
+    if not names:
+        raise ValueError(f"No calibration images found in {image_dir}")
+    return [read_image(os.path.join(image_dir, name)) for name in names]
+
+
+def _unfreeze_batchnorm(module: nn.Module) -> nn.Module:
+    """
+    Replace torchvision FrozenBatchNorm2d layers with equivalent eval-mode BatchNorm2d,
+    so FX quantization can fold them into the preceding convolutions.
+    """
+    from torchvision.ops.misc import FrozenBatchNorm2d
+    for name, child in module.named_children():
+        if isinstance(child, FrozenBatchNorm2d):
+            bn = nn.BatchNorm2d(child.weight.shape[0], eps=child.eps)
+            with torch.no_grad():
+                bn.weight.copy_(child.weight)
+                bn.bias.copy_(child.bias)
+                bn.running_mean.copy_(child.running_mean)
+                bn.running_var.copy_(child.running_var)
+            setattr(module, name, bn.eval())
+        else:
+            _unfreeze_batchnorm(child)
+    return module
+
+
+@contextmanager
+def _quantized_engine(backend: str):
+    """
+    Temporarily select the process-global quantized engine, restoring the previous one on exit.
+    """
+    previous = torch.backends.quantized.engine
+    torch.backends.quantized.engine = backend
+    try:
+        yield
+    finally:
+        torch.backends.quantized.engine = previous
+
+
+def quantize_detector(model: nn.Module, calibration_inputs: List[torch.Tensor], backend: str = 'fbgemm') -> nn.Module:
+    """
+    Post-training static INT8 quantization (torch.ao FX mode) of the ResNet backbone and
+    FPN convolutions of a torchvision Faster R-CNN / RetinaNet model. The RPN, RoI and
+    detection heads stay in fp32, so the model keeps its input/output contract.
+    Args:
+        model (nn.Module): torchvision detection model with a BackboneWithFPN backbone, in eval mode.
+        calibration_inputs (List[torch.Tensor]): Preprocessed CHW images used to calibrate the observers.
+        backend (str): Quantized engine, 'fbgemm' (x86) or 'qnnpack' (ARM). It is selected only while
+            preparing and converting; the caller's engine is restored afterwards.
+    Returns:
+        nn.Module: The same model object with quantized backbone and FPN blocks.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if not calibration_inputs:
+        raise ValueError("At least one calibration image is required for static quantization.")
+    with _quantized_engine(backend):
+        qconfig_mapping = get_default_qconfig_mapping(backend)
+        model = model.cpu().eval()
+        backbone = model.backbone
+
+        example = calibration_inputs[0].unsqueeze(0)
+        backbone.body = prepare_fx(_unfreeze_batchnorm(backbone.body).eval(), qconfig_mapping, example_inputs=(example,))
+        fpn = backbone.fpn
+        fpn_blocks = [fpn.inner_blocks, fpn.layer_blocks]
+        for blocks in fpn_blocks:
+            for i, block in enumerate(blocks):
+                in_channels = next(block.parameters()).shape[1]
+                block_example = torch.randn(1, in_channels, 8, 8)
+                blocks[i] = prepare_fx(block.eval(), qconfig_mapping, example_inputs=(block_example,))
+
+        # observers record activation ranges during the full-model forward
+        with torch.no_grad():
+            for img in calibration_inputs:
+                model([img])
+
+        backbone.body = convert_fx(backbone.body)
+        for blocks in fpn_blocks:
+            for i, block in enumerate(blocks):
+                blocks[i] = convert_fx(block)
+    return model.eval()
@@ -1,17 +1,241 @@
 import torch
-import matplotlib.pyplot as plt
 import torch.nn as nn
-from torchvision import transforms as T, models
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, List
 import numpy as np
-from .attribute_analyzer_base import AttributeAnalyzerBase
-from preprocess.read_image import Preprocessor
+from .attribute_analyzer_base import AttributeAnalyzerBase, box_coords, crop_box
+from .attribute_result import AttributeResult
+if TYPE_CHECKING:
+    # torchvision / cv2 are only imported when an analyzer is built
+    from preprocess.read_image import DetectionImagePreprocessor
 import os
+import threading
 os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
+CROP_MODES = ('preprocess', 'roi_align')
+VIT_PRECISIONS = ('fp32', 'bf16', 'int8')
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
 
-class ResNet50AttributeAnalyzer(AttributeAnalyzerBase):
-    def __init__(self, attribute_names: list[str], device: torch.device, preprocess: Preprocessor):
+
+class LabelAttributeAnalyzerBase(AttributeAnalyzerBase):
+    """
+    Shared crop / batch / predict logic of the multi-label classifier analyzers.
+    Subclasses build `self.model`, set attribute_names, device and preprocess, and call
+    `_init_crop_mode` and `_init_batching`.
+
+    crop_mode 'preprocess' crops each box in numpy and runs it through `self.preprocess`;
+    'roi_align' converts the frame to a tensor once and extracts every box at the model
+    input size with one `torchvision.ops.roi_align` call, using the size / mean / std of
+    `self.preprocess` when it has them.
+
+    With `max_batch_size` or `memory_budget_mb` set, crops are streamed through the model in
+    chunks and the probabilities are written into one preallocated (N, A) array. Under a memory
+    budget the first chunk is a small probe whose working set per crop is measured (see
+    `_forward_measured`); later chunks are sized to fit the budget, so the working set stays flat
+    however many people are in the frame. The measurement is repeated when the crop shape or
+    dtype, the precision or the token reduction change.
+    """
+
+    def _init_crop_mode(self, crop_mode: str) -> None:
+        if crop_mode not in CROP_MODES:
+            raise ValueError(f"Unsupported crop_mode: {crop_mode}, expected one of {CROP_MODES}")
+        self.crop_mode = crop_mode
+        self._buffers = threading.local()
+
+    def _init_batching(self, max_batch_size: int = None, memory_budget_mb: float = None) -> None:
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        self.max_batch_size = max_batch_size
+        self.memory_budget_mb = memory_budget_mb
+        # estimated peak bytes per crop from the probe chunk, drives the chunk size under a memory budget
+        self._bytes_per_crop = None
+        # (crop shape, dtype, precision, token reduction) the estimate was measured for
+        self._measured_for = None
+
+    def analyze(self, image: Any, boxes: List[List[float]], columnar: bool = False) -> List[dict[str, float]]:
+        """
+        Args:
+            image (numpy array): The input image.
+            boxes (list of list of float): List of bounding boxes, each defined by [x1, y1, x2, y2]
+                (or (box, score) tuples as returned by PedestrianDetector).
+            columnar (bool): Return an AttributeResult (N x A float32 matrix with lazy dict views)
+                instead of building one dict per box.
+        Returns:
+            list of dict: Each dict contains attribute names as keys and their corresponding probabilities as values.
+        """
+        return self.analyze_batch([image], [boxes], columnar=columnar)[0]
+
+    def analyze_batch(self, images: List[Any], boxes_list: List[List[List[float]]],
+                      columnar: bool = False) -> List[List[dict[str, float]]]:
+        """
+        Analyze the boxes of several images with one model forward.
+        Args:
+            images (list of numpy array): The input images.
+            boxes_list (list): Boxes for each image, same format as `analyze`.
+            columnar (bool): One AttributeResult per image (row views of a single matrix).
+        Returns:
+            list: One `analyze` result list per image.
+        """
+        counts = [len(boxes) for boxes in boxes_list]
+        total = sum(counts)
+        probs = np.empty((total, len(self.attribute_names)), dtype=np.float32)
+        items = [(i, box) for i, boxes in enumerate(boxes_list) for box in boxes]
+        start = 0
+        while start < total:
+            end = min(start + self._chunk_size(total - start), total)
+            self._predict_chunk(images, items[start:end], probs[start:end])
+            start = end
+        per_image = []
+        offset = 0
+        for count in counts:
+            rows = probs[offset:offset + count]
+            if columnar:
+                per_image.append(AttributeResult(rows, self.attribute_names))
+            else:
+                per_image.append([dict(zip(self.attribute_names, pred)) for pred in rows.tolist()])
+            offset += count
+        return per_image
+
+    def _predict_chunk(self, images: List[Any], items: List[Any], out: np.ndarray) -> None:
+        """
+        Run one chunk of (image index, box) items and write the probabilities into `out`.
+        """
+        if self.crop_mode == 'roi_align':
+            groups = {}
+            for i, box in items:
+                groups.setdefault(i, []).append(box)
+            batch = self._roi_align_crops([images[i] for i in groups], list(groups.values()))
+        else:
+            batch = torch.stack([self.preprocess(self._crop(images[i], box)) for i, box in items]).to(self.device)
+        with torch.no_grad():
+            setup = (tuple(batch.shape[1:]), batch.dtype, getattr(self, 'precision', None),
+                     getattr(self, 'token_reduction', None))
+            if self.memory_budget_mb is not None and (self._bytes_per_crop is None or setup != self._measured_for):
+                outputs, self._bytes_per_crop = self._forward_measured(batch)
+                self._measured_for = setup
+            else:
+                outputs = self._forward(batch)
+            out[:] = torch.sigmoid(outputs).float().cpu().numpy()
+
+    def _forward_measured(self, batch: torch.Tensor):
+        """
+        `_forward` that also estimates the peak working set per crop, measured while the
+        activations are alive: the allocator peak on CUDA; on CPU the input batch plus three
+        times the largest module output (a layer's input, its output and the residual stream
+        coexist), collected with forward hooks on the modules of the model that runs, so
+        other models and threads are neither observed nor slowed down.
+        Returns:
+            (outputs, bytes per crop)
+        """
+        count = batch.shape[0]
+        if batch.is_cuda:
+            torch.cuda.reset_peak_memory_stats(batch.device)
+            before = torch.cuda.memory_allocated(batch.device)
+            outputs = self._forward(batch)
+            peak = torch.cuda.max_memory_allocated(batch.device) - before + batch.nbytes
+            return outputs, max(peak, batch.nbytes) / count
+
+        largest = [0]
+
+        def record(module, inputs, output):
+            tensors = output if isinstance(output, (tuple, list)) else (output,)
+            for tensor in tensors:
+                if isinstance(tensor, torch.Tensor):
+                    largest[0] = max(largest[0], tensor.nelement() * tensor.element_size())
+
+        handles = [module.register_forward_hook(record) for module in self._inference_model().modules()]
+        try:
+            outputs = self._forward(batch)
+        finally:
+            for handle in handles:
+                handle.remove()
+        return outputs, (batch.nbytes + 3 * largest[0]) / count
+
+    def _chunk_size(self, remaining: int) -> int:
+        """
+        Crops per forward: all remaining without limits, else bounded by max_batch_size and the memory budget.
+        """
+        size = remaining if self.max_batch_size is None else self.max_batch_size
+        if self.memory_budget_mb is not None:
+            if self._bytes_per_crop:
+                size = min(size, int(self.memory_budget_mb * 1024 * 1024 / self._bytes_per_crop))
+            elif self.max_batch_size is None:
+                # no measurement yet: probe with a small chunk
+                size = min(size, 8)
+        return max(1, min(size, remaining))
+
+    def _inference_model(self) -> nn.Module:
+        """
+        The module `_forward` runs (subclasses may run a derived copy of `self.model`).
+        """
+        return self.model
+
+    def _forward(self, batch: torch.Tensor) -> torch.Tensor:
+        return self._inference_model()(batch)
+
+    @staticmethod
+    def _box_coords(box: Any) -> List[int]:
+        return box_coords(box)
+
+    def _crop(self, image: Any, box: Any) -> Any:
+        return crop_box(image, box)
+
+    def _input_spec(self):
+        """
+        (height, width), mean, std of the model input, taken from the preprocessor when available.
+        """
+        size = getattr(self.preprocess, 'size', (224, 224))
+        if isinstance(size, int):
+            size = (size, size)
+        mean = getattr(self.preprocess, 'mean', None)
+        std = getattr(self.preprocess, 'std', None)
+        mean = IMAGENET_MEAN if mean is None else tuple(float(v) for v in mean)
+        std = IMAGENET_STD if std is None else tuple(float(v) for v in std)
+        return tuple(size), mean, std
+
+    def _crop_buffer(self, count: int, height: int, width: int) -> torch.Tensor:
+        """
+        Per-thread preallocated (count, 3, H, W) float batch, grown on demand and reused across calls.
+        """
+        buffer = getattr(self._buffers, 'crops', None)
+        if (buffer is None or buffer.shape[0] < count or buffer.shape[2:] != (height, width)
+                or buffer.device != torch.device(self.device)):
+            buffer = torch.empty((count, 3, height, width), dtype=torch.float32, device=self.device)
+            self._buffers.crops = buffer
+        return buffer[:count]
+
+    def _roi_align_crops(self, images: List[Any], boxes_list: List[List[Any]]) -> torch.Tensor:
+        """
+        Extract every box of every image at the model input size with roi_align (one call per
+        frame) into a preallocated batch, then normalize the whole batch in place.
+        """
+        from torchvision.ops import roi_align
+        (out_h, out_w), mean, std = self._input_spec()
+        total = sum(len(boxes) for boxes in boxes_list)
+        batch = self._crop_buffer(total, out_h, out_w)
+        offset = 0
+        for image, boxes in zip(images, boxes_list):
+            if len(boxes) == 0:
+                continue
+            frame = torch.from_numpy(np.ascontiguousarray(image)).to(self.device)
+            frame = frame.permute(2, 0, 1).unsqueeze(0).float()
+            rois = torch.zeros((len(boxes), 5), dtype=torch.float32)
+            rois[:, 1:] = torch.tensor([self._box_coords(box) for box in boxes], dtype=torch.float32)
+            batch[offset:offset + len(boxes)] = roi_align(
+                frame, rois.to(self.device), output_size=(out_h, out_w), spatial_scale=1.0, aligned=True
+            )
+            offset += len(boxes)
+        # (x / 255 - mean) / std fused into one multiply and one subtract
+        std_t = torch.tensor(std, dtype=torch.float32, device=self.device).view(1, 3, 1, 1)
+        mean_t = torch.tensor(mean, dtype=torch.float32, device=self.device).view(1, 3, 1, 1)
+        batch.mul_(1.0 / (255.0 * std_t)).sub_(mean_t / std_t)
+        return batch
+
+
+class ResNet50AttributeAnalyzer(LabelAttributeAnalyzerBase):
+    def __init__(self, attribute_names: list[str], device: torch.device, preprocess: 'DetectionImagePreprocessor',
+                 crop_mode: str = 'preprocess', max_batch_size: int = None, memory_budget_mb: float = None):
+        from torchvision import models
         self.model = models.resnet50(pretrained=True)
         self.model.fc = nn.Linear(self.model.fc.in_features, len(attribute_names))
         self.model = self.model.to(device)
@@ -19,34 +243,10 @@ class ResNet50AttributeAnalyzer(AttributeAnalyzerBase):
         self.attribute_names = attribute_names
         self.device = device
         self.preprocess = preprocess
+        self._init_crop_mode(crop_mode)
+        self._init_batching(max_batch_size, memory_budget_mb)
 
         
-    def analyze(self, image: Any, boxes: List[List[float]]) -> List[dict[str, float]]:
-        """
-        Args:
-            image (numpy array): The input image.
-            boxes (list of list of float): List of bounding boxes, each defined by [x1, y1, x2, y2].
-        Returns:
-            list of dict: Each dict contains attribute names as keys and their corresponding probabilities as values.   
-        """
-        crops = []
-        for box in boxes:
-            x1, y1, x2, y2 = map(int, box)
-            crop = image[y1:y2, x1:x2, :]
-            crop = self.preprocess(crop)
-            crops.append(crop)
-        if not crops:
-            return []
-        batch = torch.stack(crops).to(self.device)
-        with torch.no_grad():
-            outputs = self.model(batch)
-            probs = torch.sigmoid(outputs).cpu().numpy()
-        results = []
-        for pred in probs:
-            result = {name: float(value) for name, value in zip(self.attribute_names, ped)}
-            results.append(result)
-        return results
-    
     def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict=None) -> None:
         """
         save model checkpoint
@@ -79,8 +279,22 @@ class ResNet50AttributeAnalyzer(AttributeAnalyzerBase):
         except Exception as e:
             raise RuntimeError(f"Error loading checkpoint from {filepath}: {e}")
     
-class VitAttributeAnalyzer(AttributeAnalyzerBase):
-    def __init__(self, attribute_names: list[str], device: torch.device, preprocess: Preprocessor):
+class VitAttributeAnalyzer(LabelAttributeAnalyzerBase):
+    """
+    vit_b_16 multi-label attribute classifier.
+
+    precision selects the inference numerics: 'fp32', 'bf16' (autocast, fast on CPUs with
+    AVX512-BF16 / AMX) or 'int8' (dynamic quantization of the Linear layers, CPU only).
+    token_reduction > 0 runs the encoder with token merging (ToMe): that fraction of the 196
+    patch tokens is merged away progressively through the blocks, mostly redundant background
+    around the person, using the same pretrained weights.
+    `self.model` always keeps the fp32 weights used for training and checkpoints.
+    """
+
+    def __init__(self, attribute_names: list[str], device: torch.device, preprocess: 'DetectionImagePreprocessor',
+                 crop_mode: str = 'preprocess', precision: str = 'fp32',
+                 max_batch_size: int = None, memory_budget_mb: float = None, token_reduction: float = 0.0):
+        from torchvision import models
         self.model = models.vit_b_16(weights=models.ViT_B_16_Weights.DEFAULT)
         in_features = self.model.heads[0].in_features
         self.model.heads = nn.Linear(in_features, len(attribute_names))
@@ -89,37 +303,51 @@ class VitAttributeAnalyzer(AttributeAnalyzerBase):
         self.attribute_names = attribute_names
         self.device = device
         self.preprocess = preprocess
+        self._init_crop_mode(crop_mode)
+        self._init_batching(max_batch_size, memory_budget_mb)
+        self._int8_model = None
+        self.set_token_reduction(token_reduction)
+        self.set_precision(precision)
 
-    def analyze(self, image: Any, boxes: List[list[float]]) -> List[dict[str, float]]:
+    def set_precision(self, precision: str) -> None:
         """
-        Args:
-            image (numpy array): The input image.
-            boxes (list of list of float): List of bounding boxes, each defined by [x1, y1, x2, y2].
-        Returns:
-            list of dict: Each dict contains attribute names as keys and their corresponding probabilities as values.
+        Switch the inference precision ('fp32', 'bf16' or 'int8') without touching the fp32 weights.
         """
-        crops = []
-        for box in boxes:
-            if isinstance(box, (tuple, list)) and len(box) == 2:
-                coords, _ = box
-            else:
-                coords = box
-            x1, y1, x2, y2 = map(int, coords)
-            crop = image[y1:y2, x1:x2, :]
-            crop = self.preprocess(crop)
-            crops.append(crop)
-        if not crops:
-            return []
-        batch = torch.stack(crops).to(self.device)
-        with torch.no_grad():
-            outputs = self.model(batch)
-            probs = torch.sigmoid(outputs).cpu().numpy()
-        results = []
-        for pred in probs:
-            result = {name: float(value) for name, value in zip(self.attribute_names, pred)}
-            results.append(result)
-        return results
-    
+        if precision not in VIT_PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}, expected one of {VIT_PRECISIONS}")
+        if precision == 'int8' and torch.device(self.device).type != 'cpu':
+            raise ValueError("int8 dynamic quantization only runs on CPU")
+        self.precision = precision
+        self._int8_model = None
+
+    def set_token_reduction(self, token_reduction: float) -> None:
+        """
+        Fraction of patch tokens merged away by the last encoder block (0 disables token merging).
+        """
+        from .token_merging import apply_token_merging, merge_schedule
+        merge_schedule(1, 1, token_reduction)  # validates the range
+        self.token_reduction = token_reduction
+        # the merged model shares every parameter with self.model
+        self._fast_model = apply_token_merging(self.model, token_reduction) if token_reduction > 0 else None
+        self._int8_model = None
+
+    def _inference_model(self) -> nn.Module:
+        model = self._fast_model if self._fast_model is not None else self.model
+        if self.precision == 'int8':
+            if self._int8_model is None:
+                self._int8_model = torch.ao.quantization.quantize_dynamic(
+                    model, {nn.Linear}, dtype=torch.qint8, inplace=False
+                )
+            return self._int8_model
+        return model
+
+    def _forward(self, batch: torch.Tensor) -> torch.Tensor:
+        model = self._inference_model()
+        if self.precision == 'bf16':
+            with torch.autocast(device_type=torch.device(self.device).type, dtype=torch.bfloat16):
+                return model(batch)
+        return model(batch)
+
     def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict=None) -> None:
         """
         save model checkpoint
@@ -127,6 +355,7 @@ class VitAttributeAnalyzer(AttributeAnalyzerBase):
         checkpoint = {
             "model_state_dict": self.model.state_dict(),
             "attribute_names": self.attribute_names,
+            "precision": self.precision,
             "epoch": epoch,
             "extra": extra
         }
@@ -134,9 +363,10 @@ class VitAttributeAnalyzer(AttributeAnalyzerBase):
             checkpoint['optimizer_state_dict'] = optimizer.state_dict()
         torch.save(checkpoint, filepath)
     
-    def load_checkpoint(self, filepath: str, optimizer: Any = None) -> dict:
+    def load_checkpoint(self, filepath: str, optimizer: Any = None, adopt_precision: bool = False) -> dict:
         """
-        load model checkpoint
+        load model checkpoint; the current precision is kept unless `adopt_precision` is True,
+        in which case the precision stored in the checkpoint is used
         """
         checkpoint = torch.load(filepath, map_location=self.device)
         self.model.load_state_dict(checkpoint['model_state_dict'])
@@ -144,15 +374,90 @@ class VitAttributeAnalyzer(AttributeAnalyzerBase):
             optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         # recover extra info: attribute_names, epoch, extra
         self.attribute_names = checkpoint.get('attribute_names', self.attribute_names)
+        precision = checkpoint.get('precision', self.precision) if adopt_precision else self.precision
+        # also rebuilds the int8 copy from the new weights
+        self.set_precision(precision)
+        return checkpoint
+
+
+STUDENT_ARCHS = ('mobilenet_v3_large', 'mobilenet_v3_small', 'resnet18')
+
+
+def build_student_model(arch: str, num_attributes: int, pretrained: bool = True) -> nn.Module:
+    """
+    ImageNet backbone with its classifier replaced by a num_attributes multi-label layer.
+    """
+    if arch not in STUDENT_ARCHS:
+        raise ValueError(f"Unsupported student arch: {arch}, expected one of {STUDENT_ARCHS}")
+    from torchvision import models
+    weights = 'DEFAULT' if pretrained else None
+    model = getattr(models, arch)(weights=weights)
+    if arch == 'resnet18':
+        model.fc = nn.Linear(model.fc.in_features, num_attributes)
+    else:
+        model.classifier[-1] = nn.Linear(model.classifier[-1].in_features, num_attributes)
+    return model
+
+
+class StudentAttributeAnalyzer(LabelAttributeAnalyzerBase):
+    """
+    CPU-friendly MobileNetV3 / ResNet-18 attribute classifier distilled from VitAttributeAnalyzer
+    (see fine-tune/distill_vit_attribute.py). Same analyze / checkpoint contract as the teacher.
+    """
+
+    def __init__(self, attribute_names: list[str], device: torch.device, preprocess: 'DetectionImagePreprocessor',
+                 arch: str = 'mobilenet_v3_large', pretrained: bool = True, crop_mode: str = 'preprocess',
+                 max_batch_size: int = None, memory_budget_mb: float = None):
+        self.arch = arch
+        self.model = build_student_model(arch, len(attribute_names), pretrained=pretrained)
+        self.model = self.model.to(device)
+        self.model.eval()
+        self.attribute_names = attribute_names
+        self.device = device
+        self.preprocess = preprocess
+        self._init_crop_mode(crop_mode)
+        self._init_batching(max_batch_size, memory_budget_mb)
+
+    def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict=None) -> None:
+        """
+        save model checkpoint
+        """
+        checkpoint = {
+            "model_state_dict": self.model.state_dict(),
+            "attribute_names": self.attribute_names,
+            "arch": self.arch,
+            "epoch": epoch,
+            "extra": extra
+        }
+        if optimizer is not None:
+            checkpoint['optimizer_state_dict'] = optimizer.state_dict()
+        torch.save(checkpoint, filepath)
+
+    def load_checkpoint(self, filepath: str, optimizer: Any = None) -> dict:
+        """
+        load model checkpoint; rebuilds the network if the checkpoint uses another arch
+        """
+        checkpoint = torch.load(filepath, map_location=self.device)
+        self.attribute_names = checkpoint.get('attribute_names', self.attribute_names)
+        arch = checkpoint.get('arch', self.arch)
+        if arch != self.arch:
+            self.arch = arch
+            self.model = build_student_model(arch, len(self.attribute_names), pretrained=False).to(self.device)
+        self.model.load_state_dict(checkpoint['model_state_dict'])
+        self.model.eval()
+        if optimizer is not None and 'optimizer_state_dict' in checkpoint:
+            optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         return checkpoint
 
 
 if __name__ == "__main__":
     import torch
-    from models.pedestrian_detector import PedestrianDetector
+    from models.model_pool import get_model_pool
     import cv2
+    import matplotlib.pyplot as plt
     import os
     import random
+    from preprocess.read_image import DetectionImagePreprocessor
 
     
     # set image path
@@ -161,23 +466,25 @@ if __name__ == "__main__":
     num_samples = 100
 
     if os.path.exists(img_dir):
+        label_str = "Female,AgeOver60,Age18-60,AgeLess18,Front,Side,Back,Hat,Glasses,HandBag,ShoulderBag,Backpack,HoldObjectsInFront,ShortSleeve,LongSleeve,UpperStride,UpperLogo,UpperPlaid,UpperSplice,LowerStripe,LowerPattern,LongCoat,Trousers,Shorts,Skirt&Dress,boots"
+        attribute_names = label_str.split(",")
+        device = "cpu"
+        preprocess = DetectionImagePreprocessor()
+        # build the models once and share them across images
+        pool = get_model_pool()
+        detector = pool.acquire('yolov8', device=device, preprocess=preprocess, conf_thresh=0.3)
+        analyzer = pool.acquire('vit_attribute', device=device, attribute_names=attribute_names, preprocess=preprocess)
+
         img_list = os.listdir(img_dir)
         sample_img = random.sample(img_list, num_samples)
         for img in sample_img:
             img_path = os.path.join(img_dir, img)
             print("Processing image:", img_path)
             img = cv2.imread(img_path)
-            label_str = "Female,AgeOver60,Age18-60,AgeLess18,Front,Side,Back,Hat,Glasses,HandBag,ShoulderBag,Backpack,HoldObjectsInFront,ShortSleeve,LongSleeve,UpperStride,UpperLogo,UpperPlaid,UpperSplice,LowerStripe,LowerPattern,LongCoat,Trousers,Shorts,Skirt&Dress,boots"
-            attribute_names = label_str.split(",")
-            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            device = "cpu"
             # cv2.imshow("Image Window", img)  # "Image Window" 是視窗名稱，img 是你的影像
             # cv2.waitKey(0)                  # 等待按鍵（0 表示無
             # cv2.destroyAllWindows()         # 關閉所有 OpenCV 視窗限等待）
             
-            preprocess = Preprocessor()
-            detector = PedestrianDetector(device=device,model_type='yolov8', preprocess=preprocess, conf_thresh=0.3)
-            analyzer = VitAttributeAnalyzer(attribute_names=attribute_names, device=device, preprocess=preprocess)
             boxes = detector.detect(img)
             print("boxes:", boxes)
             results = analyzer.analyze(img, boxes)
@@ -215,6 +522,8 @@ if __name__ == "__main__":
 
             plt.tight_layout()
             plt.show()
+        pool.release(detector)
+        pool.release(analyzer)
     else:
         print(f"Image path {img_path} does not exist.")
     
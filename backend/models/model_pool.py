@@ -0,0 +1,251 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.hashable import freeze
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def current_rss_bytes() -> int:
+    """
+    Resident set size of the current process in bytes (0 if it cannot be measured).
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _build_detector(model_type: str, device: Any, checkpoint: Optional[str], **kwargs) -> Any:
+    from models.pedestrian_detector import PedestrianDetector
+    return PedestrianDetector(device=device, model_type=model_type, checkpoint=checkpoint, **kwargs)
+
+
+def _build_label_analyzer(cls_name: str) -> Callable[..., Any]:
+    def factory(model_type: str, device: Any, checkpoint: Optional[str], **kwargs) -> Any:
+        from models import label_based_attribute_analyzer
+        analyzer = getattr(label_based_attribute_analyzer, cls_name)(device=device, **kwargs)
+        if checkpoint is not None:
+            analyzer.load_checkpoint(checkpoint)
+        return analyzer
+    return factory
+
+
+def _build_roi_analyzer(model_type: str, device: Any, checkpoint: Optional[str], **kwargs) -> Any:
+    from models.roi_attribute_head import RoIAttributeAnalyzer
+    return RoIAttributeAnalyzer(device=device, checkpoint=checkpoint, **kwargs)
+
+
+DEFAULT_FACTORIES: Dict[str, Callable[..., Any]] = {
+    "fasterrcnn": _build_detector,
+    "retinanet": _build_detector,
+    "yolov8": _build_detector,
+    "detr": _build_detector,
+    "torchscript": _build_detector,
+    "onnx": _build_detector,
+    "resnet50_attribute": _build_label_analyzer("ResNet50AttributeAnalyzer"),
+    "vit_attribute": _build_label_analyzer("VitAttributeAnalyzer"),
+    "student_attribute": _build_label_analyzer("StudentAttributeAnalyzer"),
+    "roi_attribute": _build_roi_analyzer,
+}
+"""
+Default model factories by model_type.
+Each factory is called as factory(model_type, device, checkpoint, **kwargs).
+"""
+
+
+class _PoolEntry:
+    def __init__(self, key: Tuple):
+        self.key = key
+        self.model = None
+        self.refs = 0
+        self.load_lock = threading.Lock()
+
+
+class ModelPool:
+    """
+    Process-wide pool of shared detector / analyzer instances.
+
+    Models are keyed by (model_type, device, checkpoint, extra kwargs), built lazily on the
+    first `acquire`, reference counted, and evicted least-recently-used first once the
+    process RSS exceeds `memory_budget_mb`. Models that are currently acquired are never evicted.
+    """
+
+    def __init__(self,
+                 memory_budget_mb: Optional[float] = None,
+                 factories: Optional[Dict[str, Callable[..., Any]]] = None,
+                 rss_fn: Callable[[], int] = current_rss_bytes):
+        """
+        Args:
+            memory_budget_mb (float, optional): RSS budget in MB; None disables eviction.
+            factories (Dict[str, Callable], optional): model_type -> factory, defaults to DEFAULT_FACTORIES.
+            rss_fn (Callable[[], int]): Function returning the current RSS in bytes.
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self.factories = dict(DEFAULT_FACTORIES if factories is None else factories)
+        self.rss_fn = rss_fn
+        self._entries: "OrderedDict[Tuple, _PoolEntry]" = OrderedDict()
+        self._keys_by_model: Dict[int, Tuple] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def register_factory(self, model_type: str, factory: Callable[..., Any]) -> None:
+        """
+        Register (or replace) the factory used to build `model_type`.
+        """
+        with self._lock:
+            self.factories[model_type] = factory
+
+    @staticmethod
+    def make_key(model_type: str, device: Any = "cpu", checkpoint: Optional[str] = None, **kwargs) -> Tuple:
+        return (model_type.lower(), str(device), checkpoint, freeze(kwargs))
+
+    def acquire(self, model_type: str, device: Any = "cpu", checkpoint: Optional[str] = None, **kwargs) -> Any:
+        """
+        Get a shared model instance, loading it on first use.
+        Every `acquire` must be paired with a `release` of the returned model.
+        """
+        key = self.make_key(model_type, device, checkpoint, **kwargs)
+        with self._lock:
+            factory = self.factories.get(key[0])
+            if factory is None:
+                raise ValueError(f"Unsupported model_type: {model_type}")
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _PoolEntry(key)
+                self._entries[key] = entry
+            # hold a reference while loading so a concurrent eviction cannot drop the entry
+            entry.refs += 1
+            self._entries.move_to_end(key)
+
+        try:
+            with entry.load_lock:
+                if entry.model is None:
+                    model = factory(key[0], device, checkpoint, **kwargs)
+                    with self._lock:
+                        entry.model = model
+                        self._keys_by_model[id(model)] = key
+                        self.loads += 1
+                else:
+                    with self._lock:
+                        self.hits += 1
+        except Exception:
+            with self._lock:
+                entry.refs -= 1
+                if entry.model is None and entry.refs == 0:
+                    self._entries.pop(key, None)
+            raise
+
+        self._enforce_budget()
+        return entry.model
+
+    def release(self, model: Any) -> None:
+        """
+        Return a model obtained from `acquire`; idle models become eligible for eviction.
+        """
+        with self._lock:
+            key = self._keys_by_model.get(id(model))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or entry.model is not model:
+                raise ValueError("Model was not acquired from this pool")
+            if entry.refs <= 0:
+                raise RuntimeError(f"Model {key[0]} released more times than acquired")
+            entry.refs -= 1
+        self._enforce_budget()
+
+    @contextmanager
+    def lease(self, model_type: str, device: Any = "cpu", checkpoint: Optional[str] = None, **kwargs):
+        """
+        Context manager form of acquire/release.
+        """
+        model = self.acquire(model_type, device, checkpoint, **kwargs)
+        try:
+            yield model
+        finally:
+            self.release(model)
+
+    def evict(self, model_type: str, device: Any = "cpu", checkpoint: Optional[str] = None, **kwargs) -> bool:
+        """
+        Drop an idle model from the pool. Returns False if it is not loaded or still in use.
+        """
+        key = self.make_key(model_type, device, checkpoint, **kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refs > 0 or entry.model is None:
+                return False
+            self._drop(entry)
+        gc.collect()
+        return True
+
+    def clear(self) -> None:
+        """
+        Drop every idle model.
+        """
+        with self._lock:
+            for entry in list(self._entries.values()):
+                if entry.refs == 0 and entry.model is not None:
+                    self._drop(entry)
+        gc.collect()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident": [entry.key[0] for entry in self._entries.values() if entry.model is not None],
+                "in_use": sum(1 for entry in self._entries.values() if entry.refs > 0),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "rss_mb": self.rss_fn() / (1024 * 1024),
+                "memory_budget_mb": self.memory_budget_mb,
+            }
+
+    def _drop(self, entry: _PoolEntry) -> None:
+        self._keys_by_model.pop(id(entry.model), None)
+        entry.model = None
+        self._entries.pop(entry.key, None)
+        self.evictions += 1
+
+    def _enforce_budget(self) -> None:
+        """
+        Evict idle models, least recently used first, until RSS is within budget.
+        """
+        if self.memory_budget_mb is None:
+            return
+        budget = self.memory_budget_mb * 1024 * 1024
+        while self.rss_fn() > budget:
+            with self._lock:
+                victim = next((entry for entry in self._entries.values()
+                               if entry.refs == 0 and entry.model is not None), None)
+                if victim is None:
+                    return
+                self._drop(victim)
+            gc.collect()
+
+
+_default_pool: Optional[ModelPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """
+    Process-wide default pool. The RSS budget is read from MODEL_POOL_BUDGET_MB (unset: no eviction).
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            budget = os.environ.get("MODEL_POOL_BUDGET_MB")
+            _default_pool = ModelPool(memory_budget_mb=float(budget) if budget else None)
+        return _default_pool
@@ -2,86 +2,440 @@ import torch
 from torchvision.transforms import functional as F
 import numpy as np 
 
+COCO_PERSON_LABEL = 1  # torchvision COCO category id for 'person'
+YOLO_PERSON_CLASS = 0  # ultralytics COCO class index for 'person'
+TORCHVISION_BACKENDS = ("fasterrcnn", "detr", "retinanet")
+EXPORTED_BACKENDS = ("torchscript", "onnx")
+
+
 class PedestrianDetector:
-    def __init__(self, device='cpu', model_type='fasterrcnn', conf_thresh=0.7, preprocess=None):
+    def __init__(self, device='cpu', model_type='fasterrcnn', conf_thresh=0.7, preprocess=None,
+                 person_only=False, max_detections=100, checkpoint=None,
+                 tile_size=(640, 640), tile_overlap=0.2, tile_iou_thresh=0.5,
+                 quantize=False, calibration_dir=None, num_calibration_images=32,
+                 export_from='fasterrcnn', artifact_dir=None):
+        """
+        Args:
+            device (str): Device to run the model on.
+            model_type (str): One of 'fasterrcnn', 'yolov8', 'detr', 'retinanet', or an exported
+                backend 'torchscript' / 'onnx'.
+            conf_thresh (float): Minimum confidence score for a detection to be kept.
+            preprocess (Callable, optional): Image preprocessor for the torchvision backends.
+            person_only (bool): Push the person-class restriction, `conf_thresh` and
+                `max_detections` into the model itself so NMS only sees person candidates.
+            max_detections (int): Maximum number of detections per image in person-only mode.
+            checkpoint (str, optional): Fine-tuned weights to load instead of the default
+                pretrained ones (a state dict / training checkpoint, or YOLO weights file).
+            tile_size (tuple): Default (height, width) of the tiles used by `detect_tiled`.
+            tile_overlap (float): Default fraction of overlap between neighbouring tiles.
+            tile_iou_thresh (float): Default IoU threshold of the cross-tile NMS.
+            quantize (bool): Run the fasterrcnn/retinanet backbone and FPN in INT8 on CPU.
+            calibration_dir (str, optional): Folder of local images for post-training calibration,
+                required when `quantize` is True.
+            num_calibration_images (int): Maximum number of calibration images to read.
+            export_from (str): Eager backend ('fasterrcnn' or 'retinanet') exported by the
+                'torchscript' / 'onnx' model types.
+            artifact_dir (str, optional): Cache directory of exported artifacts.
+        """
         self.model_type = model_type.lower()
         self.device = device
         self.preprocess = preprocess
         self.conf_thresh = conf_thresh
+        self.person_only = person_only
+        self.max_detections = max_detections
+        self.checkpoint = checkpoint
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_iou_thresh = tile_iou_thresh
+        self.quantized = False
+        self.inference_size = None
+        # inference size -> shallow model copy with its own resize transform (weights shared)
+        self._sized_models = {}
+        # label id that marks a person in the torchvision output dict
+        self.person_label = COCO_PERSON_LABEL
         
         if self.model_type == 'fasterrcnn':
             from torchvision.models.detection import fasterrcnn_resnet50_fpn
             from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
-            model = fasterrcnn_resnet50_fpn(weights="DEFAULT").to(self.device).eval()
-            in_features = model.roi_heads.box_predictor.cls_score.in_features
-            model.roi_heads.box_predictor = FastRCNNPredictor(in_features, 2)  # 2 classes: background and person
-            self.model = model
+            if self.person_only:
+                model = fasterrcnn_resnet50_fpn(
+                    weights="DEFAULT",
+                    box_score_thresh=self.conf_thresh,
+                    box_detections_per_img=self.max_detections,
+                )
+                # score person against the other 90 pretrained classes, no fine-tuning needed
+                _restrict_fastrcnn_predictor(model, COCO_PERSON_LABEL)
+            else:
+                model = fasterrcnn_resnet50_fpn(weights="DEFAULT")
+                in_features = model.roi_heads.box_predictor.cls_score.in_features
+                model.roi_heads.box_predictor = FastRCNNPredictor(in_features, 2)  # 2 classes: background and person
+            self.model = model.to(self.device).eval()
         elif self.model_type == 'yolov8':
             from ultralytics import YOLO
-            model = YOLO("yolov8n.pt") 
+            model = YOLO(self.checkpoint or "yolov8n.pt")
             self.model = model.to(self.device).eval()
         elif self.model_type == 'detr':
+            if self.person_only:
+                raise ValueError("person_only is not supported for model_type 'detr'")
             from torchvision.models.detection import detr_resnet50
             model = detr_resnet50(weights="DEFAULT").to(self.device).eval()
             self.model = model
         elif self.model_type == "retinanet":
             from torchvision.models.detection import retinanet_resnet50_fpn
-            self.model = retinanet_resnet50_fpn(weights="DEFAULT").to(self.device).eval()
+            if self.person_only:
+                model = retinanet_resnet50_fpn(
+                    weights="DEFAULT",
+                    score_thresh=self.conf_thresh,
+                    detections_per_img=self.max_detections,
+                )
+                _restrict_retinanet_classes(model, [COCO_PERSON_LABEL])
+                # the restricted head only has one class, indexed 0
+                self.person_label = 0
+            else:
+                model = retinanet_resnet50_fpn(weights="DEFAULT")
+            self.model = model.to(self.device).eval()
+        elif self.model_type in EXPORTED_BACKENDS:
+            # artifacts are cached by weights hash, the eager graph is only built on a cache miss
+            from .detector_export import load_or_export
+            self.model, metadata = load_or_export(
+                self.model_type,
+                export_from,
+                device=self.device,
+                checkpoint=self.checkpoint,
+                artifact_dir=artifact_dir,
+                person_only=self.person_only,
+                conf_thresh=self.conf_thresh,
+                max_detections=self.max_detections,
+            )
+            self.person_label = metadata["person_label"]
         else:
             raise ValueError(f"Unsupported model_type: {self.model_type}")
-        
 
+        if self.checkpoint is not None and self.model_type in TORCHVISION_BACKENDS:
+            self.load_checkpoint(self.checkpoint)
+
+        if quantize:
+            if calibration_dir is None:
+                raise ValueError("calibration_dir is required when quantize=True")
+            from .detector_quantization import load_calibration_images
+            self.quantize(load_calibration_images(calibration_dir, num_calibration_images))
+
+    def quantize(self, calibration_images: list, backend: str = 'fbgemm') -> None:
+        """
+        Post-training INT8 quantization of the backbone and FPN, calibrated on the given images.
+        Only available for the fasterrcnn/retinanet backends on CPU; `detect()` is unchanged.
+        Args:
+            calibration_images (list of numpy array): Representative RGB images (H, W, C).
+            backend (str): Quantized engine, 'fbgemm' (x86) or 'qnnpack' (ARM).
+        """
+        if self.model_type not in ["fasterrcnn", "retinanet"]:
+            raise ValueError(f"Quantization is not supported for model_type: {self.model_type}")
+        if str(self.device) != 'cpu':
+            raise ValueError(f"Quantized detectors run on CPU only, got device: {self.device}")
+        if self.quantized:
+            return
+        from .detector_quantization import quantize_detector
+        if self.preprocess is not None:
+            calibration_images = [self.preprocess(image) for image in calibration_images]
+        self.model = quantize_detector(self.model, calibration_images, backend=backend)
+        self._sized_models = {}
+        self.quantized = True
+
+    def load_checkpoint(self, filepath: str) -> dict:
+        """
+        load torchvision detector weights, either a raw state dict or a training
+        checkpoint with a 'model_state_dict' entry
+        """
+        try:
+            checkpoint = torch.load(filepath, map_location=self.device)
+            state_dict = checkpoint.get('model_state_dict', checkpoint)
+            if self.quantized:
+                raise RuntimeError("load checkpoints before quantizing the detector")
+            if 'roi_heads.box_predictor.cls_score.weight' in state_dict:
+                # a fine-tuned background/person head replaces the person-vs-rest wrapper
+                _unwrap_fastrcnn_predictor(self.model)
+            self.model.load_state_dict(state_dict)
+            self.model.eval()
+            return checkpoint
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Checkpoint file not found: {filepath}") from e
+        except Exception as e:
+            raise RuntimeError(f"Error loading checkpoint from {filepath}: {e}")
 
-    def detect(self, image) -> list:
+    def set_inference_size(self, size=None) -> None:
+        """
+        Set the default longest image side the backend runs at, instead of its built-in resize
+        (min side 800 for torchvision, 640 for YOLO). None restores the backend default.
+        Exported backends have the resize baked in and ignore this setting. Callers sharing a
+        detector should pass `inference_size` to `detect` / `detect_batch` instead.
+        Args:
+            size (int, optional): Longest side in pixels.
+        """
+        self.inference_size = size
+
+    def _model_for_size(self, size=None):
+        """
+        The torchvision model to run at longest side `size`: a cached shallow copy sharing every
+        weight with `self.model` but owning its resize transform, so per-call sizes never mutate
+        the model other callers use.
+        """
+        if size is None or self.model_type not in TORCHVISION_BACKENDS:
+            return self.model
+        size = int(size)
+        model = self._sized_models.get(size)
+        if model is None:
+            import copy
+            model = copy.copy(self.model)
+            # nn.Module keeps children in a dict; copy it so replacing the transform leaves self.model untouched
+            model._modules = self.model._modules.copy()
+            transform = copy.copy(self.model.transform)
+            # scale = min(min_size / short_side, max_size / long_side) = size / long_side
+            transform.min_size, transform.max_size = (size,), size
+            model.transform = transform
+            self._sized_models[size] = model
+        return model
+
+    def _yolo_kwargs(self, inference_size=None) -> dict:
+        """
+        Extra arguments for `YOLO.__call__`; in person-only mode the class filter,
+        confidence threshold and detection cap are applied inside the YOLO NMS.
+        """
+        kwargs = {}
+        if inference_size is not None:
+            # YOLO needs a multiple of its max stride
+            kwargs["imgsz"] = max(32, int(round(inference_size / 32)) * 32)
+        if self.person_only:
+            kwargs.update({
+                "classes": [YOLO_PERSON_CLASS],
+                "conf": self.conf_thresh,
+                "max_det": self.max_detections,
+                "verbose": False,
+            })
+        return kwargs
+
+    def detect(self, image, inference_size=None, resize=True) -> list:
         """
         Args:
             image (numpy array): The input image in numpy array format (H, W, C).
+            inference_size (int, optional): Longest side the backend runs at for this call,
+                defaults to the size set with `set_inference_size`.
+            resize (bool): See `detect_batch`.
         Returns:
             boxes(list of list): Detected bounding boxes [[x1, y1, x2, y2], ...].
             scores(list): Confidence scores for each detected box.
 
         """
+        return self.detect_batch([image], resize=resize, inference_size=inference_size)[0]
+
+    def detect_batch(self, images: list, resize: bool = True, inference_size=None) -> list:
+        """
+        Run detection on a list of images with a single forward pass.
+        Args:
+            images (list of numpy array): The input images in numpy array format (H, W, C).
+            resize (bool): Run `self.preprocess` as is; False keeps the native resolution and only
+                converts / normalizes (used for tiles). Boxes are in input pixels either way.
+            inference_size (int, optional): Longest side the backend runs at for this call,
+                defaults to the size set with `set_inference_size`.
+        Returns:
+            list: One result list per image, each in the same [(box, score), ...] format as `detect`.
+        """
+        if len(images) == 0:
+            return []
+        if inference_size is None:
+            inference_size = self.inference_size
 
-        if self.model_type in ["fasterrcnn", "detr", "retinanet"]:
+        if self.model_type in TORCHVISION_BACKENDS or self.model_type in EXPORTED_BACKENDS:
             # 前處理（如果有指定）
-            if self.preprocess is not None:
-                image = self.preprocess(image)
-            
-            # convert numpy to tensor and normalize
-            img_tensor = image
+            inputs, scales = self._to_model_inputs(images, resize)
             with torch.no_grad():
-                outputs = self.model([img_tensor])[0]
-            boxes = outputs['boxes'].cpu().numpy()
-            scores = outputs['scores'].cpu().numpy()
-            labels = outputs['labels'].cpu().numpy()
-            results = []
-            for box, score, label in zip(boxes, scores, labels):
-                if score >= self.conf_thresh and label == 1:  # COCO class 1 is 'person'
-                    results.append((box.tolist(), score.item()))
+                outputs = self._model_for_size(inference_size)(inputs)
+            return [self._parse_torchvision_output(output, scale) for output, scale in zip(outputs, scales)]
         elif self.model_type == 'yolov8':
-            results = []
             # 不要做 preprocess，直接傳原始 numpy array
-            preds = self.model(image)
-            for pred in preds:
-                for box in pred.boxes:
-                    cls_id = int(box.cls[0].item())
-                    score = box.conf[0].item()
-                    if cls_id == 0 and score >= self.conf_thresh:
-                        xyxy = box.xyxy[0].cpu().numpy().tolist()
-                        results.append((xyxy, score))
+            preds = self.model(list(images), **self._yolo_kwargs(inference_size))
+            return [self._parse_yolo_output(pred) for pred in preds]
         else:
             raise ValueError(f"Unsupported model_type: {self.model_type}")
 
+    def _to_model_inputs(self, images: list, resize: bool = True):
+        """
+        Model inputs for the torchvision / exported backends, and per image the (x, y) factors
+        that map boxes from the preprocessed tensor back to the pixels of the input image.
+        """
+        inputs, scales = [], []
+        for image in images:
+            if self.preprocess is None:
+                tensor = image
+            elif resize:
+                tensor = self.preprocess(image)
+            else:
+                tensor = F.to_tensor(image)
+                mean, std = getattr(self.preprocess, 'mean', None), getattr(self.preprocess, 'std', None)
+                if mean is not None and std is not None:
+                    tensor = F.normalize(tensor, mean=mean, std=std)
+            if isinstance(tensor, torch.Tensor) and isinstance(image, np.ndarray):
+                scales.append((image.shape[1] / tensor.shape[-1], image.shape[0] / tensor.shape[-2]))
+            else:
+                scales.append((1.0, 1.0))
+            inputs.append(tensor)
+        return inputs, scales
+
+    def detect_tiled(self, image, tile_size=None, overlap=None, iou_thresh=None, include_full_frame=False) -> list:
+        """
+        Sliced inference for large, dense frames: cut the image into overlapping tiles,
+        detect on all tiles in one batch, shift the boxes back to frame coordinates and
+        merge duplicates across tiles with NMS.
+        Args:
+            image (numpy array): The input image in numpy array format (H, W, C).
+            tile_size (tuple, optional): Tile (height, width), defaults to `self.tile_size`.
+            overlap (float, optional): Overlap ratio between tiles, defaults to `self.tile_overlap`.
+            iou_thresh (float, optional): Cross-tile NMS IoU threshold, defaults to `self.tile_iou_thresh`.
+            include_full_frame (bool): Also detect on the whole frame, which keeps people larger than a tile.
+        Returns:
+            list: [(box, score), ...] in frame coordinates, sorted by descending score.
+        """
+        from torchvision.ops import nms
+
+        tile_h, tile_w = tile_size if tile_size is not None else self.tile_size
+        overlap = overlap if overlap is not None else self.tile_overlap
+        iou_thresh = iou_thresh if iou_thresh is not None else self.tile_iou_thresh
+        if not 0 <= overlap < 1:
+            raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+
+        height, width = image.shape[:2]
+        offsets = [
+            (x, y)
+            for y in _tile_starts(height, tile_h, overlap)
+            for x in _tile_starts(width, tile_w, overlap)
+        ]
+        tiles = [np.ascontiguousarray(image[y:y + tile_h, x:x + tile_w]) for x, y in offsets]
+        # tiles run at native resolution so small people keep their pixels; boxes are in tile pixels
+        results = self.detect_batch(tiles, resize=False)
+        if include_full_frame:
+            results.append(self.detect(image))
+            offsets.append((0, 0))
+
+        all_boxes, all_scores = [], []
+        for (x, y), detections in zip(offsets, results):
+            for box, score in detections:
+                all_boxes.append([box[0] + x, box[1] + y, box[2] + x, box[3] + y])
+                all_scores.append(score)
+        if not all_boxes:
+            return []
+
+        boxes = torch.tensor(all_boxes, dtype=torch.float32)
+        scores = torch.tensor(all_scores, dtype=torch.float32)
+        keep = nms(boxes, scores, iou_thresh)  # sorted by descending score
+        if self.person_only:
+            keep = keep[:self.max_detections]
+        return list(zip(boxes[keep].tolist(), scores[keep].tolist()))
+
+    def _parse_torchvision_output(self, output: dict, scale=(1.0, 1.0)) -> list:
+        """
+        Convert one torchvision detection output dict into [(box, score), ...], with boxes
+        multiplied by the (x, y) `scale` of `_to_model_inputs`.
+        """
+        scores = output['scores']
+        keep = (scores >= self.conf_thresh) & (output['labels'] == self.person_label)
+        boxes = output['boxes'][keep]
+        if scale != (1.0, 1.0):
+            boxes = boxes * boxes.new_tensor([scale[0], scale[1], scale[0], scale[1]])
+        boxes = boxes.cpu().tolist()
+        return list(zip(boxes, scores[keep].cpu().tolist()))
+
+    def _parse_yolo_output(self, pred) -> list:
+        """
+        Convert one ultralytics Results object into [(box, score), ...].
+        """
+        boxes = pred.boxes
+        keep = (boxes.cls == YOLO_PERSON_CLASS) & (boxes.conf >= self.conf_thresh)
+        xyxy = boxes.xyxy[keep].cpu().tolist()
+        return list(zip(xyxy, boxes.conf[keep].cpu().tolist()))
+
+
+def _tile_starts(length: int, tile: int, overlap: float) -> list:
+    """
+    Start offsets of overlapping tiles along one axis; the last tile is aligned
+    to the image border so every pixel is covered.
+    """
+    if length <= tile:
+        return [0]
+    stride = max(1, int(tile * (1 - overlap)))
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+class _PersonVsRestPredictor(torch.nn.Module):
+    """
+    Wraps the pretrained 91-class Faster R-CNN predictor and returns two columns:
+    logsumexp of every other class, and the person logit. The 2-way softmax in the
+    ROI heads then gives exactly the person probability of the full 91-way softmax,
+    while NMS and top-k only see person candidates.
+    """
+    def __init__(self, predictor, class_id: int):
+        super().__init__()
+        self.predictor = predictor
+        self.class_id = class_id
+        num_classes = predictor.cls_score.out_features
+        others = [c for c in range(num_classes) if c != class_id]
+        self.register_buffer("other_idx", torch.tensor(others), persistent=False)
+        # bbox_pred has 4 regression rows per class, the background rows are unused
+        self.register_buffer("bbox_idx", torch.tensor([0, 1, 2, 3] + [class_id * 4 + k for k in range(4)]),
+                             persistent=False)
+
+    def forward(self, x):
+        scores, deltas = self.predictor(x)
+        rest = torch.logsumexp(scores.index_select(1, self.other_idx), dim=1, keepdim=True)
+        person = scores[:, self.class_id:self.class_id + 1]
+        return torch.cat([rest, person], dim=1), deltas.index_select(1, self.bbox_idx)
+
+
+def _restrict_fastrcnn_predictor(model, class_id: int) -> None:
+    """
+    Make the Faster R-CNN box predictor score `class_id` against everything else,
+    reusing the full pretrained head so the class probabilities are unchanged.
+    """
+    model.roi_heads.box_predictor = _PersonVsRestPredictor(model.roi_heads.box_predictor, class_id)
+
+
+def _unwrap_fastrcnn_predictor(model) -> None:
+    """
+    Replace a person-vs-rest wrapper with a plain 2-class predictor, ready for a
+    fine-tuned background/person state dict.
+    """
+    from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
+    predictor = model.roi_heads.box_predictor
+    if isinstance(predictor, _PersonVsRestPredictor):
+        in_features = predictor.predictor.cls_score.in_features
+        model.roi_heads.box_predictor = FastRCNNPredictor(in_features, 2).to(predictor.other_idx.device)
+
 
-        return results
+def _restrict_retinanet_classes(model, class_ids: list) -> None:
+    """
+    Slice the RetinaNet classification conv down to `class_ids`, so top-k and NMS
+    run over a fraction of the candidates. Output labels become indices into `class_ids`.
+    """
+    head = model.head.classification_head
+    old_conv = head.cls_logits
+    num_anchors = head.num_anchors
+    num_classes = head.num_classes
+    # output channels are laid out as (anchor, class)
+    idx = torch.tensor([a * num_classes + c for a in range(num_anchors) for c in class_ids])
+    new_conv = torch.nn.Conv2d(old_conv.in_channels, len(idx), kernel_size=3, stride=1, padding=1)
+    with torch.no_grad():
+        new_conv.weight.copy_(old_conv.weight[idx])
+        new_conv.bias.copy_(old_conv.bias[idx])
+    head.cls_logits = new_conv
+    head.num_classes = len(class_ids)
     
     
 if __name__ == "__main__":
     import cv2
-    from preprocess.read_image import Preprocessor
+    from preprocess.read_image import DetectionImagePreprocessor
     img= cv2.imread("/home/ubuntu/projects/pedestrian_attribute_recognition_30%/tests/data/FudanPed00003.png")
     img=cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    preprocess = Preprocessor()
+    preprocess = DetectionImagePreprocessor()
     detector = PedestrianDetector(device='cpu', model_type='retinanet', conf_thresh=0.1, preprocess=preprocess)
     detections = detector.detect(img)
     print(detections)
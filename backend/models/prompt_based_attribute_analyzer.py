@@ -1,21 +1,55 @@
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
+import hashlib
+import os
+import tempfile
 import torch
 from PIL import Image
 import numpy as np
-from preprocess.read_image import Preprocessor
-from models.attribute_analyzer_base import AttributeAnalyzerBase
+from preprocess.read_image import DetectionImagePreprocessor
+from models.attribute_analyzer_base import AttributeAnalyzerBase, crop_box
+from models.clip_features import encode_image_features, encode_text_features, has_text_encoder
+
+NEUTRAL_PROMPT = "a photo of a person."
+"""Negative prompt of attributes without their own negative prompt."""
+
+
+def prompt_hash(prompts: List[str]) -> str:
+    """
+    Stable key of a prompt list, used for the in-memory and on-disk embedding caches.
+    """
+    return hashlib.sha1("\x00".join(prompts).encode("utf-8")).hexdigest()
+
 
 class PromptBasedAttributeAnalyzer(AttributeAnalyzerBase):
+    """
+    Image-text attribute scoring.
+
+    When the model exposes separate text / image encoders (`get_text_features` /
+    `get_image_features` as in transformers CLIPModel, or `encode_text` / `encode_image` as in
+    open_clip), the prompt list is encoded once into a normalized embedding matrix. The matrix is
+    cached in memory under `prompt_hash(prompts)` and persisted as a memory-mapped .npy next to the
+    checkpoint, so `analyze` only runs the image encoder plus one matrix multiply.
+    `load_checkpoint` invalidates the cache and `save_checkpoint` re-encodes the cached prompt lists
+    with the weights being saved. Other models fall back to `model(inputs, tokens)`.
+
+    CLIP cosine similarities of a person crop sit in a narrow band for every prompt, so each
+    attribute is scored contrastively, sigmoid(logit_scale * (cos(crop, prompt) - cos(crop, negative))),
+    i.e. a softmax over the attribute prompt and its negative prompt.
+    """
+
     def __init__(self, model, attribute_names: List[str], device: torch.device,
-                 preprocess: Preprocessor,tokenizer: Callable, prompts: List[str]):
+                 preprocess: DetectionImagePreprocessor,tokenizer: Callable, prompts: List[str],
+                 negative_prompts: Optional[List[str]] = None):
         """
             Args:
                 model: The prompt-based model for attribute analysis.
                 attribute_names (List[str]): List of attribute names to analyze.
                 device (torch.device): The device to run the model on.
-                preprocess (Preprocessor): The image preprocessor.
+                preprocess (DetectionImagePreprocessor): The image preprocessor.
                 tokenizer (Callable): The tokenizer for processing prompts.
                 prompt (List[str]): List of prompts corresponding to attributes.
+                negative_prompts (List[str], optional): One negative prompt per attribute, e.g.
+                    "a person without a hat."; defaults to NEUTRAL_PROMPT for every attribute.
         """
         self.model = model.to(device)
         self.model.eval()
@@ -24,6 +58,11 @@ class PromptBasedAttributeAnalyzer(AttributeAnalyzerBase):
         self.preprocess = preprocess
         self.tokenizer = tokenizer
         self.prompts = prompts
+        self.negative_prompts = negative_prompts
+        self.checkpoint_path: Optional[str] = None
+        self._text_cache: Dict[str, torch.Tensor] = {}
+        # prompt list of every cached key, to re-encode them when the weights are saved
+        self._cached_prompts: Dict[str, List[str]] = {}
 
     def analyze(self, image: Any, boxes: List[List[float]], prompts: List[str] = None) -> List[Dict[str, float]]:
         """
@@ -34,30 +73,124 @@ class PromptBasedAttributeAnalyzer(AttributeAnalyzerBase):
             list of dict: Each dict contains attribute names as keys and their corresponding probabilities as values.
         """
         # Crop image based on boxes
-        crops = []
-        for box in boxes:
-            x1,x2,y1,y2 = map(int, box)
-            crop = image[x1:x2, y1:y2, :]  # Assuming image is a numpy array
-            crops.append(crop)
-        
+        crops = [crop_box(image, box) for box in boxes]
+        if not crops:
+            return []
+
         # preprocess batch of images
-        input = self.preprocess(crops).to(self.device)
-        #Tokenize prompts
+        inputs = self.preprocess(crops).to(self.device)
         prompts = prompts if prompts is not None else self.prompts
-        tokenized_prompts = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
-        for k in tokenized_prompts:
-            tokenized_prompts[k] = tokenized_prompts[k].to(self.device)
-        # calculate probabilities
         with torch.no_grad():
-            outputs = self.model(inputs, tokenized_prompts)
+            # attribute prompts followed by their distinct negatives, encoded (and cached) together
+            negatives = self._negatives_for(prompts)
+            distinct = list(dict.fromkeys(negatives))
+            text_embeddings = self.text_embeddings(list(prompts) + distinct)
+            if text_embeddings is not None:
+                image_embeddings = self._encode_image(inputs)
+                image_embeddings = image_embeddings / image_embeddings.norm(dim=-1, keepdim=True)
+                similarity = image_embeddings @ text_embeddings.T
+                negative_index = torch.tensor([len(prompts) + distinct.index(n) for n in negatives],
+                                              device=similarity.device)
+                outputs = self._logit_scale() * (similarity[:, :len(prompts)] - similarity[:, negative_index])
+            else:
+                outputs = self.model(inputs, self._tokenize(prompts))
             prob = torch.sigmoid(outputs).cpu().numpy()
-            results = []
-            for p in prob:
-                result = {attr: float(prob) for attr, prob in zip(self.attribute_names, p)}
-                results.append(result)
-                
-        return results
-    
+        return [{attr: float(p) for attr, p in zip(self.attribute_names, pred)} for pred in prob]
+
+    def text_embeddings(self, prompts: List[str] = None) -> Optional[torch.Tensor]:
+        """
+        Normalized (num_prompts, dim) text embedding matrix of prompts, encoded once and cached.
+        Returns None if the model has no separate text encoder.
+        """
+        prompts = list(prompts if prompts is not None else self.prompts)
+        key = prompt_hash(prompts)
+        embeddings = self._text_cache.get(key)
+        if embeddings is not None:
+            return embeddings
+        embeddings = self._load_embedding_file(key)
+        if embeddings is None:
+            with torch.no_grad():
+                embeddings = self._encode_text(self._tokenize(prompts))
+            if embeddings is None:
+                return None
+            embeddings = (embeddings / embeddings.norm(dim=-1, keepdim=True)).float()
+            self._save_embedding_file(key, embeddings)
+        self._text_cache[key] = embeddings
+        self._cached_prompts[key] = prompts
+        return embeddings
+
+    def _negatives_for(self, prompts: List[str]) -> List[str]:
+        """
+        Negative prompt of each prompt; per-call prompt lists of another length use the neutral prompt.
+        """
+        if self.negative_prompts is not None and len(self.negative_prompts) == len(prompts):
+            return list(self.negative_prompts)
+        return [NEUTRAL_PROMPT] * len(prompts)
+
+    def clear_text_cache(self) -> None:
+        """
+        Drop the in-memory prompt embeddings (the files next to the checkpoint are checked for staleness on load).
+        """
+        self._text_cache.clear()
+        self._cached_prompts.clear()
+
+    def _tokenize(self, prompts: List[str]) -> Dict[str, torch.Tensor]:
+        tokens = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
+        for k in tokens:
+            tokens[k] = tokens[k].to(self.device)
+        return tokens
+
+    def _encode_text(self, tokens: Dict[str, torch.Tensor]) -> Optional[torch.Tensor]:
+        if not has_text_encoder(self.model):
+            return None
+        return encode_text_features(self.model, tokens)
+
+    def _encode_image(self, inputs: torch.Tensor) -> torch.Tensor:
+        return encode_image_features(self.model, inputs)
+
+    def _logit_scale(self) -> torch.Tensor:
+        logit_scale = getattr(self.model, "logit_scale", None)
+        return logit_scale.exp() if logit_scale is not None else torch.tensor(100.0, device=self.device)
+
+    def _embedding_file(self, key: str) -> Optional[str]:
+        if self.checkpoint_path is None:
+            return None
+        return f"{os.path.splitext(self.checkpoint_path)[0]}.prompts-{key[:16]}.npy"
+
+    def _load_embedding_file(self, key: str) -> Optional[torch.Tensor]:
+        path = self._embedding_file(key)
+        if path is None or not os.path.exists(path):
+            return None
+        # embeddings written before the checkpoint was (re)written are stale
+        if os.path.exists(self.checkpoint_path) and os.path.getmtime(path) < os.path.getmtime(self.checkpoint_path):
+            return None
+        try:
+            embeddings = np.load(path, mmap_mode="c")
+        except (OSError, ValueError):
+            return None
+        return torch.from_numpy(embeddings).to(self.device)
+
+    def _save_embedding_file(self, key: str, embeddings: torch.Tensor) -> None:
+        path = self._embedding_file(key)
+        if path is None:
+            return
+        array = embeddings.detach().cpu().numpy()
+        tmp_path = None
+        try:
+            # unique per writer, so concurrent saves never share a temp file
+            directory, name = os.path.split(path)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or None)
+            os.close(fd)
+            mm = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=array.shape)
+            mm[:] = array
+            mm.flush()
+            del mm
+            os.replace(tmp_path, path)
+        except OSError:
+            # the on-disk cache is optional, e.g. read-only checkpoint directories
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict = None) -> None:
         """
         save model checkpoint
@@ -66,12 +199,22 @@ class PromptBasedAttributeAnalyzer(AttributeAnalyzerBase):
             checkpoint = {
                 "model_state_dict": self.model.state_dict(),
                 "optimizer_state_dict": optimizer.state_dict() if optimizer else None,
+                "attribute_names": self.attribute_names,
+                "prompts": self.prompts,
+                "negative_prompts": self.negative_prompts,
                 "epoch": epoch,
                 "extra": extra
             }
             if optimizer is not None:
                 checkpoint["optimizer_state_dict"] = optimizer.state_dict()
             torch.save(checkpoint, filepath)
+            # cached embeddings may predate these weights (e.g. fine-tuning): re-encode the
+            # cached prompt lists with the saved weights, which also persists them next to it
+            self.checkpoint_path = filepath
+            prompt_lists = list(self._cached_prompts.values())
+            self.clear_text_cache()
+            for prompts in prompt_lists:
+                self.text_embeddings(prompts)
         except Exception as e:
             raise RuntimeError(f"Error saving checkpoint to {filepath}: {e}")
 
@@ -86,6 +229,10 @@ class PromptBasedAttributeAnalyzer(AttributeAnalyzerBase):
                 optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
             self.attribute_names = checkpoint.get("attribute_names", self.attribute_names)
             self.prompts = checkpoint.get("prompts", self.prompts)
+            self.negative_prompts = checkpoint.get("negative_prompts", self.negative_prompts)
+            # new weights: prompt embeddings must be re-encoded
+            self.checkpoint_path = filepath
+            self.clear_text_cache()
             return checkpoint
         except FileNotFoundError as e:
             raise FileNotFoundError(f"Checkpoint file not found: {filepath}") from e
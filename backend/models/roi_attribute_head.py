@@ -0,0 +1,232 @@
+import copy
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import torch
+import torch.nn as nn
+from torchvision.transforms import functional as F
+
+from .attribute_analyzer_base import AttributeAnalyzerBase
+
+PA100K_ATTRIBUTES = (
+    "Female,AgeOver60,Age18-60,AgeLess18,Front,Side,Back,Hat,Glasses,HandBag,ShoulderBag,Backpack,"
+    "HoldObjectsInFront,ShortSleeve,LongSleeve,UpperStride,UpperLogo,UpperPlaid,UpperSplice,"
+    "LowerStripe,LowerPattern,LongCoat,Trousers,Shorts,Skirt&Dress,boots"
+).split(",")
+
+
+class RoIAttributeHead(nn.Module):
+    """
+    Multi-label attribute head over the 256x7x7 MultiScaleRoIAlign features of the Faster R-CNN FPN.
+    The MLP starts as a copy of the detector's pretrained box head, followed by a linear classifier.
+    """
+
+    def __init__(self, box_head: nn.Module, num_attributes: int, dropout: float = 0.1):
+        super().__init__()
+        self.mlp = copy.deepcopy(box_head)
+        self.dropout = nn.Dropout(dropout)
+        # TwoMLPHead: fc6 -> fc7, fc7 gives the representation size (1024)
+        self.classifier = nn.Linear(box_head.fc7.out_features, num_attributes)
+
+    def forward(self, roi_features: torch.Tensor) -> torch.Tensor:
+        return self.classifier(self.dropout(self.mlp(roi_features)))
+
+
+class RoIAttributeAnalyzer(AttributeAnalyzerBase):
+    """
+    Joint detection + attribute model sharing the fasterrcnn_resnet50_fpn backbone of a PedestrianDetector.
+
+    `detect_and_analyze` runs the backbone once per frame: the RPN / RoI heads produce the
+    person boxes and the attribute head classifies the RoI-pooled FPN features of those boxes,
+    so no second network runs on the crops. `analyze` keeps the AttributeAnalyzerBase interface
+    for externally supplied boxes. Cheaper than the label-based analyzers, but less accurate
+    since the attributes are predicted from 7x7 pooled features.
+    """
+
+    def __init__(self,
+                 attribute_names: Optional[List[str]] = None,
+                 device: Any = 'cpu',
+                 conf_thresh: float = 0.7,
+                 preprocess: Any = None,
+                 detector: Any = None,
+                 checkpoint: Optional[str] = None):
+        """
+        Args:
+            attribute_names (list of str, optional): Attribute names, PA-100K's 26 attributes by default.
+            device (str): Device to run the model on.
+            conf_thresh (float): Minimum person score, used when `detector` is None.
+            preprocess (Callable, optional): Image preprocessor, used when `detector` is None.
+            detector (PedestrianDetector, optional): A 'fasterrcnn' detector whose model is shared.
+            checkpoint (str, optional): Checkpoint written by `save_checkpoint`.
+        """
+        if detector is None:
+            from .pedestrian_detector import PedestrianDetector
+            detector = PedestrianDetector(device=device, model_type='fasterrcnn', conf_thresh=conf_thresh,
+                                          preprocess=preprocess)
+        if detector.model_type != 'fasterrcnn' or detector.quantized:
+            raise ValueError("RoIAttributeAnalyzer requires an eager fp32 'fasterrcnn' PedestrianDetector")
+        self.detector = detector
+        self.model = detector.model
+        self.device = device
+        self.preprocess = detector.preprocess
+        self.attribute_names = list(attribute_names) if attribute_names is not None else list(PA100K_ATTRIBUTES)
+        self.attribute_head = RoIAttributeHead(self.model.roi_heads.box_head, len(self.attribute_names))
+        self.attribute_head = self.attribute_head.to(device).eval()
+        if checkpoint is not None:
+            self.load_checkpoint(checkpoint)
+
+    def detect_and_analyze(self, image: Any) -> List[Dict[str, Any]]:
+        """
+        Args:
+            image (numpy array): The input image (H, W, C).
+        Returns:
+            list of dict: {'box', 'score', 'attributes'} per detected person.
+        """
+        return self.detect_and_analyze_batch([image])[0]
+
+    def detect_and_analyze_batch(self, images: List[Any]) -> List[List[Dict[str, Any]]]:
+        """
+        Detect people and predict their attributes for several images with one backbone pass.
+        """
+        if len(images) == 0:
+            return []
+        with torch.no_grad():
+            features, image_list, original_sizes = self.extract_features(images)
+            proposals, _ = self.model.rpn(image_list, features)
+            detections, _ = self.model.roi_heads(features, proposals, image_list.image_sizes)
+            keeps = [(d['scores'] >= self.detector.conf_thresh) & (d['labels'] == self.detector.person_label)
+                     for d in detections]
+            boxes = [d['boxes'][keep] for d, keep in zip(detections, keeps)]
+            probs = self._predict(features, boxes, image_list.image_sizes)
+            detections = self.model.transform.postprocess(detections, image_list.image_sizes, original_sizes)
+
+        results = []
+        offset = 0
+        for detection, keep in zip(detections, keeps):
+            count = int(keep.sum())
+            frame_boxes = detection['boxes'][keep].cpu().tolist()
+            frame_scores = detection['scores'][keep].cpu().tolist()
+            results.append([
+                {"box": box, "score": score, "attributes": self._to_dict(prob)}
+                for box, score, prob in zip(frame_boxes, frame_scores, probs[offset:offset + count])
+            ])
+            offset += count
+        return results
+
+    def analyze(self, image: Any, boxes: List[List[float]]) -> List[Dict[str, float]]:
+        """
+        Args:
+            image (numpy array): The input image.
+            boxes (list of list of float): [x1, y1, x2, y2] boxes (or (box, score) tuples) in image coordinates.
+        Returns:
+            list of dict: Each dict contains attribute names as keys and their corresponding probabilities as values.
+        """
+        return self.analyze_batch([image], [boxes])[0]
+
+    def analyze_batch(self, images: List[Any], boxes_list: List[List[Any]]) -> List[List[Dict[str, float]]]:
+        """
+        Attributes for given boxes of several images; the backbone runs once per batch.
+        """
+        from torchvision.models.detection.transform import resize_boxes
+        if sum(len(boxes) for boxes in boxes_list) == 0:
+            return [[] for _ in images]
+        with torch.no_grad():
+            features, image_list, original_sizes = self.extract_features(images)
+            rois = [
+                resize_boxes(self._box_tensor(boxes), original, resized)
+                for boxes, original, resized in zip(boxes_list, original_sizes, image_list.image_sizes)
+            ]
+            probs = self._predict(features, rois, image_list.image_sizes)
+        results = []
+        offset = 0
+        for boxes in boxes_list:
+            results.append([self._to_dict(prob) for prob in probs[offset:offset + len(boxes)]])
+            offset += len(boxes)
+        return results
+
+    def extract_features(self, images: List[Any]):
+        """
+        Run the detector transform and backbone.
+        Returns:
+            (FPN feature dict, transformed ImageList, original (H, W) sizes of the input images)
+        """
+        original_sizes = [
+            tuple(image.shape[-2:]) if isinstance(image, torch.Tensor) else tuple(image.shape[:2])
+            for image in images
+        ]
+        if self.preprocess is not None:
+            tensors = [self.preprocess(image) for image in images]
+        else:
+            tensors = [image if isinstance(image, torch.Tensor) else F.to_tensor(image) for image in images]
+        tensors = [tensor.to(self.device) for tensor in tensors]
+        image_list, _ = self.model.transform(tensors)
+        return self.model.backbone(image_list.tensors), image_list, original_sizes
+
+    def attribute_logits(self, features: Dict[str, torch.Tensor], boxes: List[torch.Tensor], image_sizes: List) -> torch.Tensor:
+        """
+        Attribute logits (N, A) for boxes given in transformed-image coordinates, one tensor per image.
+        """
+        roi_features = self.model.roi_heads.box_roi_pool(features, boxes, image_sizes)
+        return self.attribute_head(roi_features)
+
+    def _predict(self, features, boxes, image_sizes) -> List:
+        if sum(len(b) for b in boxes) == 0:
+            return []
+        return torch.sigmoid(self.attribute_logits(features, boxes, image_sizes)).cpu().numpy()
+
+    def _box_tensor(self, boxes: List[Any]) -> torch.Tensor:
+        coords = [box[0] if isinstance(box, (tuple, list)) and len(box) == 2 else box for box in boxes]
+        return torch.tensor(coords, dtype=torch.float32, device=self.device).reshape(-1, 4)
+
+    def _to_dict(self, prob) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(self.attribute_names, prob)}
+
+    def save_checkpoint(self, filepath: str, optimizer: Any = None, epoch: int = None, extra: dict = None) -> None:
+        """
+        save the attribute head only, with a fingerprint of the shared backbone it was trained on
+        """
+        checkpoint = {
+            "model_state_dict": self.attribute_head.state_dict(),
+            "backbone_fingerprint": _backbone_fingerprint(self.model.backbone.state_dict()),
+            "attribute_names": self.attribute_names,
+            "epoch": epoch,
+            "extra": extra
+        }
+        if optimizer is not None:
+            checkpoint['optimizer_state_dict'] = optimizer.state_dict()
+        torch.save(checkpoint, filepath)
+
+    def load_checkpoint(self, filepath: str, optimizer: Any = None) -> dict:
+        """
+        load attribute head checkpoint; the shared detector is never modified, so the checkpoint
+        must come from a head trained on the same backbone weights
+        """
+        checkpoint = torch.load(filepath, map_location=self.device)
+        expected = checkpoint.get('backbone_fingerprint')
+        if expected is None and 'detector_state_dict' in checkpoint:
+            # older checkpoints stored the whole detector
+            expected = _backbone_fingerprint({
+                name[len('backbone.'):]: value for name, value in checkpoint['detector_state_dict'].items()
+                if name.startswith('backbone.')
+            })
+        if expected is not None and expected != _backbone_fingerprint(self.model.backbone.state_dict()):
+            raise ValueError(f"{filepath} was trained on different backbone weights than the shared detector")
+        self.attribute_names = checkpoint.get('attribute_names', self.attribute_names)
+        if self.attribute_head.classifier.out_features != len(self.attribute_names):
+            self.attribute_head = RoIAttributeHead(self.model.roi_heads.box_head, len(self.attribute_names)).to(self.device)
+        self.attribute_head.load_state_dict(checkpoint['model_state_dict'])
+        self.attribute_head.eval()
+        if optimizer is not None and 'optimizer_state_dict' in checkpoint:
+            optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        return checkpoint
+
+
+def _backbone_fingerprint(state_dict: Dict[str, torch.Tensor]) -> str:
+    """
+    Hash of the backbone (+ FPN) weights the attribute head reads its RoI features from.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(state_dict):
+        digest.update(name.encode('utf8'))
+        digest.update(state_dict[name].detach().cpu().contiguous().numpy().tobytes())
+    return digest.hexdigest()[:16]
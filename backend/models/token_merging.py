@@ -0,0 +1,129 @@
+import copy
+import math
+from typing import Callable, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+def bipartite_soft_matching(metric: torch.Tensor, r: int, class_token: bool = True) -> Callable:
+    """
+    ToMe bipartite soft matching (Bolya et al., "Token Merging: Your ViT but Faster").
+
+    Tokens are split alternately into sets A and B; each A token is paired with its most
+    similar B token (cosine of `metric`) and the r most similar pairs are merged.
+    Args:
+        metric (Tensor): (B, N, C) per-token features used for similarity, e.g. attention keys.
+        r (int): Number of tokens to remove.
+        class_token (bool): Never merge token 0.
+    Returns:
+        merge(x, mode) reducing (B, N, C) to (B, N - r, C); token 0 stays first.
+    """
+    protected = 1 if class_token else 0
+    r = min(r, (metric.shape[1] - protected) // 2)
+    if r <= 0:
+        return lambda x, mode="sum": x
+
+    with torch.no_grad():
+        metric = metric / metric.norm(dim=-1, keepdim=True)
+        a, b = metric[..., ::2, :], metric[..., 1::2, :]
+        scores = a @ b.transpose(-1, -2)
+        if class_token:
+            scores[..., 0, :] = -math.inf
+        node_max, node_idx = scores.max(dim=-1)
+        edge_idx = node_max.argsort(dim=-1, descending=True)[..., None]
+        unm_idx = edge_idx[..., r:, :]
+        src_idx = edge_idx[..., :r, :]
+        dst_idx = node_idx[..., None].gather(dim=-2, index=src_idx)
+        if class_token:
+            # keep the class token (index 0 of A) in front
+            unm_idx = unm_idx.sort(dim=1)[0]
+
+    def merge(x: torch.Tensor, mode: str = "sum") -> torch.Tensor:
+        src, dst = x[..., ::2, :], x[..., 1::2, :]
+        n, t1, c = src.shape
+        unm = src.gather(dim=-2, index=unm_idx.expand(n, t1 - r, c))
+        src = src.gather(dim=-2, index=src_idx.expand(n, r, c))
+        dst = dst.scatter_reduce(-2, dst_idx.expand(n, r, c), src, reduce=mode)
+        return torch.cat([unm, dst], dim=1)
+
+    return merge
+
+
+def merge_weighted(merge: Callable, x: torch.Tensor, size: Optional[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Size-weighted average merge; size (B, N, 1) counts the patches each token stands for.
+    """
+    if size is None:
+        size = torch.ones_like(x[..., :1])
+    x = merge(x * size, mode="sum")
+    size = merge(size, mode="sum")
+    return x / size, size
+
+
+def tome_block_forward(block: nn.Module, x: torch.Tensor, size: Optional[torch.Tensor], r: int):
+    """
+    torchvision EncoderBlock forward with proportional attention and token merging between
+    attention and MLP. Uses the block's own weights, so no retraining is needed.
+    """
+    attn = block.self_attention
+    batch, tokens, dim = x.shape
+    heads = attn.num_heads
+    y = block.ln_1(x)
+    qkv = F.linear(y, attn.in_proj_weight, attn.in_proj_bias)
+    q, k, v = qkv.reshape(batch, tokens, 3, heads, dim // heads).permute(2, 0, 3, 1, 4)
+    # proportional attention: a merged token counts as many times as the patches it holds
+    bias = size.log()[:, None, None, :, 0].to(q.dtype) if size is not None else None
+    out = F.scaled_dot_product_attention(q, k, v, attn_mask=bias)
+    out = attn.out_proj(out.transpose(1, 2).reshape(batch, tokens, dim))
+    x = x + block.dropout(out)
+    if r > 0:
+        merge = bipartite_soft_matching(k.mean(dim=1), r, class_token=True)
+        x, size = merge_weighted(merge, x, size)
+    return x + block.mlp(block.ln_2(x)), size
+
+
+class ToMeEncoder(nn.Module):
+    """
+    Drop-in for torchvision's vit Encoder that merges `schedule[i]` tokens in block i.
+    Holds the original submodules under the same names, so state dict keys are unchanged.
+    """
+
+    def __init__(self, encoder: nn.Module, schedule: List[int]):
+        super().__init__()
+        self.pos_embedding = encoder.pos_embedding
+        self.dropout = encoder.dropout
+        self.layers = encoder.layers
+        self.ln = encoder.ln
+        self.schedule = list(schedule)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = self.dropout(x + self.pos_embedding)
+        size = None
+        for block, r in zip(self.layers, self.schedule):
+            x, size = tome_block_forward(block, x, size, r)
+        return self.ln(x)
+
+
+def merge_schedule(num_patches: int, num_layers: int, reduction: float) -> List[int]:
+    """
+    Tokens merged per block so that `reduction` of the patch tokens are gone after the last block.
+    """
+    if not 0.0 <= reduction < 1.0:
+        raise ValueError(f"token reduction must be in [0, 1), got {reduction}")
+    r = int(round(num_patches * reduction / num_layers))
+    return [r] * num_layers
+
+
+def apply_token_merging(model: nn.Module, reduction: float) -> nn.Module:
+    """
+    Fast copy of a torchvision VisionTransformer that shares all weights with `model` and runs
+    its encoder with token merging. `reduction` is the fraction of patch tokens removed by the end.
+    """
+    num_patches = (model.image_size // model.patch_size) ** 2
+    fast = copy.copy(model)
+    # nn.Module keeps children in a dict; copy it so replacing the encoder leaves `model` untouched
+    fast._modules = model._modules.copy()
+    fast.encoder = ToMeEncoder(model.encoder, merge_schedule(num_patches, len(model.encoder.layers), reduction))
+    return fast
@@ -1,6 +1,7 @@
 import json
 from typing import Any, Dict, List, Union
 import logging
+from models.attribute_result import AttributeResult
 
 try:
     import pandas as pd
@@ -71,6 +72,9 @@ class PostprocessManager:
     ) -> Dict:
         if isinstance(model_output, dict):
             return model_output
+        elif isinstance(model_output, AttributeResult):
+            # columnar analyzer output: threshold and sort on the probability matrix
+            return model_output.grouped(score_threshold=score_threshold, descending=descending)
         elif isinstance(model_output, list):
             grouped = {}
             for item in model_output:
@@ -1,13 +1,25 @@
-from typing import Any, Optional
-from preprocess.registry import get_preprocessor
+from typing import Any, Dict, Optional
+from preprocess.registry import PREPROCESSOR_REGISTRY, get_preprocessor, register_builtin_preprocessors, warmup
 from preprocess.base_preprocessor import BaseImagePreprocessor, BaseTextTokenizer
 
+DEFAULT_MODES: Dict[str, str] = {
+    "image": "detection_image",
+    "text": "clip_text",
+}
+"""Built-in preprocessor used for a mode when no preprocessor is registered under the mode name itself."""
+
+
 class PreprocessManager:
-    def __init__(self):
+    def __init__(self, modes: Optional[Dict[str, str]] = None):
         """
         Unified Preprocess Manager for handling all registered preprocessors.
+        Registers the built-in preprocessors as lazy entry points, so nothing heavy is imported
+        until a mode is first used.
+        Args:
+            modes (Dict[str, str], optional): mode -> registered preprocessor name, overriding DEFAULT_MODES.
         """
-        pass
+        register_builtin_preprocessors()
+        self.modes = dict(DEFAULT_MODES, **(modes or {}))
 
     def preprocess(self, data: Any, mode: str = 'auto', **kwargs) -> Any:
         """
@@ -27,9 +39,22 @@ class PreprocessManager:
                 mode = 'text'
             else:
                 raise ValueError("Unsupported data type.")
-        preprocessor = get_preprocessor(mode)
+        # a preprocessor registered under the mode name wins over the built-in mapping
+        name = mode if mode in PREPROCESSOR_REGISTRY else self.modes.get(mode, mode)
+        preprocessor = get_preprocessor(name)
         return preprocessor(data, **kwargs)
 
+    def warmup(self, configs: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, float]:
+        """
+        Build and run every configured preprocessor once (see `preprocess.registry.warmup`);
+        call at service start.
+        Args:
+            configs (Dict[str, Dict], optional): name -> constructor kwargs, defaults to all registered names.
+        Returns:
+            Dict[str, float]: Seconds spent per preprocessor.
+        """
+        return warmup(configs)
+
     def is_image(self, data: Any) -> bool:
         """
         Check if the input data is an image.
@@ -1,5 +1,10 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, List
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
 
 
 class BaseImagePreprocessor(ABC):
@@ -31,10 +36,152 @@ class BaseImagePreprocessor(ABC):
         """
         pass
     
+class TokenCache:
+    """
+    Bounded, thread-safe LRU of encoded token ids, shared by every BaseTextTokenizer.
+    Keys are (tokenizer namespace, text, max_length, truncation); values are read-only int64 arrays.
+    """
+
+    def __init__(self, capacity: int = 8192):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[Hashable]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            found = []
+            for key in keys:
+                ids = self._entries.get(key)
+                if ids is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                found.append(ids)
+            return found
+
+    def put_many(self, items: Sequence[Tuple[Hashable, np.ndarray]]) -> None:
+        with self._lock:
+            for key, ids in items:
+                self._entries[key] = ids
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+TOKEN_CACHE = TokenCache()
+
+
+def pack_token_ids(ids_list: Sequence[np.ndarray],
+                   length: int,
+                   pad_id: int = 0,
+                   truncate: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack variable-length id arrays into a preallocated (N, length) int64 buffer filled with pad_id.
+    The attention mask is derived from the sequence lengths, not from the pad id.
+    Args:
+        ids_list (Sequence[np.ndarray]): Token ids per text.
+        length (int): Row length; longer sequences must be truncated (`truncate=True`).
+        pad_id (int): Padding token id.
+        truncate (bool): Cut sequences longer than `length`.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (input_ids, attention_mask), both int64 (N, length).
+    """
+    lengths = np.fromiter((len(ids) for ids in ids_list), dtype=np.int64, count=len(ids_list))
+    if truncate:
+        lengths = np.minimum(lengths, length)
+        ids_list = [ids[:length] for ids in ids_list]
+    elif len(lengths) and lengths.max() > length:
+        raise ValueError(f"sequence of length {lengths.max()} does not fit into {length} tokens")
+    mask = np.arange(length)[None, :] < lengths[:, None]
+    input_ids = np.full((len(ids_list), length), pad_id, dtype=np.int64)
+    if len(ids_list):
+        input_ids[mask] = np.concatenate(ids_list)
+    return input_ids, mask.astype(np.int64)
+
+
+def format_token_batch(ids_list: Sequence[np.ndarray],
+                       max_length: int,
+                       padding: bool,
+                       truncation: bool,
+                       pad_id: int,
+                       return_tensors: Optional[str],
+                       return_attention_mask: bool,
+                       return_token_type_ids: bool = False) -> Dict[str, Any]:
+    """
+    Build the tokenizer output dict ("input_ids", "attention_mask"[, "token_type_ids"]) from
+    cached ids. padding=True pads every row to max_length; otherwise rows are padded to the
+    longest text (or returned as ragged lists when return_tensors is None).
+    """
+    if padding:
+        length = max_length
+    else:
+        length = max((min(len(ids), max_length) if truncation else len(ids) for ids in ids_list), default=0)
+    if not padding and return_tensors is None:
+        ids_list = [ids[:max_length] if truncation else ids for ids in ids_list]
+        result = {"input_ids": [ids.tolist() for ids in ids_list]}
+        if return_token_type_ids:
+            result["token_type_ids"] = [[0] * len(ids) for ids in ids_list]
+        if return_attention_mask:
+            result["attention_mask"] = [[1] * len(ids) for ids in ids_list]
+        return result
+    if not truncation:
+        length = max([length] + [len(ids) for ids in ids_list])
+    input_ids, attention_mask = pack_token_ids(ids_list, length, pad_id, truncate=truncation)
+    result = {"input_ids": input_ids}
+    if return_token_type_ids:
+        result["token_type_ids"] = np.zeros_like(input_ids)
+    if return_attention_mask:
+        result["attention_mask"] = attention_mask
+    if return_tensors == "pt":
+        import torch
+        return {k: torch.from_numpy(v) for k, v in result.items()}
+    if return_tensors is None:
+        return {k: v.tolist() for k, v in result.items()}
+    return result
+
+
 class BaseTextTokenizer(ABC):
     """
     Text tokenizer base class
     """
+    # distinguishes vocabularies in the shared TOKEN_CACHE; subclasses set it per model / vocab
+    cache_namespace: Optional[Hashable] = None
+
+    def encode_cached(self,
+                      texts: List[str],
+                      encode_many: Callable[[List[str]], List[Sequence[int]]],
+                      max_length: Optional[int] = None,
+                      truncation: bool = True) -> List[np.ndarray]:
+        """
+        Token ids for each text via the shared LRU; only cache misses (deduplicated) are passed
+        to `encode_many` in one call.
+        """
+        namespace = self.cache_namespace if self.cache_namespace is not None else (type(self).__name__, id(self))
+        keys = [(namespace, text, max_length, truncation) for text in texts]
+        found = TOKEN_CACHE.get_many(keys)
+        missing = list(dict.fromkeys(text for text, ids in zip(texts, found) if ids is None))
+        if missing:
+            encoded = {}
+            for text, ids in zip(missing, encode_many(missing)):
+                ids = np.asarray(ids, dtype=np.int64)
+                ids.flags.writeable = False
+                encoded[text] = ids
+            TOKEN_CACHE.put_many([((namespace, text, max_length, truncation), ids) for text, ids in encoded.items()])
+            found = [ids if ids is not None else encoded[text] for text, ids in zip(texts, found)]
+        return found
     @abstractmethod
     def __call__(self, data: Any, **kwargs) -> Any:
         """
@@ -56,4 +203,83 @@ class BaseTextTokenizer(ABC):
         Returns:
             List[Any]: A list of tokenized texts.
         """
-        pass
\ No newline at end of file
+        pass
+
+def to_resized_rgb(image: Any, size: Tuple[int, int], resample: int = Image.BICUBIC) -> Image.Image:
+    """
+    Validate a PIL.Image / HxWx3 numpy image, convert it to RGB and resize it with PIL.
+    Args:
+        image (Any): Input image (PIL Image or numpy array).
+        size (Tuple[int, int]): Size passed to PIL `Image.resize`.
+        resample (int): PIL resampling filter.
+    Returns:
+        Image.Image: The resized RGB image.
+    """
+    if isinstance(image, np.ndarray):
+        if image.ndim != 3 or image.shape[2] != 3:
+            raise ValueError(f"Input numpy.ndarray must be HxWx3, got shape {image.shape}")
+        img = Image.fromarray(image)
+    elif isinstance(image, Image.Image):
+        img = image
+    else:
+        raise ValueError("Input must be a PIL.Image or numpy array")
+
+    try:
+        img = img.convert("RGB")
+    except Exception as e:
+        raise ValueError(f"Failed to convert image to RGB: {e}")
+
+    try:
+        return img.resize(size, resample)
+    except Exception as e:
+        raise ValueError(f"Failed to resize image: {e}")
+
+
+def normalize_uint8_batch(batch: np.ndarray, mean: np.ndarray, std: np.ndarray, out: Any = None) -> Any:
+    """
+    Normalize an (N, H, W, 3) uint8 batch into (N, 3, H, W) float32 in one pass.
+
+    `(x / 255 - mean) / std` is folded into one multiply-subtract per channel, written straight
+    into the channel planes of `out`, so the HWC -> CHW transpose costs no extra copy.
+    Args:
+        batch (np.ndarray): (N, H, W, 3) uint8 images.
+        mean (np.ndarray): Per-channel mean, in [0, 1] units.
+        std (np.ndarray): Per-channel standard deviation, in [0, 1] units.
+        out (Any): Optional (N, 3, H, W) float32 numpy array or contiguous CPU torch tensor to write into.
+    Returns:
+        Any: `out` when given, otherwise a new float32 numpy array.
+    """
+    n, h, w, _ = batch.shape
+    if out is None:
+        out = np.empty((n, 3, h, w), dtype=np.float32)
+    arr = out if isinstance(out, np.ndarray) else out.numpy()  # CPU torch tensors share memory
+    if arr.shape != (n, 3, h, w) or arr.dtype != np.float32:
+        raise ValueError(f"out must be float32 with shape {(n, 3, h, w)}, got {arr.dtype} {arr.shape}")
+
+    scale = (1.0 / (255.0 * np.asarray(std, dtype=np.float64))).astype(np.float32)
+    shift = (np.asarray(mean, dtype=np.float64) / np.asarray(std, dtype=np.float64)).astype(np.float32)
+    for c in range(3):
+        plane = arr[:, c]
+        np.multiply(batch[..., c], scale[c], out=plane, dtype=np.float32)
+        np.subtract(plane, shift[c], out=plane)
+    return out
+
+
+def batch_resize_normalize(images: List[Any],
+                           size: Tuple[int, int],
+                           mean: np.ndarray,
+                           std: np.ndarray,
+                           out: Any = None) -> Any:
+    """
+    Resize every image with PIL into one preallocated uint8 (N, H, W, 3) buffer, then normalize
+    and transpose the whole batch once (see `normalize_uint8_batch`).
+    """
+    # PIL sizes are (width, height)
+    width, height = size
+    buffer = np.empty((len(images), height, width, 3), dtype=np.uint8)
+    for idx, image in enumerate(images):
+        try:
+            buffer[idx] = np.asarray(to_resized_rgb(image, size))
+        except Exception as e:
+            raise ValueError(f"Error processing image at index {idx}: {e}")
+    return normalize_uint8_batch(buffer, mean, std, out=out)
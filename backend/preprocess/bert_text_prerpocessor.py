@@ -1,6 +1,5 @@
 from typing import List, Union, Dict, Any
-from transformers import BertTokenizer
-from preprocess.base_preprocessor import BaseTextTokenizer
+from preprocess.base_preprocessor import BaseTextTokenizer, format_token_batch
 
 class TransformerTextPreprocessor(BaseTextTokenizer):
     
@@ -12,8 +11,10 @@ class TransformerTextPreprocessor(BaseTextTokenizer):
             model_name (str): Name of the pre-trained model to use for tokenization.
             max_length (int): Maximum length of the tokenized sequences.
         """
+        from transformers import BertTokenizer
         self.tokenizer = BertTokenizer.from_pretrained(model_name)
         self.max_length = max_length
+        self.cache_namespace = ('bert', model_name)
         
     def __call__(self, 
         texts: Union[str, List[str]],
@@ -38,6 +39,27 @@ class TransformerTextPreprocessor(BaseTextTokenizer):
         
         max_length = max_length if max_length is not None else self.max_length
 
+        if kwargs or return_tensors not in (None, "np", "pt"):
+            # options the cache does not model go straight to the tokenizer
+            return self._tokenize_uncached(texts, padding, truncation, max_length, return_tensors,
+                                           return_attention_mask, **kwargs)
+
+        def encode_many(batch: List[str]) -> List[List[int]]:
+            return self.tokenizer(batch, padding=False, truncation=truncation, max_length=max_length,
+                                  return_attention_mask=False)["input_ids"]
+
+        try:
+            ids_list = self.encode_cached(texts, encode_many, max_length, truncation)
+        except Exception as e:
+            raise RuntimeError(f"Tokenization failed: {e}")
+        pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else 0
+        return format_token_batch(ids_list, max_length, padding, truncation, pad_id, return_tensors,
+                                  return_attention_mask, return_token_type_ids=True)
+
+    def _tokenize_uncached(self, texts, padding, truncation, max_length, return_tensors, return_attention_mask, **kwargs):
+        """
+        Tokenize with the Huggingface tokenizer directly (no token cache)
+        """
         try:
             result = self.tokenizer(
                 texts,
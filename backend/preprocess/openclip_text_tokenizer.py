@@ -1,8 +1,5 @@
 from typing import List, Union, Dict, Any
-from open_clip.tokenizer import SimpleTokenizer
-from transformers import CLIPTokenizerFast
-from preprocess.base_preprocessor import BaseTextTokenizer
-from transformers import CLIPTokenizerFast
+from preprocess.base_preprocessor import BaseTextTokenizer, format_token_batch
 
 class OpenCLIPTEXTTokenizer(BaseTextTokenizer):
     def __init__(self, vocab_path: str = None, max_length: int = 77):
@@ -12,8 +9,10 @@ class OpenCLIPTEXTTokenizer(BaseTextTokenizer):
             vocab_path (str, optional): Path to the vocabulary file. If None, uses the
             default CLIP tokenizer from Hugging Face.
         """
+        from open_clip.tokenizer import SimpleTokenizer
         self.tokenizer = SimpleTokenizer(vocab_path) if vocab_path else SimpleTokenizer()
         self.max_length = max_length
+        self.cache_namespace = ('openclip', vocab_path)
 
         
     def __call__(
@@ -36,38 +35,22 @@ class OpenCLIPTEXTTokenizer(BaseTextTokenizer):
             
         max_len = max_length if max_length is not None else self.max_length
         
-        input_ids = []
-        attention_masks = []
-        for idx, text in enumerate(texts):
-            try:
-                ids = self.tokenizer.encode(text)
-            except Exception as e:
-                raise RuntimeError(f"Tokenization failed for text at index {idx}: {e}")
-            if truncation and len(ids) > max_len:
-                ids = ids[:max_len]
-            if padding and  len(ids) < max_len:
-                pad_len = max_len - len(ids)
-                ids = ids + [0] * pad_len  # Assuming 0 is the padding token ID
-            mask = [1 if id != 0 else 0 for id in ids]
-            if padding and len(mask) < max_len:
-                mask += [0] * (max_len - len(mask))
-            input_ids.append(ids)
-            attention_masks.append(mask)
-            
-        result = {"input_ids": input_ids}
-        
-        if return_attention_mask:
-            result['attention_mask'] = attention_masks
+        def encode_many(batch: List[str]) -> List[List[int]]:
+            encoded = []
+            for text in batch:
+                try:
+                    encoded.append(self.tokenizer.encode(text))
+                except Exception as e:
+                    raise RuntimeError(f"Tokenization failed for text at index {texts.index(text)}: {e}")
+            return encoded
+
+        # ids are cached untruncated; truncation / padding (pad id 0) happen in one preallocated buffer
+        ids_list = self.encode_cached(texts, encode_many)
         try:
-            if return_tensors == 'pt':
-                import torch
-                result = {k: torch.tensor(v) for k, v in result.items()}
-            elif return_tensors == 'np':
-                import numpy as np
-                result = {k: np.array(v) for k, v in result.items()}
+            return format_token_batch(ids_list, max_len, padding, truncation, 0,
+                                      return_tensors, return_attention_mask)
         except Exception as e:
             raise RuntimeError(f"Failed to convert result to tensor: {e}")
-        return result
     
     def process_batch(self, texts: List[str], **kwargs) -> List[List[int]]:
         return self.__call__(texts, **kwargs)
@@ -4,21 +4,36 @@ import torch
 import numpy as np
 from PIL import Image
 import torchvision.transforms as transforms
+import torchvision.transforms.functional as TF
 from typing import Union, List, Optional, Dict, Any
+from preprocess.base_preprocessor import BaseImagePreprocessor
 
 
 
 
-class DetectionImagePreprocessor:
-    def __init__(self, size=(224,224), mean=None, std=None, model_type='default', use_center_crop=None):
+# 'tensor': resize / crop / normalize on torch tensors; 'pil': the original torchvision PIL pipeline
+PREPROCESS_BACKENDS = ('tensor', 'pil')
+
+
+class DetectionImagePreprocessor(BaseImagePreprocessor):
+    def __init__(self, size=(224,224), mean=None, std=None, model_type='default', use_center_crop=None,
+                 backend='pil'):
         """
         Args:
             size (tuple): Desired output size (height, width).
             mean (list): Mean for normalization.
             std (list): Standard deviation for normalization.
             model_type (str): Type of model to determine preprocessing steps.
+            backend (str): 'pil' (default) uses the ToPILImage -> Resize -> ToTensor -> Normalize
+                pipeline; 'tensor' is opt-in, it wraps uint8 HxWx3 arrays zero-copy and resizes them
+                with torch. Antialiased bilinear matches PIL within one uint8 level; bicubic agrees on
+                average but a few pixels on sharp edges differ by more, where PIL clamps the
+                overshoot differently (see benchmark/bench_preprocess_backend.py).
         """
+        if backend not in PREPROCESS_BACKENDS:
+            raise ValueError(f"backend must be one of {PREPROCESS_BACKENDS}, got {backend!r}")
         # Initialize the preprocessor with desired size, mean, and std for normalization
+        self.backend = backend
         self.model_type = model_type
         self.size = size
         config = self.get_model_config(model_type)
@@ -86,6 +101,47 @@ class DetectionImagePreprocessor:
         
         return transforms.Compose(transform_list)
     
+    def _as_uint8_chw(self, img: Union[np.ndarray, Image.Image]) -> Optional[torch.Tensor]:
+        """
+        Zero-copy (3, H, W) uint8 view of an RGB / grayscale uint8 image, or None when the image
+        needs the PIL pipeline (other dtypes, alpha channels).
+        """
+        if isinstance(img, Image.Image):
+            if img.mode not in ('RGB', 'L'):
+                return None
+            img = np.asarray(img)
+        elif not isinstance(img, np.ndarray):
+            raise ValueError("Input should be a numpy array or PIL Image.")
+        if img.dtype != np.uint8:
+            return None
+        if img.ndim == 2:
+            img = img[:, :, None]
+        if img.ndim != 3 or img.shape[2] not in (1, 3):
+            return None
+        if not img.flags.writeable:
+            # torch.from_numpy warns on read-only arrays (e.g. np.asarray of a PIL image); nothing writes to it
+            img = img.copy()
+        tensor = torch.from_numpy(img).permute(2, 0, 1)
+        return tensor.expand(3, -1, -1) if tensor.shape[0] == 1 else tensor
+
+    def _resize_crop(self, images: torch.Tensor) -> torch.Tensor:
+        """
+        Resize (and center crop) a (3, H, W) or (N, 3, H, W) uint8 tensor like the PIL pipeline.
+        """
+        images = TF.resize(images, self.size, interpolation=self.interpolation, antialias=True)
+        if self.use_center_crop:
+            images = TF.center_crop(images, self.size)
+        return images
+
+    def _normalize(self, images: torch.Tensor) -> torch.Tensor:
+        """
+        uint8 -> normalized float32 in one fused op: x * (1 / (255 * std)) - mean / std.
+        """
+        std = torch.as_tensor(self.std, dtype=torch.float64)
+        scale = (1.0 / (255.0 * std)).to(torch.float32).view(-1, 1, 1)
+        shift = (-torch.as_tensor(self.mean, dtype=torch.float64) / std).to(torch.float32).view(-1, 1, 1)
+        return torch.addcmul(shift, images.to(torch.float32), scale)
+
     def __call__(self, img: Union[np.ndarray, Image.Image]) -> torch.Tensor:
         """
         Args:
@@ -93,12 +149,16 @@ class DetectionImagePreprocessor:
         Returns:
             Tensor: The preprocessed image tensor.
         """
+        if not isinstance(img, (np.ndarray, Image.Image)):
+            raise ValueError("Input should be a numpy array or PIL Image.")
+        if self.backend == 'tensor':
+            tensor = self._as_uint8_chw(img)
+            if tensor is not None:
+                return self._normalize(self._resize_crop(tensor))
         if isinstance(img, np.ndarray):
             return self.transform(img)
-        elif isinstance(img, Image.Image):
-            return self.transform(np.array(img))
-        else:
-            raise ValueError("Input should be a numpy array or PIL Image.")
+        # palette / alpha / 16-bit PIL modes become 3-channel RGB for the pipeline
+        return self.transform(np.array(img if img.mode == 'RGB' else img.convert('RGB')))
     
     def batch(self, imgs: Union[List[np.ndarray], List[Image.Image]]) -> List[torch.Tensor]:
         """
@@ -111,6 +171,12 @@ class DetectionImagePreprocessor:
         
         return [self.__call__(img) for img in imgs]
     
+    def batch_preprocess(self, images: List[Union[np.ndarray, Image.Image]], **kwargs) -> List[torch.Tensor]:
+        """
+        BaseImagePreprocessor batch interface, same as `batch`.
+        """
+        return self.batch(images)
+
     def batch_stack(self, imgs: List[Union[np.ndarray, Image.Image]]) -> torch.Tensor:
         """
         Preprocess a batch of images and stack them into a single tensor
@@ -119,6 +185,19 @@ class DetectionImagePreprocessor:
         Returns:
             Tensor: The stacked preprocessed image tensor batch.
         """
+        if self.backend == 'tensor' and len(imgs) > 0:
+            tensors = [self._as_uint8_chw(img) for img in imgs]
+            if all(t is not None for t in tensors):
+                if len({t.shape for t in tensors}) == 1:
+                    # same-size frames: one batched resize
+                    resized = self._resize_crop(torch.stack(tensors, dim=0))
+                else:
+                    first = self._resize_crop(tensors[0])
+                    resized = torch.empty((len(tensors), *first.shape), dtype=torch.uint8)
+                    resized[0] = first
+                    for i, tensor in enumerate(tensors[1:], start=1):
+                        resized[i] = self._resize_crop(tensor)
+                return self._normalize(resized)
         processed = self.batch(imgs)
         return torch.stack(processed, dim=0)
 
@@ -170,7 +249,7 @@ def read_images(file_path):
 if __name__ == "__main__":
     img_path = "/home/ubuntu/projects/pedestrian_attribute_recognition_30%/data/PA-100K/data"
     img_list = read_images(img_path)
-    preprocessor = Preprocessor(size=(224, 224))
+    preprocessor = DetectionImagePreprocessor(size=(224, 224))
     processed_imgs = preprocessor.batch(img_list)
     print(processed_imgs[0])  # 應為 torch.Size([3, 224, 224])
     # for img in img_list[:3]:
@@ -1,11 +1,41 @@
-from typing import Any, Callable, Dict, Type, Optional
+import importlib
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from utils.hashable import freeze
 
 PREPROCESSOR_REGISTRY: Dict[str, Any] = {}
 """
 A registry to map preprocessor names to their corresponding classes or instances.
 Key: str - The name of the preprocessor.
-Value: Any - The preprocessor class or instance.
+Value: Any - The preprocessor class or instance, or a lazy "module:attr" entry point string
+that is imported on first use.
+"""
+
+BUILTIN_PREPROCESSORS: Dict[str, str] = {
+    "clip_image": "preprocess.clip_image_preprocessor:CLIPImagePreprocessor",
+    "vit_image": "preprocess.vit_image_preprocessor:ViTImagePreprocessor",
+    "detection_image": "preprocess.read_image:DetectionImagePreprocessor",
+    "clip_text": "preprocess.clip_text_preprocessor:CLIPTextTokenizer",
+    "bert_text": "preprocess.bert_text_prerpocessor:TransformerTextPreprocessor",
+    "openclip_text": "preprocess.openclip_text_tokenizer:OpenCLIPTEXTTokenizer",
+}
 """
+Entry points of the bundled preprocessors; registering them imports nothing
+(transformers / open_clip / torchvision load when the preprocessor is first requested).
+"""
+
+# (name, frozen kwargs) -> (registered class, instance); classes are instantiated once per key
+_INSTANCES: Dict[Tuple[str, Hashable], Tuple[type, Any]] = {}
+_BUILD_LOCKS: Dict[Tuple[str, Hashable], threading.Lock] = {}
+_LOCK = threading.RLock()
+_METRICS: Dict[str, Dict[str, Any]] = {}
+
+
+def _metrics(name: str) -> Dict[str, Any]:
+    return _METRICS.setdefault(name, {"builds": 0, "hits": 0, "build_seconds": 0.0, "warmup_seconds": 0.0})
+
 
 def register_preprocessor(name: str, preprocessor: Any):
     """
@@ -14,7 +44,35 @@ def register_preprocessor(name: str, preprocessor: Any):
         name (str): The name of the preprocessor to register.
         preprocessor (Any): The preprocessor object to register.
     """
-    PREPROCESSOR_REGISTRY[name] = preprocessor
+    with _LOCK:
+        PREPROCESSOR_REGISTRY[name] = preprocessor
+        # instances (and their build locks) from a previous registration of `name` are stale
+        for key in [key for key in _INSTANCES if key[0] == name]:
+            del _INSTANCES[key]
+        for key in [key for key in _BUILD_LOCKS if key[0] == name]:
+            del _BUILD_LOCKS[key]
+
+def register_builtin_preprocessors(overwrite: bool = False) -> None:
+    """
+    Register every BUILTIN_PREPROCESSORS entry point by name without importing it.
+    Names that are already registered are kept unless `overwrite` is True.
+    """
+    for name, entry_point in BUILTIN_PREPROCESSORS.items():
+        with _LOCK:
+            if name in PREPROCESSOR_REGISTRY and not overwrite:
+                continue
+        register_preprocessor(name, entry_point)
+
+
+def _load_entry_point(entry_point: str) -> Any:
+    """
+    Import "package.module:attr" and return the attribute.
+    """
+    module_name, sep, attr = entry_point.partition(":")
+    if not sep or not attr:
+        raise ValueError(f"entry point must look like 'module:attr', got {entry_point!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
 
 def preprocessor_decorator(name: str) -> Callable[[Type], Type]:
     """
@@ -33,23 +91,116 @@ def preprocessor_decorator(name: str) -> Callable[[Type], Type]:
 def get_preprocessor(name: str, **kwargs: Any) -> Any:
     """
     factory method to fetch the registered preprocessor by name.
+
+    Registered classes are instantiated lazily, once per (name, kwargs), and the instance is
+    shared by every later call, so tokenizers / transforms are not rebuilt per request.
     Args:
         name (str): The name of the preprocessor to retrieve.
         **kwargs: Additional keyword arguments to pass to the preprocessor constructor.
     Returns:
         Any: The registered preprocessor object.
     """
-    if name not in PREPROCESSOR_REGISTRY:
-        raise ValueError(f"preprocessor '{name}' is not registered")
-    obj = PREPROCESSOR_REGISTRY[name]
-    
-    # detect obj is a class or an instance
-    if isinstance(obj, type):
-        # if it's a class, instantiate it with kwargs
-        return obj(**kwargs)
-    else:
+    with _LOCK:
+        if name not in PREPROCESSOR_REGISTRY:
+            raise ValueError(f"preprocessor '{name}' is not registered")
+        obj = PREPROCESSOR_REGISTRY[name]
+        entry_point = obj if isinstance(obj, str) else None
+
+    if entry_point is not None:
+        # import outside the lock; the resolved class replaces the entry point for later calls
+        obj = _load_entry_point(entry_point)
+        with _LOCK:
+            if PREPROCESSOR_REGISTRY.get(name) == entry_point:
+                PREPROCESSOR_REGISTRY[name] = obj
+
+    with _LOCK:
         # if it's an instance, return it directly
-        return obj
-    
+        if not isinstance(obj, type):
+            return obj
+
+        key = (name, freeze(kwargs))
+        cached = _INSTANCES.get(key)
+        if cached is not None and cached[0] is obj:
+            _metrics(name)["hits"] += 1
+            return cached[1]
+        build_lock = _BUILD_LOCKS.setdefault(key, threading.Lock())
+
+    # build outside the registry lock so a slow from_pretrained does not block other names
+    with build_lock:
+        with _LOCK:
+            cached = _INSTANCES.get(key)
+            if cached is not None and cached[0] is obj:
+                _metrics(name)["hits"] += 1
+                return cached[1]
+        start = time.perf_counter()
+        instance = obj(**kwargs)
+        elapsed = time.perf_counter() - start
+        with _LOCK:
+            if PREPROCESSOR_REGISTRY.get(name) is obj:
+                _INSTANCES[key] = (obj, instance)
+            metrics = _metrics(name)
+            metrics["builds"] += 1
+            metrics["build_seconds"] += elapsed
+        return instance
+
+
+def _warmup_sample(name: str, preprocessor: Any) -> Any:
+    import numpy as np
+    from preprocess.base_preprocessor import BaseImagePreprocessor, BaseTextTokenizer
+    if isinstance(preprocessor, BaseTextTokenizer):
+        return "a photo of a person"
+    if isinstance(preprocessor, BaseImagePreprocessor):
+        return np.zeros((224, 224, 3), dtype=np.uint8)
+    raise ValueError(f"no default warmup sample for preprocessor '{name}' "
+                     f"({type(preprocessor).__name__}), pass one in `samples`")
 
 
+def warmup(configs: Optional[Dict[str, Dict[str, Any]]] = None,
+           samples: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    Build and exercise preprocessors once, e.g. at service start, so the first request does not
+    pay for tokenizer downloads / transform construction.
+    Args:
+        configs (Dict[str, Dict], optional): name -> constructor kwargs; defaults to every registered name with no kwargs.
+        samples (Dict[str, Any], optional): name -> input to run through the preprocessor; defaults to
+            a short prompt for BaseTextTokenizer and a blank 224x224 RGB image for BaseImagePreprocessor
+            instances, other preprocessors need an explicit sample.
+    Returns:
+        Dict[str, float]: Seconds spent building and running each preprocessor.
+    """
+    if configs is None:
+        with _LOCK:
+            configs = {name: {} for name in PREPROCESSOR_REGISTRY}
+    samples = samples or {}
+    timings = {}
+    for name, kwargs in configs.items():
+        start = time.perf_counter()
+        preprocessor = get_preprocessor(name, **kwargs)
+        sample = samples[name] if name in samples else _warmup_sample(name, preprocessor)
+        preprocessor(sample)
+        timings[name] = time.perf_counter() - start
+        with _LOCK:
+            _metrics(name)["warmup_seconds"] += timings[name]
+    return timings
+
+
+def registry_stats() -> Dict[str, Any]:
+    """
+    Build-time metrics: cached instance count and per-name builds / hits / build and warmup seconds.
+    """
+    with _LOCK:
+        return {
+            "registered": sorted(PREPROCESSOR_REGISTRY),
+            "instances": len(_INSTANCES),
+            "preprocessors": {name: dict(metrics) for name, metrics in _METRICS.items()},
+        }
+
+
+def clear_instances() -> None:
+    """
+    Drop every cached preprocessor instance and reset the metrics.
+    """
+    with _LOCK:
+        _INSTANCES.clear()
+        _BUILD_LOCKS.clear()
+        _METRICS.clear()
@@ -1,7 +1,6 @@
 from typing import Any, List, Tuple
 import numpy as np
-from PIL import Image
-from preprocess.base_preprocessor import BaseImagePreprocessor
+from preprocess.base_preprocessor import BaseImagePreprocessor, batch_resize_normalize, normalize_uint8_batch, to_resized_rgb
 
 class ViTImagePreprocessor(BaseImagePreprocessor):
     """
@@ -22,8 +21,8 @@ class ViTImagePreprocessor(BaseImagePreprocessor):
         """
         
         self.size = size
-        self.mean = np.array(mean)
-        self.std = np.array(std)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
         
     def __call__(self, image: Any, **kwargs) -> np.ndarray:
         """
@@ -35,60 +34,21 @@ class ViTImagePreprocessor(BaseImagePreprocessor):
             np.ndarray: Preprocessed image as a numpy array.
         """
         
-        # Validate input type
-        if isinstance(image, np.ndarray):
-            if image.ndim != 3 or image.shape[2] != 3:
-                raise ValueError(f"Input numpy.ndarray must be HxWx3, got shape {image.shape}")
-            img = Image.fromarray(image)
-        elif isinstance(image, Image.Image):
-            img = image
-        else:
-            raise ValueError("Input must be a PIL.Image or numpy array")
-        
-        # Convert to RGB and resize
-        try:
-            img = img.convert("RGB")
-        except Exception as e:
-            raise ValueError(f"Failed to convert image to RGB: {e}")
-        
-        # Resize image with exception handling
-        try:
-            img = img.resize(self.size, Image.BICUBIC)
-        except Exception as e:
-            raise ValueError(f"Failed to resize image: {e}")
-        
-        
-        # Convert numpy array
-        arr = np.array(img).astype(np.float32) / 255.0 # [0,1]
-        if arr.shape[-1] != 3:
-            raise ValueError(f"Image after conversion must have 3 channels, got shape {arr.shape}")
-
-        # Normalize
+        arr = np.asarray(to_resized_rgb(image, self.size))
         try:
-            arr = (arr - self.mean[None, None, :]) / self.std[None, None, :]
+            return normalize_uint8_batch(arr[None], self.mean, self.std)[0]
         except Exception as e:
             raise ValueError(f"Failed to normalize image: {e}")
-        arr = arr.transpose(2, 0, 1) # HWC -> CHW
-        
-        return arr
     
-    def batch_preprocess(self, images: List[Any], **kwargs) -> np.ndarray:
+    def batch_preprocess(self, images: List[Any], out: Any = None, **kwargs) -> Any:
         """
-        batch preprocess images
-        
+        Batch preprocess images: each image is resized into one preallocated uint8 (N, H, W, 3)
+        buffer, then the whole batch is normalized and transposed once in float32.
         Args:
             images (List[Any]): List of input images (PIL Images or numpy arrays).
+            out (Any): Optional (N, 3, H, W) float32 numpy array or CPU torch tensor to fill in place.
             **kwargs: Additional arguments (not used here).
         Returns:
-            np.ndarray: Batch of preprocessed images as a numpy array.
+            Any: `out` if given, otherwise the batch as a float32 numpy array.
         """
-        
-        # Process each image and stack them into a single numpy array
-        preprocess_images = []
-        for idx, image in enumerate(images):
-            try:
-                arr = self.__call__(image, **kwargs)
-                preprocess_images.append(arr)
-            except Exception as e:
-                raise ValueError(f"Error processing image at index {idx}: {e}")
-        return np.stack(preprocess_images, axis=0)
\ No newline at end of file
+        return batch_resize_normalize(images, self.size, self.mean, self.std, out=out)
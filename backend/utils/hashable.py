@@ -0,0 +1,22 @@
+from typing import Any, Hashable
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Convert kwargs values (lists, dicts, sets) into a hashable form for cache keys
+    (model pool and preprocessor registry).
+    Raises:
+        TypeError: For unhashable values that are not containers, which have no stable key.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(v) for v in value))
+    try:
+        hash(value)
+    except TypeError:
+        raise TypeError(f"unhashable {type(value).__name__} cannot be part of a cache key; "
+                        "pass a hashable value (or a dict / list / set of them)") from None
+    return value
@@ -4,11 +4,12 @@ import torch
 import pytest
 import sys
 from PIL import Image
+import torchvision.transforms as transforms
 import tempfile
 import shutil
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from preprocess.read_image import read_image, read_images, Preprocessor
+from preprocess.read_image import read_image, read_images, DetectionImagePreprocessor as Preprocessor
 
 class TestReadImage:
     @pytest.fixture(scope="class")
@@ -176,6 +177,39 @@ class TestPreprocessor:
         assert preprocessor.mean == [0.5, 0.5, 0.5]
         assert preprocessor.std == [0.2, 0.2, 0.2]
 
+    @pytest.mark.parametrize("model_type", ['default', 'clip', 'openclip', 'vit'])
+    def test_tensor_backend_matches_pil(self, model_type, sample_image):
+        tensor_pre = Preprocessor(model_type=model_type, backend='tensor')
+        pil_pre = Preprocessor(model_type=model_type, backend='pil')
+        # resampling differences in uint8 levels: bilinear within one level; bicubic overshoot
+        # is clamped differently by PIL, so a few pixels on sharp edges differ by more
+        levels = torch.tensor(pil_pre.std).view(-1, 1, 1) * 255.0
+        bilinear = pil_pre.interpolation == transforms.InterpolationMode.BILINEAR
+        images = [sample_image, np.ascontiguousarray(sample_image[:80])]
+        for actual, expected in ((tensor_pre(sample_image), pil_pre(sample_image)),
+                                 (tensor_pre.batch_stack(images), pil_pre.batch_stack(images))):
+            diff = (actual - expected).abs() * levels
+            assert diff.mean() <= 0.5
+            if bilinear:
+                assert diff.max() <= 1.5
+            else:
+                assert (diff > 2.0).float().mean() <= 0.02
+
+    def test_tensor_backend_grayscale_and_fallback(self):
+        preprocessor = Preprocessor(backend='tensor')
+        gray = np.random.randint(0, 255, (60, 40), dtype=np.uint8)
+        assert preprocessor(Image.fromarray(gray)).shape == torch.Size([3, 224, 224])
+        rgba = Image.fromarray(np.random.randint(0, 255, (60, 40, 4), dtype=np.uint8))
+        # alpha images take the PIL fallback path
+        assert preprocessor._as_uint8_chw(rgba) is None
+        expected = Preprocessor(backend='pil')(rgba.convert('RGB'))
+        torch.testing.assert_close(preprocessor(rgba), expected)
+        with pytest.raises(ValueError):
+            Preprocessor(backend='opencv')
+
+    def test_pil_backend_is_default(self):
+        assert Preprocessor().backend == 'pil'
+
     def test_preprocessor_mixed_input_types(self, sample_image, sample_pil_image):
         preprocessor = Preprocessor()
         mixed_batch = [sample_image, sample_pil_image]
@@ -60,4 +60,16 @@ def test_detect_endpoint():
 def test_detect_invalid_input():
     payload = {"image_url": ""}
     response = client.post("/api/detect", json=payload)
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_batching_stats():
+    response = client.get("/api/health/batching")
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
+
+def test_model_pool_stats():
+    # the pool is created by the app lifespan, which only runs inside the client context
+    with TestClient(app) as lifespan_client:
+        response = lifespan_client.get("/api/health/models")
+    assert response.status_code == 200
+    assert response.json()["resident"] == []
@@ -0,0 +1,50 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import json
+import unittest
+import numpy as np
+from models.attribute_result import AttributeResult
+from postprocess.PostprocessManager import PostprocessManager
+
+
+class TestAttributeResult(unittest.TestCase):
+    def setUp(self):
+        self.names = ["Female", "Hat", "Backpack"]
+        self.probs = np.array([[0.9, 0.2, 0.6], [0.1, 0.8, 0.3]], dtype=np.float32)
+        self.result = AttributeResult(self.probs, self.names)
+
+    def test_lazy_dict_views(self):
+        self.assertEqual(len(self.result), 2)
+        self.assertAlmostEqual(self.result[0]["Female"], 0.9, places=6)
+        self.assertEqual(list(self.result[1]), self.names)
+        self.assertEqual(self.result, self.result.to_dicts())
+        self.assertEqual(dict(self.result[1]), self.result.to_dicts()[1])
+        self.assertTrue(np.shares_memory(self.result.column("Hat"), self.probs))
+        self.assertEqual(len(self.result[1:]), 1)
+
+    def test_shape_validation(self):
+        with self.assertRaises(ValueError):
+            AttributeResult(np.zeros((2, 2), dtype=np.float32), self.names)
+
+    def test_grouped_threshold_and_sort(self):
+        grouped = self.result.grouped(score_threshold=0.5)
+        self.assertEqual([item["name"] for item in grouped["person_0"]], ["Female", "Backpack"])
+        self.assertEqual([item["name"] for item in grouped["person_1"]], ["Hat"])
+        self.assertEqual(grouped["person_0"][0]["attribute_type"], "person_0")
+
+    def test_postprocess_consumes_columnar(self):
+        postprocessor = PostprocessManager()
+        result = postprocessor(self.result, output_format="dict", score_threshold=0.5)
+        self.assertEqual(result, self.result.grouped(score_threshold=0.5))
+        payload = json.loads(postprocessor(self.result, output_format="json"))
+        self.assertEqual(len(payload["person_1"]), 3)
+
+    def test_columnar_serialization(self):
+        columnar = self.result.to_columnar()
+        self.assertEqual(columnar["attribute_names"], self.names)
+        self.assertEqual(len(columnar["probabilities"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import numpy as np
+from models.cached_attribute_analyzer import CachedAttributeAnalyzer, dhash
+
+
+class CountingAnalyzer:
+    attribute_names = ["bright"]
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, image, boxes):
+        self.calls.append(len(boxes))
+        results = []
+        for box in boxes:
+            x1, y1, x2, y2 = box[0] if isinstance(box, tuple) else box
+            results.append({"bright": float(image[y1:y2, x1:x2].mean() / 255.0)})
+        return results
+
+    def load_checkpoint(self, filepath, optimizer=None):
+        return {}
+
+
+class TestCachedAttributeAnalyzer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = np.zeros((100, 200, 3), dtype=np.uint8)
+        self.image[:, :100] = rng.integers(0, 255, (100, 100, 3), dtype=np.uint8)
+        self.image[:, 100:] = np.linspace(0, 255, 100, dtype=np.uint8)[None, :, None]
+        self.boxes = [[0, 0, 100, 100], ([100, 0, 200, 100], 0.9)]
+        self.inner = CountingAnalyzer()
+
+    def test_hits_skip_forward(self):
+        cached = CachedAttributeAnalyzer(self.inner, hamming_tolerance=0)
+        first = cached.analyze(self.image, self.boxes)
+        second = cached.analyze(self.image, self.boxes)
+        self.assertEqual(first, second)
+        self.assertEqual(self.inner.calls, [2])
+        stats = cached.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 2, 2))
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_keys_computed_outside_lock(self):
+        cached = CachedAttributeAnalyzer(self.inner, hamming_tolerance=0)
+        key = cached._key
+        held = []
+
+        def checking_key(image, box):
+            held.append(cached._lock.locked())
+            return key(image, box)
+
+        cached._key = checking_key
+        cached.analyze(self.image, self.boxes)
+        self.assertEqual(held, [False, False])
+
+    def test_only_misses_are_analyzed(self):
+        cached = CachedAttributeAnalyzer(self.inner, hamming_tolerance=0)
+        cached.analyze(self.image, self.boxes[:1])
+        results = cached.analyze(self.image, self.boxes)
+        self.assertEqual(self.inner.calls, [1, 1])
+        self.assertEqual(len(results), 2)
+
+    def test_near_duplicate_within_tolerance(self):
+        noisy = self.image.copy()
+        noisy[0, 0] = 255 - noisy[0, 0]
+        key_a = dhash(self.image[:, :100])
+        key_b = dhash(noisy[:, :100])
+        distance = bin(key_a ^ key_b).count("1")
+        cached = CachedAttributeAnalyzer(self.inner, hamming_tolerance=max(distance, 1))
+        cached.analyze(self.image, self.boxes[:1])
+        cached.analyze(noisy, self.boxes[:1])
+        self.assertEqual(self.inner.calls, [1])
+        self.assertEqual(cached.stats()["hits"], 1)
+
+    def test_different_box_shapes_do_not_share_entries(self):
+        # a horizontal gradient has the same dHash at any box height
+        tall, short = [100, 0, 200, 100], [100, 0, 200, 40]
+        self.assertEqual(dhash(self.image[0:100, 100:200]), dhash(self.image[0:40, 100:200]))
+        cached = CachedAttributeAnalyzer(self.inner)
+        cached.analyze(self.image, [tall])
+        cached.analyze(self.image, [short])
+        self.assertEqual(self.inner.calls, [1, 1])
+        self.assertEqual(cached.stats()["hamming_tolerance"], 2)
+
+    def test_lru_capacity_and_invalidation(self):
+        cached = CachedAttributeAnalyzer(self.inner, capacity=1, hamming_tolerance=0)
+        cached.analyze(self.image, self.boxes)
+        self.assertEqual(cached.stats()["size"], 1)
+        self.assertEqual(cached.stats()["evictions"], 1)
+        cached.load_checkpoint("unused.pth")
+        self.assertEqual(cached.stats()["size"], 0)
+
+    def test_invalid_tolerance(self):
+        with self.assertRaises(ValueError):
+            CachedAttributeAnalyzer(self.inner, hamming_tolerance=64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -39,6 +39,15 @@ class TestCLIPImagePreprocessor(unittest.TestCase):
             self.assertFalse(np.isnan(result).any())
             self.assertFalse(np.isinf(result).any())
 
+    def test_batch_into_torch_tensor(self):
+        import torch
+        imgs = [np.random.randint(0, 255, (256, 200, 3), dtype=np.uint8) for _ in range(2)]
+        out = torch.empty((2, 3, 224, 224), dtype=torch.float32)
+        result = self.preprocessor.batch_preprocess(imgs, out=out)
+        self.assertIs(result, out)
+        expected = np.stack([self.preprocessor(img) for img in imgs])
+        np.testing.assert_allclose(out.numpy(), expected, atol=1e-6)
+
     def test_invalid_input_type(self):
         # 測試無效輸入類型
         with self.assertRaises(ValueError):
@@ -0,0 +1,110 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import tempfile
+import unittest
+import numpy as np
+import torch
+from models.clip_zero_shot_attribute_analyzer import ClipZeroShotAttributeAnalyzer
+
+
+class DummyClip(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.text = torch.nn.Embedding(1000, 16)
+        self.image = torch.nn.Linear(3 * 8 * 8, 16)
+        self.logit_scale = torch.nn.Parameter(torch.tensor(np.log(100.0), dtype=torch.float32))
+        self.prompts_encoded = 0
+
+    def encode_text(self, input_ids):
+        self.prompts_encoded += input_ids.shape[0]
+        return self.text(input_ids).mean(dim=1)
+
+    def encode_image(self, pixels):
+        return self.image(pixels.flatten(1))
+
+
+class DummyPreprocess:
+    def batch_preprocess(self, images):
+        return np.stack([np.resize(image, (3, 8, 8)).astype(np.float32) / 255.0 for image in images])
+
+
+def dummy_tokenizer(texts, **kwargs):
+    ids = [[sum(map(ord, word)) % 1000 for word in text.split()][:8] for text in texts]
+    ids = [row + [0] * (8 - len(row)) for row in ids]
+    return {"input_ids": torch.tensor(ids)}
+
+
+class TestClipZeroShotAttributeAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.model = DummyClip()
+        self.analyzer = ClipZeroShotAttributeAnalyzer(
+            self.model, DummyPreprocess(), dummy_tokenizer,
+            attributes={"Hat": ["wearing a hat", "with a cap"], "Backpack": "carrying a backpack"},
+            negatives={"Hat": "with no hat"},
+            templates=("a photo of a person {}.", "a pedestrian {}."),
+            text_batch_size=3,
+        )
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 255, (64, 48, 3), dtype=np.uint8)
+        self.boxes = [[0, 0, 20, 40], ([10, 5, 48, 64], 0.9)]
+
+    def test_text_matrix_built_once(self):
+        # 3 positive phrases + 1 negative phrase + neutral prompt, each with 2 templates
+        self.assertEqual(self.model.prompts_encoded, 10)
+        self.assertEqual(tuple(self.analyzer.text_embeddings.shape), (4, 16))
+        results = self.analyzer.analyze(self.image, self.boxes)
+        self.analyzer.analyze(self.image, self.boxes)
+        self.assertEqual(self.model.prompts_encoded, 10)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(list(results[0]), ["Hat", "Backpack"])
+        self.assertTrue(all(0.0 <= p <= 1.0 for p in results[0].values()))
+        self.assertEqual(self.analyzer.analyze(self.image, []), [])
+
+    def test_add_attributes_encodes_only_new_prompts(self):
+        before = self.analyzer.analyze(self.image, self.boxes)
+        self.analyzer.add_attributes({"Glasses": "wearing glasses"})
+        # neutral negative is already encoded
+        self.assertEqual(self.model.prompts_encoded, 12)
+        self.assertEqual(self.analyzer.attribute_names, ["Hat", "Backpack", "Glasses"])
+        after = self.analyzer.analyze(self.image, self.boxes)
+        for old, new in zip(before, after):
+            self.assertAlmostEqual(old["Hat"], new["Hat"], places=5)
+            self.assertAlmostEqual(old["Backpack"], new["Backpack"], places=5)
+
+    def test_replacing_attribute_evicts_its_negative(self):
+        self.analyzer.add_attributes({"Hat": "wearing a hat"})
+        # "with no hat" is no longer referenced, only the neutral negative is left
+        self.assertEqual(tuple(self.analyzer.text_embeddings.shape), (3, 16))
+        self.assertEqual(self.analyzer.negatives, {})
+        fresh = ClipZeroShotAttributeAnalyzer(
+            DummyClip(), DummyPreprocess(), dummy_tokenizer,
+            attributes={"Backpack": "carrying a backpack", "Hat": "wearing a hat"},
+            templates=("a photo of a person {}.", "a pedestrian {}."),
+        )
+        for old, new in zip(fresh.analyze(self.image, self.boxes), self.analyzer.analyze(self.image, self.boxes)):
+            self.assertEqual(list(old), list(new))
+            for name in old:
+                self.assertAlmostEqual(old[name], new[name], places=5)
+
+    def test_empty_attribute_bank(self):
+        analyzer = ClipZeroShotAttributeAnalyzer(self.model, DummyPreprocess(), dummy_tokenizer, attributes={})
+        self.assertEqual(analyzer.analyze(self.image, self.boxes), [{}, {}])
+
+    def test_checkpoint_restores_bank_without_encoding(self):
+        expected = self.analyzer.analyze(self.image, self.boxes)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "zero_shot.pth")
+            self.analyzer.save_checkpoint(path)
+            model = DummyClip()
+            other = ClipZeroShotAttributeAnalyzer(model, DummyPreprocess(), dummy_tokenizer, attributes={})
+            other.load_checkpoint(path)
+        self.assertEqual(model.prompts_encoded, 0)
+        self.assertEqual(other.attribute_names, ["Hat", "Backpack"])
+        for old, new in zip(expected, other.analyze(self.image, self.boxes)):
+            self.assertAlmostEqual(old["Hat"], new["Hat"], places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import torch
+from models.detector_quantization import _quantized_engine
+
+
+class TestQuantizedEngine(unittest.TestCase):
+    def setUp(self):
+        engines = torch.backends.quantized.supported_engines
+        if 'qnnpack' not in engines or 'fbgemm' not in engines:
+            self.skipTest("needs both the fbgemm and qnnpack engines")
+        self.original = torch.backends.quantized.engine
+        torch.backends.quantized.engine = 'fbgemm'
+
+    def tearDown(self):
+        torch.backends.quantized.engine = self.original
+
+    def test_engine_restored_after_block(self):
+        with _quantized_engine('qnnpack'):
+            self.assertEqual(torch.backends.quantized.engine, 'qnnpack')
+        self.assertEqual(torch.backends.quantized.engine, 'fbgemm')
+
+    def test_engine_restored_after_error(self):
+        with self.assertRaises(RuntimeError):
+            with _quantized_engine('qnnpack'):
+                raise RuntimeError("calibration failed")
+        self.assertEqual(torch.backends.quantized.engine, 'fbgemm')
+
+
+if __name__ == "__main__":
+    unittest.main()
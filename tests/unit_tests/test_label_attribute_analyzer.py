@@ -0,0 +1,223 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import numpy as np
+import torch.nn as nn
+from models.label_based_attribute_analyzer import LabelAttributeAnalyzerBase, StudentAttributeAnalyzer, VitAttributeAnalyzer
+from preprocess.read_image import DetectionImagePreprocessor
+
+
+class _MeanColor(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.inputs = []
+
+    def forward(self, x):
+        self.inputs.append(x.clone())
+        return x.mean(dim=(2, 3))
+
+
+class _MeanColorAnalyzer(LabelAttributeAnalyzerBase):
+    """
+    Tiny analyzer whose model outputs the per-channel mean of each normalized crop.
+    """
+
+    def __init__(self, preprocess, crop_mode='preprocess', max_batch_size=None, memory_budget_mb=None):
+        self.model = _MeanColor()
+        self.attribute_names = ['r', 'g', 'b']
+        self.device = 'cpu'
+        self.preprocess = preprocess
+        self._init_crop_mode(crop_mode)
+        self._init_batching(max_batch_size, memory_budget_mb)
+
+    def save_checkpoint(self, filepath, optimizer=None, epoch=None, extra=None):
+        pass
+
+    def load_checkpoint(self, filepath, optimizer=None):
+        pass
+
+
+def _tiny_vit_analyzer(precision='fp32', device='cpu'):
+    """
+    VitAttributeAnalyzer around a small Linear model, so no pretrained weights are downloaded.
+    """
+    analyzer = VitAttributeAnalyzer.__new__(VitAttributeAnalyzer)
+    analyzer.model = nn.Sequential(nn.Flatten(), nn.Linear(3 * 16 * 16, 32), nn.ReLU(), nn.Linear(32, 3)).eval()
+    analyzer.attribute_names = ['r', 'g', 'b']
+    analyzer.device = device
+    analyzer.preprocess = DetectionImagePreprocessor(size=(16, 16))
+    analyzer._init_crop_mode('preprocess')
+    analyzer._init_batching()
+    analyzer._int8_model = None
+    analyzer.set_token_reduction(0.0)
+    analyzer.set_precision(precision)
+    return analyzer
+
+
+class TestLabelAttributeAnalyzer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = np.zeros((120, 160, 3), dtype=np.uint8)
+        self.image[20:100, 30:90] = rng.integers(0, 255, (80, 60, 3), dtype=np.uint8)
+        self.image[10:60, 100:150] = (200, 50, 10)
+        self.boxes = [([30, 20, 90, 100], 0.9), ([100, 10, 150, 60], 0.8)]
+        self.preprocess = DetectionImagePreprocessor(size=(64, 64))
+
+    def test_invalid_crop_mode(self):
+        with self.assertRaises(ValueError):
+            _MeanColorAnalyzer(self.preprocess, crop_mode='bogus')
+
+    def test_roi_align_matches_preprocess(self):
+        reference = _MeanColorAnalyzer(self.preprocess).analyze(self.image, self.boxes)
+        fast = _MeanColorAnalyzer(self.preprocess, crop_mode='roi_align').analyze(self.image, self.boxes)
+        self.assertEqual(len(fast), 2)
+        for ref, out in zip(reference, fast):
+            for name in ['r', 'g', 'b']:
+                self.assertAlmostEqual(ref[name], out[name], delta=0.1)
+
+    def test_roi_align_batch_shape_and_buffer_reuse(self):
+        analyzer = _MeanColorAnalyzer(self.preprocess, crop_mode='roi_align')
+        results = analyzer.analyze_batch([self.image, self.image], [self.boxes, self.boxes[:1]])
+        self.assertEqual([len(r) for r in results], [2, 1])
+        self.assertEqual(tuple(analyzer.model.inputs[0].shape), (3, 3, 64, 64))
+        buffer = analyzer._buffers.crops
+        analyzer.analyze(self.image, self.boxes[:1])
+        self.assertIs(analyzer._buffers.crops, buffer)
+        self.assertEqual(analyzer.analyze(self.image, []), [])
+
+    def test_chunked_batching_matches_single_batch(self):
+        boxes = self.boxes * 5
+        reference = _MeanColorAnalyzer(self.preprocess).analyze(self.image, boxes)
+        for crop_mode in ['preprocess', 'roi_align']:
+            analyzer = _MeanColorAnalyzer(self.preprocess, crop_mode=crop_mode, max_batch_size=3)
+            results = analyzer.analyze_batch([self.image, self.image], [boxes, boxes[:4]])
+            self.assertEqual([len(r) for r in results], [10, 4])
+            self.assertEqual([len(x) for x in analyzer.model.inputs], [3, 3, 3, 3, 2])
+            if crop_mode == 'preprocess':
+                for ref, out in zip(reference, results[0]):
+                    self.assertAlmostEqual(ref['r'], out['r'], places=5)
+
+    def test_memory_budget_adapts_chunk_size(self):
+        analyzer = _MeanColorAnalyzer(self.preprocess, memory_budget_mb=1)
+        self.assertEqual(analyzer._chunk_size(100), 8)
+        analyzer._bytes_per_crop = 256 * 1024
+        self.assertEqual(analyzer._chunk_size(100), 4)
+        analyzer._bytes_per_crop = 10 * 1024 * 1024
+        self.assertEqual(analyzer._chunk_size(100), 1)
+        results = analyzer.analyze(self.image, self.boxes * 3)
+        self.assertEqual(len(results), 6)
+
+    def test_memory_budget_measures_probe_chunk(self):
+        # the 64x64 float input (48 KiB per crop) dominates; the model only outputs 3 values per crop
+        analyzer = _MeanColorAnalyzer(self.preprocess, memory_budget_mb=1)
+        results = analyzer.analyze(self.image, self.boxes * 10)
+        self.assertEqual(len(results), 20)
+        crop_bytes = 3 * 64 * 64 * 4
+        self.assertGreaterEqual(analyzer._bytes_per_crop, crop_bytes)
+        self.assertLessEqual(analyzer._bytes_per_crop, 4 * crop_bytes)
+        # probe of 8, then chunks that fit 1 MiB
+        budget_chunk = int(1024 * 1024 / analyzer._bytes_per_crop)
+        self.assertEqual([len(x) for x in analyzer.model.inputs][:2], [8, min(budget_chunk, 12)])
+
+    def test_memory_probe_ignores_other_models(self):
+        import torch
+        analyzer = _MeanColorAnalyzer(self.preprocess, memory_budget_mb=1)
+        other = nn.Linear(4096, 4096)
+        original = analyzer._forward
+
+        def forward_with_other_model(batch):
+            # a large activation of an unrelated model while the probe runs
+            other(torch.zeros(64, 4096))
+            return original(batch)
+
+        analyzer._forward = forward_with_other_model
+        analyzer.analyze(self.image, self.boxes * 4)
+        self.assertLessEqual(analyzer._bytes_per_crop, 4 * 3 * 64 * 64 * 4)
+
+    def test_memory_probe_repeats_for_new_crop_size(self):
+        analyzer = _MeanColorAnalyzer(self.preprocess, memory_budget_mb=1)
+        analyzer.analyze(self.image, self.boxes)
+        small = analyzer._bytes_per_crop
+        analyzer.preprocess = DetectionImagePreprocessor(size=(128, 128))
+        analyzer.analyze(self.image, self.boxes)
+        self.assertGreater(analyzer._bytes_per_crop, 2 * small)
+
+    def test_columnar_output_matches_dicts(self):
+        analyzer = _MeanColorAnalyzer(self.preprocess)
+        dicts = analyzer.analyze(self.image, self.boxes)
+        columnar = analyzer.analyze(self.image, self.boxes, columnar=True)
+        self.assertEqual(columnar.attribute_names, ('r', 'g', 'b'))
+        self.assertEqual(columnar.probabilities.shape, (2, 3))
+        self.assertEqual(columnar, dicts)
+        self.assertEqual(len(analyzer.analyze(self.image, [], columnar=True)), 0)
+
+    def test_invalid_max_batch_size(self):
+        with self.assertRaises(ValueError):
+            _MeanColorAnalyzer(self.preprocess, max_batch_size=0)
+
+
+class TestVitPrecision(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        self.boxes = [[30, 20, 90, 100], [100, 10, 150, 60]]
+
+    def test_reduced_precision_matches_fp32(self):
+        analyzer = _tiny_vit_analyzer()
+        reference = analyzer.analyze(self.image, self.boxes)
+        for precision, tolerance in (('bf16', 2e-2), ('int8', 5e-2)):
+            analyzer.set_precision(precision)
+            for expected, actual in zip(reference, analyzer.analyze(self.image, self.boxes)):
+                for name in expected:
+                    self.assertAlmostEqual(actual[name], expected[name], delta=tolerance)
+
+    def test_int8_requires_cpu(self):
+        with self.assertRaises(ValueError):
+            _tiny_vit_analyzer(precision='int8', device='cuda')
+        with self.assertRaises(ValueError):
+            _tiny_vit_analyzer().set_precision('fp16')
+
+    def test_checkpoint_keeps_caller_precision(self):
+        import tempfile
+        source = _tiny_vit_analyzer(precision='int8')
+        reference = source.analyze(self.image, self.boxes)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'vit.pth')
+            source.save_checkpoint(path)
+            target = _tiny_vit_analyzer(precision='bf16')
+            target.load_checkpoint(path)
+            self.assertEqual(target.precision, 'bf16')
+            target.load_checkpoint(path, adopt_precision=True)
+        self.assertEqual(target.precision, 'int8')
+        for expected, actual in zip(reference, target.analyze(self.image, self.boxes)):
+            for name in expected:
+                self.assertAlmostEqual(actual[name], expected[name], places=5)
+
+
+class TestStudentAttributeAnalyzer(unittest.TestCase):
+    def test_analyze_and_checkpoint_roundtrip(self):
+        import tempfile
+        preprocess = DetectionImagePreprocessor(size=(64, 32))
+        student = StudentAttributeAnalyzer(['a', 'b'], device='cpu', preprocess=preprocess,
+                                           arch='resnet18', pretrained=False)
+        image = np.zeros((120, 160, 3), dtype=np.uint8)
+        results = student.analyze(image, [[0, 0, 40, 100]])
+        self.assertEqual(list(results[0]), ['a', 'b'])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'student.pth')
+            student.save_checkpoint(path, epoch=1)
+            other = StudentAttributeAnalyzer(['a', 'b'], device='cpu', preprocess=preprocess,
+                                             arch='mobilenet_v3_small', pretrained=False)
+            checkpoint = other.load_checkpoint(path)
+        self.assertEqual(other.arch, 'resnet18')
+        self.assertEqual(checkpoint['epoch'], 1)
+        self.assertAlmostEqual(other.analyze(image, [[0, 0, 40, 100]])[0]['a'], results[0]['a'], places=5)
+
+    def test_unknown_arch(self):
+        with self.assertRaises(ValueError):
+            StudentAttributeAnalyzer(['a'], device='cpu', preprocess=None, arch='vgg16', pretrained=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import asyncio
+import threading
+import unittest
+from inference_service.micro_batcher import MicroBatcher, analyzer_batcher, batcher_stats
+from inference_service.pipeline_controller import PipelineController
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+        def batch_fn(items):
+            self.batches.append(list(items))
+            return [item * 2 for item in items]
+
+        self.batch_fn = batch_fn
+
+    def test_concurrent_submits_are_batched(self):
+        with MicroBatcher(self.batch_fn, max_batch_size=8, max_wait_ms=200) as batcher:
+            results = batcher.map(list(range(8)))
+        self.assertEqual(results, [i * 2 for i in range(8)])
+        self.assertEqual(self.batches, [list(range(8))])
+
+    def test_max_batch_size(self):
+        with MicroBatcher(self.batch_fn, max_batch_size=3, max_wait_ms=200) as batcher:
+            results = batcher.map(list(range(7)))
+            stats = batcher.stats()
+        self.assertEqual(results, [i * 2 for i in range(7)])
+        self.assertTrue(all(len(b) <= 3 for b in self.batches))
+        self.assertEqual(stats["items"], 7)
+        self.assertEqual(stats["largest_batch"], 3)
+
+    def test_max_wait_flushes_partial_batch(self):
+        with MicroBatcher(self.batch_fn, max_batch_size=100, max_wait_ms=1) as batcher:
+            self.assertEqual(batcher(21), 42)
+
+    def test_threads(self):
+        results = {}
+        with MicroBatcher(self.batch_fn, max_batch_size=16, max_wait_ms=50) as batcher:
+            def worker(i):
+                results[i] = batcher(i)
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(results, {i: i * 2 for i in range(16)})
+        self.assertLess(len(self.batches), 16)
+
+    def test_async_submit(self):
+        async def main(batcher):
+            return await asyncio.gather(*(batcher.submit_async(i) for i in range(4)))
+        with MicroBatcher(self.batch_fn, max_batch_size=4, max_wait_ms=100) as batcher:
+            self.assertEqual(asyncio.run(main(batcher)), [0, 2, 4, 6])
+
+    def test_errors_propagate_to_all_futures(self):
+        def broken(items):
+            raise RuntimeError("boom")
+        with MicroBatcher(broken, max_batch_size=2, max_wait_ms=100) as batcher:
+            futures = [batcher.submit(i) for i in range(2)]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result()
+
+    def test_result_count_mismatch(self):
+        with MicroBatcher(lambda items: [], max_batch_size=2) as batcher:
+            with self.assertRaises(RuntimeError):
+                batcher(1)
+
+    def test_closed_batcher_rejects_items(self):
+        batcher = MicroBatcher(self.batch_fn)
+        batcher.close()
+        with self.assertRaises(RuntimeError):
+            batcher.submit(1)
+
+    def test_cancelled_future_is_dropped(self):
+        release = threading.Event()
+
+        def batch_fn(items):
+            release.wait(5)
+            self.batches.append(list(items))
+            return [item * 2 for item in items]
+
+        with MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0) as batcher:
+            blocker = batcher.submit(1)
+            cancelled = batcher.submit(2)
+            self.assertTrue(cancelled.cancel())
+            release.set()
+            self.assertEqual(blocker.result(timeout=5), 2)
+            # the worker survives and keeps serving
+            self.assertEqual(batcher.submit(3).result(timeout=5), 6)
+        self.assertNotIn([2], self.batches)
+
+    def test_concurrent_close_resolves_or_rejects(self):
+        batcher = MicroBatcher(self.batch_fn, max_batch_size=4, max_wait_ms=1)
+        futures, rejected = [], []
+
+        def submit_many():
+            for i in range(200):
+                try:
+                    futures.append(batcher.submit(i))
+                except RuntimeError:
+                    rejected.append(i)
+
+        thread = threading.Thread(target=submit_many)
+        thread.start()
+        batcher.close()
+        thread.join()
+        for future in futures:
+            self.assertEqual(future.result(timeout=5) % 2, 0)
+
+    def test_stats_registry(self):
+        with MicroBatcher(self.batch_fn, name="stats-test") as batcher:
+            batcher(1)
+            self.assertIn("stats-test", batcher_stats())
+            self.assertEqual(batcher_stats()["stats-test"]["batches"], 1)
+
+    def test_analyzer_batcher_uses_analyze_batch(self):
+        calls = []
+
+        class Analyzer:
+            def analyze_batch(self, images, boxes_list):
+                calls.append(len(images))
+                return [[{"n": len(boxes)}] for boxes in boxes_list]
+
+        with analyzer_batcher(Analyzer(), max_batch_size=3, max_wait_ms=200) as batcher:
+            results = batcher.map([("img", [1]), ("img", [1, 2]), ("img", [])])
+        self.assertEqual(results, [[{"n": 1}], [{"n": 2}], [{"n": 0}]])
+        self.assertEqual(calls, [3])
+
+    def test_pipeline_controller_batches_list_input(self):
+        class Pre:
+            def preprocess(self, data):
+                return data
+
+        class Post:
+            def postprocess_batch(self, outputs):
+                return outputs
+
+        with MicroBatcher(self.batch_fn, max_batch_size=4, max_wait_ms=200) as batcher:
+            pipeline = PipelineController(Pre(), lambda x: x * 2, Post(), batcher=batcher)
+            self.assertEqual(pipeline.run([1, 2, 3, 4]), [2, 4, 6, 8])
+        self.assertEqual(self.batches, [[1, 2, 3, 4]])
+
+    def test_pipeline_controller_ignores_map_without_batcher(self):
+        class Pre:
+            def preprocess(self, data):
+                return data
+
+        class Post:
+            def postprocess_batch(self, outputs):
+                return outputs
+
+        class Model:
+            def __call__(self, x):
+                return x + 1
+
+            def map(self, items):
+                raise AssertionError("map must not be used without an explicit batcher")
+
+        pipeline = PipelineController(Pre(), Model(), Post())
+        self.assertEqual(pipeline.run([1, 2]), [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import os
+import numpy as np
 import torch
 import tempfile
 from models.prompt_based_attribute_analyzer import PromptBasedAttributeAnalyzer
@@ -11,6 +12,33 @@ class DummyModel(torch.nn.Module):
     def forward(self, x, **kwargs):
         return self.linear(x)
 
+class DummyClipModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.text = torch.nn.Embedding(100, 8)
+        self.image = torch.nn.Linear(10, 8)
+        self.logit_scale = torch.nn.Parameter(torch.tensor(0.0))
+        self.text_calls = 0
+    def encode_text(self, input_ids):
+        self.text_calls += 1
+        return self.text(input_ids).mean(dim=1)
+    def encode_image(self, x):
+        return self.image(x)
+
+class FixedClipModel(torch.nn.Module):
+    """
+    Text prompts and crops map to fixed embeddings that all share a large common component,
+    like real CLIP embeddings of person crops.
+    """
+    def __init__(self, text_vectors):
+        super().__init__()
+        self.text_vectors = text_vectors
+        self.logit_scale = torch.nn.Parameter(torch.log(torch.tensor(100.0)))
+    def encode_text(self, input_ids):
+        return self.text_vectors[input_ids[:, 0]]
+    def encode_image(self, x):
+        return x
+
 class TestCheckpoint(unittest.TestCase):
     def setUp(self):
         self.device = torch.device("cpu")
@@ -61,5 +89,83 @@ class TestCheckpoint(unittest.TestCase):
             self.analyzer.load_checkpoint(path)
         os.remove(path)
 
+class TestPromptEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.model = DummyClipModel()
+        self.analyzer = PromptBasedAttributeAnalyzer(
+            model=self.model,
+            attribute_names=["attr1", "attr2"],
+            device=torch.device("cpu"),
+            preprocess=lambda crops: torch.randn(len(crops), 10),
+            tokenizer=lambda prompts, **kwargs: {"input_ids": torch.arange(len(prompts) * 5).reshape(len(prompts), 5)},
+            prompts=["prompt1", "prompt2"]
+        )
+        self.image = torch.zeros((50, 50, 3)).numpy()
+        self.boxes = [[0, 0, 10, 20], ([5, 5, 30, 40], 0.9)]
+
+    def test_prompts_encoded_once(self):
+        first = self.analyzer.analyze(self.image, self.boxes)
+        self.analyzer.analyze(self.image, self.boxes)
+        self.assertEqual(self.model.text_calls, 1)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(set(first[0]), {"attr1", "attr2"})
+        self.analyzer.analyze(self.image, self.boxes, prompts=["other1", "other2"])
+        self.assertEqual(self.model.text_calls, 2)
+
+    def test_memmap_persisted_and_invalidated(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "model.pth")
+            self.analyzer.save_checkpoint(path)
+            embeddings = self.analyzer.text_embeddings()
+            self.assertEqual(self.model.text_calls, 1)
+            self.assertTrue(any(name.endswith(".npy") for name in os.listdir(tmp_dir)))
+
+            # a fresh analyzer on the same checkpoint reads the memmap instead of encoding
+            model = DummyClipModel()
+            other = PromptBasedAttributeAnalyzer(model, ["attr1", "attr2"], torch.device("cpu"),
+                                                 self.analyzer.preprocess, self.analyzer.tokenizer,
+                                                 ["prompt1", "prompt2"])
+            other.load_checkpoint(path)
+            self.assertTrue(torch.allclose(other.text_embeddings(), embeddings))
+            self.assertEqual(model.text_calls, 0)
+
+            # loading a checkpoint drops the in-memory cache
+            self.analyzer.load_checkpoint(path)
+            self.assertEqual(self.analyzer._text_cache, {})
+
+    def test_save_reencodes_with_saved_weights(self):
+        stale = self.analyzer.text_embeddings().clone()
+        with torch.no_grad():
+            self.model.text.weight.add_(1.0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "model.pth")
+            self.analyzer.save_checkpoint(path)
+            self.assertEqual([name for name in os.listdir(tmp_dir) if name.endswith(".tmp")], [])
+            model = DummyClipModel()
+            other = PromptBasedAttributeAnalyzer(model, ["attr1", "attr2"], torch.device("cpu"),
+                                                 self.analyzer.preprocess, self.analyzer.tokenizer,
+                                                 ["prompt1", "prompt2"])
+            other.load_checkpoint(path)
+            persisted = other.text_embeddings()
+        self.assertEqual(model.text_calls, 0)
+        self.assertFalse(torch.allclose(persisted, stale))
+        self.assertTrue(torch.allclose(persisted, self.analyzer.text_embeddings()))
+
+    def test_contrastive_scores_separate_crops(self):
+        vocab = ["a person with a hat.", "a person without a hat."]
+        model = FixedClipModel(torch.tensor([[1.0, 0.3, 0.0], [1.0, -0.3, 0.0]]))
+        # left half of the image is a crop with a hat, right half one without
+        preprocess = lambda crops: torch.stack([torch.tensor([1.0, 0.3 if c.mean() < 1 else -0.3, 0.0])
+                                                for c in crops])
+        analyzer = PromptBasedAttributeAnalyzer(
+            model, ["hat"], torch.device("cpu"), preprocess,
+            lambda prompts, **kwargs: {"input_ids": torch.tensor([[vocab.index(p)] for p in prompts])},
+            prompts=vocab[:1], negative_prompts=vocab[1:])
+        image = np.zeros((40, 40, 3), dtype=np.float32)
+        image[:, 20:] = 255
+        with_hat, without_hat = analyzer.analyze(image, [[0, 0, 20, 40], [20, 0, 40, 40]])
+        self.assertGreater(with_hat["hat"], 0.9)
+        self.assertLess(without_hat["hat"], 0.1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
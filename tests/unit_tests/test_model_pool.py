@@ -0,0 +1,96 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+from models.model_pool import ModelPool
+
+
+class DummyModel:
+    def __init__(self, model_type, device, checkpoint, **kwargs):
+        self.model_type = model_type
+        self.device = device
+        self.checkpoint = checkpoint
+        self.kwargs = kwargs
+
+
+class TestModelPool(unittest.TestCase):
+    def setUp(self):
+        self.rss = 0
+        self.built = []
+
+        def factory(model_type, device, checkpoint, **kwargs):
+            model = DummyModel(model_type, device, checkpoint, **kwargs)
+            self.built.append(model)
+            return model
+
+        self.pool = ModelPool(
+            memory_budget_mb=100,
+            factories={"a": factory, "b": factory, "c": factory},
+            rss_fn=lambda: self.rss * 1024 * 1024,
+        )
+
+    def test_shared_instance_and_lazy_load(self):
+        self.assertEqual(self.built, [])
+        m1 = self.pool.acquire("a", device="cpu", checkpoint="w.pth")
+        m2 = self.pool.acquire("a", device="cpu", checkpoint="w.pth")
+        self.assertIs(m1, m2)
+        self.assertEqual(len(self.built), 1)
+        self.assertEqual(self.pool.stats()["hits"], 1)
+
+    def test_key_includes_device_checkpoint_and_kwargs(self):
+        m1 = self.pool.acquire("a", device="cpu")
+        m2 = self.pool.acquire("a", device="cuda")
+        m3 = self.pool.acquire("a", device="cpu", checkpoint="w.pth")
+        m4 = self.pool.acquire("a", device="cpu", attribute_names=["x", "y"])
+        self.assertEqual(len({id(m) for m in (m1, m2, m3, m4)}), 4)
+
+    def test_lru_eviction_skips_models_in_use(self):
+        a = self.pool.acquire("a")
+        b = self.pool.acquire("b")
+        self.pool.release(b)
+        self.pool.release(a)
+        # "a" was used most recently, so "b" goes first
+        self.pool.acquire("a")
+        self.pool.release(a)
+        in_use = self.pool.acquire("c")
+        self.rss = 200
+        self.pool._enforce_budget()
+        self.assertEqual(self.pool.stats()["resident"], ["c"])
+        self.assertEqual(self.pool.stats()["evictions"], 2)
+        self.assertIs(self.pool.acquire("c"), in_use)
+
+    def test_evicted_model_is_reloaded(self):
+        with self.pool.lease("a") as first:
+            pass
+        self.assertTrue(self.pool.evict("a"))
+        with self.pool.lease("a") as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(self.pool.stats()["loads"], 2)
+
+    def test_evict_in_use_returns_false(self):
+        self.pool.acquire("a")
+        self.assertFalse(self.pool.evict("a"))
+
+    def test_release_errors(self):
+        with self.assertRaises(ValueError):
+            self.pool.release(object())
+        model = self.pool.acquire("a")
+        self.pool.release(model)
+        with self.assertRaises(RuntimeError):
+            self.pool.release(model)
+
+    def test_unknown_model_type(self):
+        with self.assertRaises(ValueError):
+            self.pool.acquire("unknown")
+
+    def test_failed_load_is_not_cached(self):
+        def broken(*args, **kwargs):
+            raise RuntimeError("boom")
+        self.pool.register_factory("broken", broken)
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire("broken")
+        self.assertEqual(self.pool.stats()["resident"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
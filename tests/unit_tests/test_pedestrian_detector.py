@@ -3,7 +3,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
 import numpy as np
 import pytest
-from models.pedestrian_detector import PedestrianDetector
+from models.pedestrian_detector import PedestrianDetector, _tile_starts
 from preprocess.read_image import DetectionImagePreprocessor
 from preprocess.registry import register_preprocessor
 
@@ -21,4 +21,218 @@ def test_pedestrian_detector_multi_model(model_type):
     for item in results:
         box, score = item
         assert isinstance(box, list)
-        assert isinstance(score, float) or isinstance(score, np.floating)
\ No newline at end of file
+        assert isinstance(score, float) or isinstance(score, np.floating)
+@pytest.mark.parametrize("model_type", ["fasterrcnn", "yolov8", "retinanet"])
+def test_pedestrian_detector_detect_batch(model_type):
+    dummy_imgs = [np.zeros((224, 224, 3), dtype=np.uint8) for _ in range(3)]
+    detector = PedestrianDetector(model_type=model_type, conf_thresh=0.0, preprocess=DetectionImagePreprocessor())
+    results = detector.detect_batch(dummy_imgs)
+    assert isinstance(results, list)
+    assert len(results) == len(dummy_imgs)
+    for per_image in results:
+        assert isinstance(per_image, list)
+        for box, score in per_image:
+            assert isinstance(box, list)
+            assert isinstance(score, float) or isinstance(score, np.floating)
+    assert detector.detect_batch([]) == []
+
+@pytest.mark.parametrize("model_type", ["fasterrcnn", "yolov8", "retinanet"])
+def test_pedestrian_detector_person_only(model_type):
+    dummy_img = np.zeros((224, 224, 3), dtype=np.uint8)
+    detector = PedestrianDetector(model_type=model_type, conf_thresh=0.0, preprocess=DetectionImagePreprocessor(),
+                                  person_only=True, max_detections=5)
+    results = detector.detect(dummy_img)
+    assert isinstance(results, list)
+    assert len(results) <= 5
+    for box, score in results:
+        assert isinstance(box, list)
+        assert isinstance(score, float)
+
+def test_person_only_predictor_keeps_full_softmax_score():
+    import torch
+    from torchvision.models.detection import fasterrcnn_resnet50_fpn
+    from models.pedestrian_detector import COCO_PERSON_LABEL, _restrict_fastrcnn_predictor
+    model = fasterrcnn_resnet50_fpn(weights=None, weights_backbone=None).eval()
+    full = model.roi_heads.box_predictor
+    _restrict_fastrcnn_predictor(model, COCO_PERSON_LABEL)
+    features = torch.randn(8, full.cls_score.in_features)
+    with torch.no_grad():
+        full_scores, full_deltas = full(features)
+        scores, deltas = model.roi_heads.box_predictor(features)
+    assert scores.shape == (8, 2)
+    expected = full_scores.softmax(-1)[:, COCO_PERSON_LABEL]
+    assert torch.allclose(scores.softmax(-1)[:, 1], expected, atol=1e-6)
+    assert torch.equal(deltas[:, 4:], full_deltas[:, 4 * COCO_PERSON_LABEL:4 * COCO_PERSON_LABEL + 4])
+
+def test_person_only_rejected_for_detr():
+    with pytest.raises(ValueError):
+        PedestrianDetector(model_type="detr", person_only=True)
+
+def test_tile_starts_cover_image():
+    assert _tile_starts(500, 640, 0.2) == [0]
+    starts = _tile_starts(1500, 640, 0.25)
+    assert starts[0] == 0
+    assert starts[-1] == 1500 - 640
+    for a, b in zip(starts, starts[1:]):
+        assert 0 < b - a <= 480
+
+@pytest.mark.parametrize("model_type", ["fasterrcnn", "yolov8"])
+def test_pedestrian_detector_detect_tiled(model_type):
+    dummy_img = np.zeros((900, 1400, 3), dtype=np.uint8)
+    detector = PedestrianDetector(model_type=model_type, conf_thresh=0.0, preprocess=DetectionImagePreprocessor())
+    results = detector.detect_tiled(dummy_img, tile_size=(512, 512), overlap=0.25, include_full_frame=True)
+    assert isinstance(results, list)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    for box, _ in results:
+        assert 0 <= box[0] <= box[2] <= 1400
+        assert 0 <= box[1] <= box[3] <= 900
+    with pytest.raises(ValueError):
+        detector.detect_tiled(dummy_img, overlap=1.0)
+
+class _BrightRegionModel:
+    """
+    Stand-in torchvision detector: reports the bright region of each input tensor as a person,
+    in that tensor's pixel coordinates. Inputs smaller than 600 px wide (tiles) score 1.0.
+    """
+    def __init__(self):
+        self.input_shapes = []
+
+    def __call__(self, tensors):
+        import torch
+        outputs = []
+        for tensor in tensors:
+            self.input_shapes.append(tuple(tensor.shape))
+            gray = tensor.mean(0)
+            ys, xs = torch.nonzero(gray > gray.min() + 0.5 * (gray.max() - gray.min()) + 1e-6, as_tuple=True)
+            if len(xs) == 0:
+                outputs.append({"boxes": torch.zeros((0, 4)), "scores": torch.zeros(0), "labels": torch.zeros(0, dtype=torch.int64)})
+                continue
+            box = torch.tensor([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], dtype=torch.float32)
+            score = 1.0 if tensor.shape[-1] < 600 else 0.9
+            outputs.append({"boxes": box, "scores": torch.tensor([score]), "labels": torch.tensor([1])})
+        return outputs
+
+
+def _stub_detector(preprocess):
+    from models.pedestrian_detector import COCO_PERSON_LABEL
+    detector = PedestrianDetector.__new__(PedestrianDetector)
+    detector.model_type, detector.device, detector.preprocess = "fasterrcnn", "cpu", preprocess
+    detector.conf_thresh, detector.person_only, detector.max_detections = 0.5, False, 100
+    detector.tile_size, detector.tile_overlap, detector.tile_iou_thresh = (512, 512), 0.25, 0.5
+    detector.person_label = COCO_PERSON_LABEL
+    detector.inference_size, detector._sized_models = None, {}
+    detector.model = _BrightRegionModel()
+    return detector
+
+def test_detect_maps_boxes_back_from_preprocessed_size():
+    img = np.zeros((448, 672, 3), dtype=np.uint8)
+    img[112:336, 168:336] = 255
+    detector = _stub_detector(DetectionImagePreprocessor())
+    [(box, score)] = detector.detect(img)
+    assert detector.model.input_shapes == [(3, 224, 224)]
+    assert np.allclose(box, [168, 112, 336, 336], atol=6)
+
+def test_detect_tiled_returns_frame_coordinates():
+    img = np.zeros((900, 1400, 3), dtype=np.uint8)
+    img[100:180, 100:160] = 255  # inside the first tile only
+    detector = _stub_detector(DetectionImagePreprocessor())
+    results = detector.detect_tiled(img, include_full_frame=True)
+    # tiles keep their native size; only the full frame goes through the 224 preprocess
+    assert (3, 512, 512) in detector.model.input_shapes
+    assert (3, 224, 224) in detector.model.input_shapes
+    box, score = results[0]
+    assert score == 1.0
+    assert np.allclose(box, [100, 100, 160, 180], atol=1)
+    # the full-frame detection of the same person is merged by cross-tile NMS
+    assert len(results) == 1
+
+def test_inference_size_per_call_leaves_shared_model_untouched():
+    detector = PedestrianDetector(model_type="fasterrcnn", conf_thresh=0.0)
+    default_sizes = (detector.model.transform.min_size, detector.model.transform.max_size)
+    results = detector.detect(np.zeros((240, 320, 3), dtype=np.uint8), inference_size=320, resize=False)
+    assert isinstance(results, list)
+    assert (detector.model.transform.min_size, detector.model.transform.max_size) == default_sizes
+    sized = detector._sized_models[320]
+    assert (sized.transform.min_size, sized.transform.max_size) == ((320,), 320)
+    assert sized.backbone is detector.model.backbone
+
+def test_pedestrian_detector_quantize(tmp_path):
+    from PIL import Image
+    for i in range(2):
+        Image.fromarray(np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)).save(tmp_path / f"calib_{i}.jpg")
+    detector = PedestrianDetector(model_type="retinanet", conf_thresh=0.0, preprocess=DetectionImagePreprocessor(),
+                                  person_only=True, quantize=True, calibration_dir=str(tmp_path))
+    assert detector.quantized
+    results = detector.detect(np.zeros((224, 224, 3), dtype=np.uint8))
+    assert isinstance(results, list)
+    for box, score in results:
+        assert isinstance(box, list)
+        assert isinstance(score, float)
+
+def test_pedestrian_detector_quantize_requires_calibration():
+    with pytest.raises(ValueError):
+        PedestrianDetector(model_type="retinanet", quantize=True)
+
+def test_pedestrian_detector_torchscript_backend(tmp_path):
+    img = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    eager = PedestrianDetector(model_type="retinanet", conf_thresh=0.0, preprocess=DetectionImagePreprocessor(),
+                               person_only=True)
+    exported = PedestrianDetector(model_type="torchscript", export_from="retinanet", conf_thresh=0.0,
+                                  preprocess=DetectionImagePreprocessor(), person_only=True,
+                                  artifact_dir=str(tmp_path))
+    assert any(name.endswith(".pt") for name in os.listdir(tmp_path))
+    expected = eager.detect(img)
+    results = exported.detect(img)
+    assert len(results) == len(expected)
+    for (box, score), (ref_box, ref_score) in zip(results, expected):
+        assert np.allclose(box, ref_box, atol=1e-3)
+        assert abs(score - ref_score) < 1e-4
+    # second construction loads the cached artifact
+    cached = PedestrianDetector(model_type="torchscript", export_from="retinanet", conf_thresh=0.0,
+                                preprocess=DetectionImagePreprocessor(), person_only=True,
+                                artifact_dir=str(tmp_path))
+    assert len(cached.detect(img)) == len(expected)
+
+def test_export_refuses_random_fasterrcnn_head(tmp_path):
+    with pytest.raises(ValueError):
+        PedestrianDetector(model_type="torchscript", export_from="fasterrcnn", artifact_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+def test_export_uses_unique_temp_files(tmp_path):
+    import torch
+    from models.detector_export import _temp_path, export_detector
+    target = str(tmp_path / "model.pt")
+    first, second = _temp_path(target), _temp_path(target)
+    assert first != second
+    assert os.path.dirname(first) == str(tmp_path)
+    with pytest.raises(ValueError):
+        export_detector(torch.nn.Identity(), "bogus", target)
+    assert not os.path.exists(target)
+
+def test_roi_attribute_analyzer_shares_detector(tmp_path):
+    from models.roi_attribute_head import RoIAttributeAnalyzer
+    detector = PedestrianDetector(model_type="fasterrcnn", conf_thresh=0.0)
+    analyzer = RoIAttributeAnalyzer(attribute_names=["a", "b", "c"], detector=detector)
+    assert analyzer.model is detector.model
+    dummy_img = np.zeros((240, 320, 3), dtype=np.uint8)
+    results = analyzer.analyze(dummy_img, [([10, 20, 110, 220], 0.9), [0, 0, 320, 240]])
+    assert len(results) == 2
+    assert set(results[0]) == {"a", "b", "c"}
+    assert all(0.0 <= p <= 1.0 for p in results[0].values())
+    for item in analyzer.detect_and_analyze(dummy_img):
+        assert set(item) == {"box", "score", "attributes"}
+    path = str(tmp_path / "roi_head.pth")
+    analyzer.save_checkpoint(path, epoch=1)
+    reloaded = RoIAttributeAnalyzer(detector=detector, checkpoint=path)
+    assert reloaded.attribute_names == ["a", "b", "c"]
+    # the checkpoint holds the head only and refuses a detector with other backbone weights
+    import torch
+    assert not any(name.startswith("backbone.") for name in torch.load(path)["model_state_dict"])
+    other = PedestrianDetector(model_type="fasterrcnn", conf_thresh=0.0)
+    with torch.no_grad():
+        next(other.model.backbone.parameters()).add_(1.0)
+    before = {name: value.clone() for name, value in other.model.state_dict().items()}
+    with pytest.raises(ValueError):
+        RoIAttributeAnalyzer(detector=other, checkpoint=path)
+    assert all(torch.equal(before[name], value) for name, value in other.model.state_dict().items())
@@ -100,6 +100,16 @@ class TestPreprocessManager(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.manager.preprocess("data", mode='video')
 
+    def test_modes_map_to_lazy_builtins(self):
+        PREPROCESSOR_REGISTRY.clear()
+        manager = PreprocessManager(modes={'text': 'custom_text'})
+        # built-in entry points are registered as strings, nothing imported yet
+        self.assertEqual(PREPROCESSOR_REGISTRY['detection_image'], 'preprocess.read_image:DetectionImagePreprocessor')
+        result = manager.preprocess(np.zeros((32, 48, 3), dtype=np.uint8), mode='image')
+        self.assertEqual(tuple(result.shape), (3, 224, 224))
+        register_preprocessor('custom_text', DummyTextPreprocessor())
+        self.assertEqual(manager.preprocess("hi"), "text:hi")
+
     def test_preprocess_kwargs(self):
         # 測試帶有額外參數的前處理
         class KwPreprocessor:
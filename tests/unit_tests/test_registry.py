@@ -1,5 +1,8 @@
+import threading
+import time
 import unittest
-from preprocess.registry import register_preprocessor, get_preprocessor
+from preprocess.registry import (BUILTIN_PREPROCESSORS, PREPROCESSOR_REGISTRY, clear_instances, get_preprocessor,
+                                 register_builtin_preprocessors, register_preprocessor, registry_stats, warmup)
 
 class DummyPreprocessor:
     def __init__(self, value=0):
@@ -16,6 +19,7 @@ class TestRegistryFactory(unittest.TestCase):
         # 清空 registry
         from preprocess.registry import PREPROCESSOR_REGISTRY
         PREPROCESSOR_REGISTRY.clear()
+        clear_instances()
 
     def test_register_and_get_instance(self):
         inst = DummyPreprocessorInstance()
@@ -39,5 +43,81 @@ class TestRegistryFactory(unittest.TestCase):
         pre = get_preprocessor('class', value=10)
         self.assertEqual(pre(1), 11)
 
+    def test_instances_cached_per_kwargs(self):
+        register_preprocessor('class', DummyPreprocessor)
+        first = get_preprocessor('class', value=1)
+        self.assertIs(get_preprocessor('class', value=1), first)
+        self.assertIsNot(get_preprocessor('class', value=2), first)
+        stats = registry_stats()['preprocessors']['class']
+        self.assertEqual(stats['builds'], 2)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_reregister_invalidates_instances(self):
+        register_preprocessor('class', DummyPreprocessor)
+        first = get_preprocessor('class', value=1)
+        register_preprocessor('class', DummyPreprocessor)
+        self.assertIsNot(get_preprocessor('class', value=1), first)
+
+    def test_concurrent_get_builds_once(self):
+        class SlowPreprocessor(DummyPreprocessor):
+            builds = 0
+            def __init__(self, value=0):
+                SlowPreprocessor.builds += 1
+                time.sleep(0.05)
+                super().__init__(value)
+        register_preprocessor('slow', SlowPreprocessor)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_preprocessor('slow'))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(SlowPreprocessor.builds, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+    def test_warmup_builds_and_runs(self):
+        register_preprocessor('class', DummyPreprocessor)
+        register_preprocessor('inst', DummyPreprocessorInstance())
+        timings = warmup(configs={'class': {'value': 3}, 'inst': {}}, samples={'class': 1, 'inst': 1})
+        self.assertEqual(set(timings), {'class', 'inst'})
+        self.assertEqual(registry_stats()['instances'], 1)
+        self.assertEqual(registry_stats()['preprocessors']['class']['builds'], 1)
+        self.assertIs(get_preprocessor('class', value=3), get_preprocessor('class', value=3))
+
+    def test_reregister_drops_build_locks(self):
+        from preprocess import registry
+        register_preprocessor('class', DummyPreprocessor)
+        get_preprocessor('class', value=1)
+        self.assertIn(('class', (('value', 1),)), registry._BUILD_LOCKS)
+        register_preprocessor('class', DummyPreprocessor)
+        self.assertEqual([key for key in registry._BUILD_LOCKS if key[0] == 'class'], [])
+
+    def test_unhashable_kwargs_rejected(self):
+        register_preprocessor('class', DummyPreprocessor)
+        self.assertIs(get_preprocessor('class', value=[1, {'a': 2}]), get_preprocessor('class', value=[1, {'a': 2}]))
+        with self.assertRaises(TypeError):
+            get_preprocessor('class', value=bytearray(b'x'))
+        self.assertEqual(registry_stats()['instances'], 1)
+
+    def test_warmup_requires_sample_for_unknown_types(self):
+        register_preprocessor('text_like', DummyPreprocessorInstance())
+        with self.assertRaises(ValueError):
+            warmup(configs={'text_like': {}})
+        self.assertIn('text_like', warmup(configs={'text_like': {}}, samples={'text_like': 'a'}))
+
+    def test_lazy_entry_point(self):
+        register_preprocessor('lazy', 'json:JSONDecoder')
+        self.assertEqual(PREPROCESSOR_REGISTRY['lazy'], 'json:JSONDecoder')
+        decoder = get_preprocessor('lazy')
+        self.assertEqual(decoder.decode('[1]'), [1])
+        self.assertIs(get_preprocessor('lazy'), decoder)
+        register_preprocessor('bad', 'json.JSONDecoder')
+        with self.assertRaises(ValueError):
+            get_preprocessor('bad')
+
+    def test_register_builtins_imports_nothing(self):
+        register_builtin_preprocessors()
+        self.assertEqual({k: PREPROCESSOR_REGISTRY[k] for k in BUILTIN_PREPROCESSORS}, BUILTIN_PREPROCESSORS)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import numpy as np
+from inference_service.resolution_controller import AdaptiveResolutionController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDetector:
+    """
+    Returns one box covering the central half of the input; latency grows with input area.
+    """
+    def __init__(self, clock, ms_per_megapixel=200.0):
+        self.clock = clock
+        self.ms_per_megapixel = ms_per_megapixel
+        self.input_sizes = []
+        self.inference_sizes = []
+
+    def set_inference_size(self, size):
+        raise AssertionError("the controller must pass the size per call")
+
+    def detect(self, image, inference_size=None, resize=True):
+        self.inference_sizes.append((inference_size, resize))
+        h, w = image.shape[:2]
+        self.input_sizes.append((h, w))
+        self.clock.now += self.ms_per_megapixel * (h * w) / 1e6 / 1000.0
+        return [([w * 0.25, h * 0.25, w * 0.75, h * 0.75], 0.9)]
+
+
+class TestAdaptiveResolutionController(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.detector = FakeDetector(self.clock)
+        self.image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+
+    def test_boxes_mapped_to_full_resolution(self):
+        controller = AdaptiveResolutionController(self.detector, initial_scale=0.5, clock=self.clock)
+        detections = controller.detect(self.image)
+        self.assertEqual(self.detector.input_sizes[-1], (500, 1000))
+        self.assertEqual(self.detector.inference_sizes[-1], (1000, False))
+        box, score = detections[0]
+        np.testing.assert_allclose(box, [500, 250, 1500, 750], atol=2)
+        self.assertEqual(score, 0.9)
+
+    def test_scale_drops_when_over_budget(self):
+        # 2 MP * 200 ms/MP = 400 ms at full resolution
+        controller = AdaptiveResolutionController(self.detector, latency_budget_ms=100, window=3,
+                                                  min_box_size=10, clock=self.clock)
+        for _ in range(60):
+            controller.detect(self.image)
+        self.assertLess(controller.scale, 1.0)
+        self.assertLessEqual(controller._latency_percentile() or 0, 100)
+
+    def test_scale_rises_with_headroom(self):
+        controller = AdaptiveResolutionController(self.detector, latency_budget_ms=10000, window=3,
+                                                  initial_scale=0.3, clock=self.clock)
+        for _ in range(60):
+            controller.detect(self.image)
+        self.assertEqual(controller.scale, 1.0)
+
+    def test_small_people_limit_downscaling(self):
+        # central box is 500 px tall at full resolution; keep it at least 250 px at the detector input
+        controller = AdaptiveResolutionController(self.detector, latency_budget_ms=1, window=3,
+                                                  min_box_size=250, clock=self.clock)
+        for _ in range(60):
+            controller.detect(self.image)
+        self.assertGreaterEqual(controller.scale, 0.5 - 1e-6)
+
+    def test_detect_and_analyze_uses_full_resolution_image(self):
+        seen = {}
+
+        class Analyzer:
+            def analyze(self, image, boxes):
+                seen["shape"] = image.shape
+                return [{"attr": 1.0} for _ in boxes]
+
+        controller = AdaptiveResolutionController(self.detector, initial_scale=0.5, clock=self.clock)
+        detections, attributes = controller.detect_and_analyze(self.image, Analyzer())
+        self.assertEqual(seen["shape"], self.image.shape)
+        self.assertEqual(len(attributes), len(detections))
+
+    def test_invalid_scale_range(self):
+        with self.assertRaises(ValueError):
+            AdaptiveResolutionController(self.detector, min_scale=0.8, max_scale=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
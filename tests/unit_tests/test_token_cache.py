@@ -0,0 +1,74 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import numpy as np
+from preprocess.base_preprocessor import TOKEN_CACHE, BaseTextTokenizer, TokenCache, format_token_batch, pack_token_ids
+
+
+class CountingTokenizer(BaseTextTokenizer):
+    """
+    Whitespace tokenizer (id = word length) that counts how many texts it really encodes.
+    """
+    def __init__(self, max_length=6):
+        self.max_length = max_length
+        self.cache_namespace = ('counting', id(self))
+        self.encoded = 0
+
+    def _encode_many(self, batch):
+        self.encoded += len(batch)
+        return [[len(word) for word in text.split()] for text in batch]
+
+    def __call__(self, texts, padding=True, truncation=True, return_tensors='np'):
+        texts = [texts] if isinstance(texts, str) else texts
+        ids_list = self.encode_cached(texts, self._encode_many, self.max_length, truncation)
+        return format_token_batch(ids_list, self.max_length, padding, truncation, 0, return_tensors, True)
+
+    def process_batch(self, texts):
+        return self(texts)
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        TOKEN_CACHE.clear()
+
+    def test_repeated_prompts_hit_cache(self):
+        tokenizer = CountingTokenizer()
+        first = tokenizer(["a man", "a woman", "a man"])
+        self.assertEqual(tokenizer.encoded, 2)  # duplicates in one call are encoded once
+        second = tokenizer(["a woman", "a man"])
+        self.assertEqual(tokenizer.encoded, 2)
+        np.testing.assert_array_equal(second["input_ids"], first["input_ids"][[1, 0]])
+        self.assertEqual(TOKEN_CACHE.stats()["hits"], 2)
+
+    def test_namespaces_do_not_collide(self):
+        a, b = CountingTokenizer(), CountingTokenizer()
+        a("a man")
+        b("a man")
+        self.assertEqual((a.encoded, b.encoded), (1, 1))
+
+    def test_lru_capacity(self):
+        cache = TokenCache(capacity=2)
+        cache.put_many([("a", np.array([1])), ("b", np.array([2]))])
+        cache.get_many(["a"])
+        cache.put_many([("c", np.array([3]))])
+        self.assertEqual([ids is None for ids in cache.get_many(["a", "b", "c"])], [False, True, False])
+
+    def test_padding_and_mask(self):
+        out = CountingTokenizer(max_length=4)(["a bb ccc dddd eeeee", "hi"], return_tensors='np')
+        self.assertEqual(out["input_ids"].dtype, np.int64)
+        np.testing.assert_array_equal(out["input_ids"], [[1, 2, 3, 4], [2, 0, 0, 0]])
+        np.testing.assert_array_equal(out["attention_mask"], [[1, 1, 1, 1], [1, 0, 0, 0]])
+
+    def test_pad_id_is_not_masked_inside_text(self):
+        ids, mask = pack_token_ids([np.array([5, 0, 7])], 5, pad_id=0)
+        np.testing.assert_array_equal(mask, [[1, 1, 1, 0, 0]])
+
+    def test_no_padding_returns_ragged_lists(self):
+        out = CountingTokenizer()(["a bb", "ccc"], padding=False, return_tensors=None)
+        self.assertEqual(out["input_ids"], [[1, 2], [3]])
+        self.assertEqual(out["attention_mask"], [[1, 1], [1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
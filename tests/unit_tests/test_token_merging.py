@@ -0,0 +1,47 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import torch
+from torchvision.models import VisionTransformer
+from models.token_merging import apply_token_merging, bipartite_soft_matching, merge_schedule, merge_weighted
+
+
+class TestTokenMerging(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = VisionTransformer(image_size=32, patch_size=4, num_layers=4, num_heads=2,
+                                       hidden_dim=16, mlp_dim=32, num_classes=3).eval()
+        self.images = torch.randn(2, 3, 32, 32)
+
+    def test_matching_removes_r_tokens_and_keeps_class_token(self):
+        x = torch.randn(2, 9, 16)
+        merge = bipartite_soft_matching(x, r=3, class_token=True)
+        merged, size = merge_weighted(merge, x, None)
+        self.assertEqual(tuple(merged.shape), (2, 6, 16))
+        self.assertTrue(torch.allclose(merged[:, 0], x[:, 0]))
+        self.assertTrue(torch.allclose(size.sum(dim=1), torch.full((2, 1), 9.0)))
+
+    def test_no_reduction_matches_original(self):
+        fast = apply_token_merging(self.model, 0.0)
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(fast(self.images), self.model(self.images), atol=1e-5))
+
+    def test_reduction_shares_weights_and_keeps_model(self):
+        original_encoder = self.model.encoder
+        fast = apply_token_merging(self.model, 0.5)
+        self.assertIs(self.model.encoder, original_encoder)
+        self.assertEqual(fast.encoder.schedule, [8, 8, 8, 8])
+        self.assertEqual(list(fast.state_dict()), list(self.model.state_dict()))
+        self.assertIs(fast.encoder.layers, self.model.encoder.layers)
+        with torch.no_grad():
+            out = fast(self.images)
+        self.assertEqual(tuple(out.shape), (2, 3))
+
+    def test_invalid_reduction(self):
+        with self.assertRaises(ValueError):
+            merge_schedule(196, 12, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
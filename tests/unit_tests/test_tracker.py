@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import numpy as np
+from inference_service.tracker import SortTracker, TrackedAttributeAnalyzer
+
+
+class CountingAnalyzer:
+    def __init__(self):
+        self.calls = 0
+        self.boxes = 0
+
+    def analyze(self, image, boxes):
+        self.calls += 1
+        self.boxes += len(boxes)
+        return [{"Female": 0.9, "call": float(self.calls)} for _ in boxes]
+
+
+def moving_detections(frame):
+    # two people walking right at different speeds
+    return [
+        ([10.0 + 2 * frame, 20.0, 60.0 + 2 * frame, 140.0], 0.9),
+        ([200.0 + 5 * frame, 30.0, 250.0 + 5 * frame, 150.0], 0.8),
+    ]
+
+
+class TestSortTracker(unittest.TestCase):
+    def test_ids_are_stable_across_frames(self):
+        tracker = SortTracker()
+        first = tracker.update(moving_detections(0))
+        ids = sorted(track_id for track_id, _, _ in first)
+        for frame in range(1, 20):
+            tracks = tracker.update(moving_detections(frame))
+            self.assertEqual(sorted(track_id for track_id, _, _ in tracks), ids)
+
+    def test_lost_track_expires(self):
+        tracker = SortTracker(max_age=2)
+        tracker.update(moving_detections(0))
+        for _ in range(3):
+            tracker.update([])
+        self.assertEqual(tracker.active_ids(), set())
+        tracks = tracker.update(moving_detections(4))
+        self.assertTrue(all(track_id > 2 for track_id, _, _ in tracks))
+
+    def test_min_hits(self):
+        tracker = SortTracker(min_hits=3)
+        tracker.update(moving_detections(0))
+        tracker.update(moving_detections(1))
+        tracker.update(moving_detections(2))
+        tracker.update([([500.0, 500.0, 540.0, 600.0], 0.7)] + moving_detections(3))
+        tracks = tracker.update(moving_detections(4))
+        self.assertEqual(len(tracks), 2)
+
+
+class TestTrackedAttributeAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = CountingAnalyzer()
+        self.image = np.zeros((480, 640, 3), dtype=np.uint8)
+
+    def test_attributes_computed_once_per_track(self):
+        tracked = TrackedAttributeAnalyzer(self.analyzer, refresh_interval=0)
+        for frame in range(30):
+            results = tracked.analyze_frame(self.image, moving_detections(frame))
+            self.assertEqual(len(results), 2)
+        self.assertEqual(self.analyzer.calls, 1)
+        self.assertEqual(self.analyzer.boxes, 2)
+        self.assertEqual(tracked.stats()["cache_hits"], 58)
+        self.assertEqual(results[0]["attributes"]["call"], 1.0)
+
+    def test_periodic_refresh(self):
+        tracked = TrackedAttributeAnalyzer(self.analyzer, refresh_interval=10)
+        for frame in range(25):
+            tracked.analyze_frame(self.image, moving_detections(frame))
+        # frames 1, 11 and 21
+        self.assertEqual(self.analyzer.calls, 3)
+
+    def test_new_person_only_analyzes_new_track(self):
+        tracked = TrackedAttributeAnalyzer(self.analyzer, refresh_interval=0)
+        tracked.analyze_frame(self.image, moving_detections(0))
+        newcomer = ([400.0, 300.0, 450.0, 420.0], 0.95)
+        results = tracked.analyze_frame(self.image, moving_detections(1) + [newcomer])
+        self.assertEqual(self.analyzer.boxes, 3)
+        self.assertEqual(len(results), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
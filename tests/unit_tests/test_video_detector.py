@@ -0,0 +1,75 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../backend')))
+import unittest
+import numpy as np
+from inference_service.video_detector import MotionGatedDetector
+
+
+class CountingDetector:
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return [([0.0, 0.0, 10.0, 10.0], 0.9 - 0.01 * self.calls)]
+
+
+class TestMotionGatedDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = CountingDetector()
+        self.static = np.full((240, 320, 3), 100, dtype=np.uint8)
+
+    def test_static_frames_are_skipped(self):
+        gated = MotionGatedDetector(self.detector, refresh_interval=0)
+        results = [gated.detect(self.static.copy()) for _ in range(10)]
+        self.assertEqual(self.detector.calls, 1)
+        self.assertTrue(all(r == results[0] for r in results))
+        self.assertEqual(gated.stats()["frames_processed"], 1)
+        self.assertEqual(gated.stats()["frames_skipped"], 9)
+
+    def test_sensor_noise_is_ignored(self):
+        gated = MotionGatedDetector(self.detector, refresh_interval=0)
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            noise = rng.integers(-3, 4, self.static.shape)
+            gated.detect(np.clip(self.static.astype(int) + noise, 0, 255).astype(np.uint8))
+        self.assertEqual(self.detector.calls, 1)
+
+    def test_motion_triggers_detection(self):
+        gated = MotionGatedDetector(self.detector, refresh_interval=0)
+        gated.detect(self.static)
+        moved = self.static.copy()
+        moved[60:180, 100:160] = 255
+        gated.detect(moved)
+        self.assertEqual(self.detector.calls, 2)
+        # the moved frame is the new reference
+        gated.detect(moved.copy())
+        self.assertEqual(self.detector.calls, 2)
+
+    def test_forced_refresh(self):
+        gated = MotionGatedDetector(self.detector, refresh_interval=4)
+        for _ in range(9):
+            gated.detect(self.static)
+        # frames 0, 4 and 8 are detected
+        self.assertEqual(self.detector.calls, 3)
+        self.assertEqual(gated.stats()["forced_refreshes"], 2)
+
+    def test_resolution_change_and_reset(self):
+        gated = MotionGatedDetector(self.detector)
+        gated.detect(self.static)
+        gated.detect(np.full((480, 480, 3), 100, dtype=np.uint8))
+        self.assertEqual(self.detector.calls, 2)
+        gated.reset()
+        self.assertEqual(gated.stats()["frames"], 0)
+        gated.detect(self.static)
+        self.assertEqual(self.detector.calls, 3)
+
+    def test_run_over_stream(self):
+        gated = MotionGatedDetector(self.detector)
+        outputs = list(gated.run(self.static for _ in range(5)))
+        self.assertEqual(len(outputs), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
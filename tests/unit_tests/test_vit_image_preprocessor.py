@@ -36,6 +36,28 @@ class TestViTImagePreprocessor(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.preprocessor("not an image")
 
+    def test_batch_matches_single_in_float32(self):
+        imgs = [np.random.randint(0, 255, (300, 200, 3), dtype=np.uint8) for _ in range(3)]
+        batch = self.preprocessor.batch_preprocess(imgs)
+        self.assertEqual(batch.dtype, np.float32)
+        for img, row in zip(imgs, batch):
+            single = self.preprocessor(img)
+            self.assertEqual(single.dtype, np.float32)
+            np.testing.assert_allclose(row, single, atol=1e-6)
+
+    def test_batch_preprocess_into_out(self):
+        imgs = [np.ones((64, 64, 3), dtype=np.uint8) * 128] * 2
+        out = np.zeros((2, 3, 224, 224), dtype=np.float32)
+        result = self.preprocessor.batch_preprocess(imgs, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out, (128 / 255 - 0.5) / 0.5, atol=1e-6)
+        with self.assertRaises(ValueError):
+            self.preprocessor.batch_preprocess(imgs, out=np.zeros((2, 3, 224, 224), dtype=np.float64))
+
+    def test_batch_invalid_image_index(self):
+        with self.assertRaisesRegex(ValueError, "index 1"):
+            self.preprocessor.batch_preprocess([np.zeros((8, 8, 3), dtype=np.uint8), "not an image"])
+
     def test_gray_image(self):
         img = Image.new("L", (256, 256), color=128)
         result = self.preprocessor(img)